@@ -0,0 +1,26 @@
+"""Add (session_id, id) index on transactions for bulk edits by id list
+
+Revision ID: 2b8f5d0c9e61
+Revises: 7c2e9a41d5b3
+Create Date: 2026-10-17 18:41:07.562930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b8f5d0c9e61'
+down_revision: Union[str, None] = '7c2e9a41d5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_session_id_id', 'transactions', ['session_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_session_id_id', table_name='transactions')
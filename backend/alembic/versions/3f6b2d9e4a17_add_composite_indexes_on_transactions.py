@@ -0,0 +1,29 @@
+"""Add composite indexes on transactions for session/category and client/date lookups
+
+Revision ID: 3f6b2d9e4a17
+Revises: c7a1801d7807
+Create Date: 2026-10-17 09:12:44.318202
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b2d9e4a17'
+down_revision: Union[str, None] = 'c7a1801d7807'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # session_id and client_id already have single-column indexes (index=True)
+    op.create_index('ix_transactions_session_id_category', 'transactions', ['session_id', 'category'], unique=False)
+    op.create_index('ix_transactions_client_id_date', 'transactions', ['client_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_client_id_date', table_name='transactions')
+    op.drop_index('ix_transactions_session_id_category', table_name='transactions')
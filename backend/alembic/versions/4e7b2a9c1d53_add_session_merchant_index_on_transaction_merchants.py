@@ -0,0 +1,31 @@
+"""Add (session_id, merchant) index on transaction_merchants for the merchant list
+
+Revision ID: 4e7b2a9c1d53
+Revises: 9d4a1c7e3f28
+Create Date: 2026-10-17 19:48:20.615937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7b2a9c1d53'
+down_revision: Union[str, None] = '9d4a1c7e3f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # transaction_merchants is created by create_all, not by an earlier revision
+    if not sa.inspect(op.get_bind()).has_table('transaction_merchants'):
+        return
+    op.create_index('ix_transaction_merchants_session_id_merchant', 'transaction_merchants', ['session_id', 'merchant'], unique=False)
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('transaction_merchants'):
+        return
+    op.drop_index('ix_transaction_merchants_session_id_merchant', table_name='transaction_merchants')
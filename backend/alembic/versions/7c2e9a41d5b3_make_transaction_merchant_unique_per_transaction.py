@@ -0,0 +1,42 @@
+"""Make transaction_merchants unique per transaction so merchants can be upserted
+
+Revision ID: 7c2e9a41d5b3
+Revises: f3a9d6e2b715
+Create Date: 2026-10-17 18:04:52.107315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9a41d5b3'
+down_revision: Union[str, None] = 'f3a9d6e2b715'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # transaction_merchants is created by create_all, not by an earlier revision
+    if not sa.inspect(op.get_bind()).has_table('transaction_merchants'):
+        return
+
+    # Keep the first row per transaction; readers already treat it as the merchant
+    op.execute(
+        "DELETE FROM transaction_merchants "
+        "WHERE transaction_id IS NOT NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM transaction_merchants "
+        "WHERE transaction_id IS NOT NULL GROUP BY transaction_id)"
+    )
+    op.drop_index('ix_transaction_merchants_transaction_id', table_name='transaction_merchants')
+    op.create_index('ix_transaction_merchants_transaction_id', 'transaction_merchants', ['transaction_id'], unique=True)
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('transaction_merchants'):
+        return
+
+    op.drop_index('ix_transaction_merchants_transaction_id', table_name='transaction_merchants')
+    op.create_index('ix_transaction_merchants_transaction_id', 'transaction_merchants', ['transaction_id'], unique=False)
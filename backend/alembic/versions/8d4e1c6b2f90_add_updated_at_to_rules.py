@@ -0,0 +1,28 @@
+"""Add updated_at to rules so compiled auto-apply rules can be cached per version
+
+Revision ID: 8d4e1c6b2f90
+Revises: 3f6b2d9e4a17
+Create Date: 2026-10-17 11:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e1c6b2f90'
+down_revision: Union[str, None] = '3f6b2d9e4a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('rules', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE rules SET updated_at = created_at')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('rules') as batch_op:
+        batch_op.drop_column('updated_at')
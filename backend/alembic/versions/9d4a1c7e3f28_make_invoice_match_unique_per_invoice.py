@@ -0,0 +1,42 @@
+"""Make invoice_matches unique per invoice so uploads can insert with ON CONFLICT
+
+Revision ID: 9d4a1c7e3f28
+Revises: 2b8f5d0c9e61
+Create Date: 2026-10-17 19:12:36.284511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4a1c7e3f28'
+down_revision: Union[str, None] = '2b8f5d0c9e61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # invoice_matches is created by create_all, not by an earlier revision
+    if not sa.inspect(op.get_bind()).has_table('invoice_matches'):
+        return
+
+    # Keep the first match per invoice; readers already use .first()
+    op.execute(
+        "DELETE FROM invoice_matches "
+        "WHERE invoice_id IS NOT NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM invoice_matches "
+        "WHERE invoice_id IS NOT NULL GROUP BY invoice_id)"
+    )
+    op.drop_index('ix_invoice_matches_invoice_id', table_name='invoice_matches')
+    op.create_index('ix_invoice_matches_invoice_id', 'invoice_matches', ['invoice_id'], unique=True)
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('invoice_matches'):
+        return
+
+    op.drop_index('ix_invoice_matches_invoice_id', table_name='invoice_matches')
+    op.create_index('ix_invoice_matches_invoice_id', 'invoice_matches', ['invoice_id'], unique=False)
@@ -0,0 +1,26 @@
+"""Add composite index on transactions for per-session date ranges
+
+Revision ID: b5c2a7d91e34
+Revises: 8d4e1c6b2f90
+Create Date: 2026-10-17 14:26:08.913527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c2a7d91e34'
+down_revision: Union[str, None] = '8d4e1c6b2f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_session_id_date', 'transactions', ['session_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_session_id_date', table_name='transactions')
@@ -0,0 +1,39 @@
+"""Add trigram index on transactions.description for ILIKE search (PostgreSQL only)
+
+Revision ID: e1f4b8c3a602
+Revises: b5c2a7d91e34
+Create Date: 2026-10-17 15:02:41.208374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f4b8c3a602'
+down_revision: Union[str, None] = 'b5c2a7d91e34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GIN trigram indexes need pg_trgm; other databases keep scanning for '%q%'
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_transactions_description_trgm',
+        'transactions',
+        ['description'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_transactions_description_trgm', table_name='transactions')
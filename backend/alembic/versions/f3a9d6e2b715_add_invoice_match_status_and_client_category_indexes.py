@@ -0,0 +1,29 @@
+"""Add indexes for invoice match status and client/category transaction filters
+
+Revision ID: f3a9d6e2b715
+Revises: e1f4b8c3a602
+Create Date: 2026-10-17 15:31:19.664021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d6e2b715'
+down_revision: Union[str, None] = 'e1f4b8c3a602'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # session_id/client_id/invoice_id lookups and (session_id, date) are already indexed
+    op.create_index('ix_invoice_matches_status', 'invoice_matches', ['status'], unique=False)
+    op.create_index('ix_transactions_client_id_category', 'transactions', ['client_id', 'category'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_client_id_category', table_name='transactions')
+    op.drop_index('ix_invoice_matches_status', table_name='invoice_matches')
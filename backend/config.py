@@ -46,6 +46,9 @@ class Config:
     MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", "50"))
     MAX_UPLOAD_SIZE_BYTES = MAX_UPLOAD_SIZE_MB * 1024 * 1024
     
+    # OCR: max pages rendered/OCR'd at once across all requests
+    OCR_CONCURRENCY = max(1, int(os.getenv("OCR_CONCURRENCY", str(os.cpu_count() or 1))))
+    
     # Rate Limiting (requests per time window)
     RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() in ("true", "1", "yes")
     RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
@@ -12,6 +12,7 @@ from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from sqlalchemy.exc import SQLAlchemyError
 
 from exceptions import AppException, RateLimitError
 from config import DEBUG, ENVIRONMENT, Config
@@ -238,6 +239,86 @@ async def http_exception_handler(
     )
 
 
+async def database_exception_handler(request: Request, exc: SQLAlchemyError) -> JSONResponse:
+    """
+    Handler for SQLAlchemy errors that escape a route
+    
+    Args:
+        request: FastAPI request object
+        exc: SQLAlchemyError instance
+    
+    Returns:
+        JSONResponse with standardized error format
+    """
+    request_id = getattr(request.state, "request_id", None)
+    
+    if SENTRY_AVAILABLE and Config.SENTRY_ENABLED:
+        with sentry_sdk.push_scope() as scope:
+            scope.set_tag("error_type", "database_error")
+            scope.set_tag("exception_class", type(exc).__name__)
+            scope.set_context("request", {
+                "request_id": request_id,
+                "url": str(request.url),
+                "method": request.method,
+            })
+            sentry_sdk.capture_exception(exc)
+    
+    log_error(
+        exc=exc,
+        request=request,
+        level=logging.ERROR,
+        include_traceback=True
+    )
+    
+    # Never leak SQL/connection strings outside debug mode
+    details = {"type": type(exc).__name__, "error": str(exc)} if DEBUG else None
+    
+    response_data = ErrorResponse.create(
+        message="Database operation failed",
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        error_code="DATABASE_ERROR",
+        details=details,
+        request_id=request_id
+    )
+    
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content=response_data
+    )
+
+
+async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse:
+    """
+    Handler for ValueErrors raised while processing user-supplied values
+    
+    Args:
+        request: FastAPI request object
+        exc: ValueError instance
+    
+    Returns:
+        JSONResponse with standardized error format
+    """
+    request_id = getattr(request.state, "request_id", None)
+    
+    log_error(
+        exc=exc,
+        request=request,
+        level=logging.WARNING
+    )
+    
+    response_data = ErrorResponse.create(
+        message=str(exc) or "Invalid value",
+        status_code=status.HTTP_400_BAD_REQUEST,
+        error_code="BAD_REQUEST",
+        request_id=request_id
+    )
+    
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content=response_data
+    )
+
+
 async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
     """
     Handler for unhandled exceptions
@@ -361,6 +442,8 @@ def setup_exception_handlers(app) -> None:
     app.add_exception_handler(AppException, app_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+    app.add_exception_handler(SQLAlchemyError, database_exception_handler)
+    app.add_exception_handler(ValueError, value_error_handler)
     app.add_exception_handler(Exception, unhandled_exception_handler)
     
     logger.info("Exception handlers registered successfully")
@@ -6,6 +6,13 @@ Production-ready MVP for small business bank statement analysis
 import sys
 import os
 import logging
+import asyncio
+import functools
+import itertools
+import hashlib
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,19 +23,23 @@ lib_path = os.path.join(os.path.dirname(__file__), 'lib')
 if os.path.exists(lib_path) and lib_path not in sys.path:
     sys.path.insert(0, lib_path)
 
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Request, Body, Query
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Request, Body, Query, BackgroundTasks
+from fastapi.responses import FileResponse, StreamingResponse, ORJSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uuid
+from types import SimpleNamespace
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Dict, Callable
 from datetime import datetime, date
 from config import ALLOWED_ORIGINS, DEBUG, ENVIRONMENT
 
 from models import (
     init_db,
     get_db,
+    SessionLocal,
     User,
     Client,
     Transaction,
@@ -40,6 +51,7 @@ from models import (
     Invoice,
     InvoiceMatch,
     SessionVATConfig,
+    FileAccessLog,
 )
 from auth import (
     get_current_user,
@@ -56,18 +68,21 @@ from schemas import (
 )
 import json
 import re
-from sqlalchemy import func, or_, String
-from services.parser import validate_csv, normalize_csv
+import orjson
+from sqlalchemy import func, or_, case, exists, select, update, bindparam, lambda_stmt, values, column, literal, Integer, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from services.parser import normalize_csv, InvalidCSVError
 from services.parser import _find_data_start
 from services.pdf_parser import pdf_to_csv_bytes, ParserError as PDFParserError
 from services.parser import parse_date
 from services.bank_detector import BankDetector, BankType
-from services.categoriser import categorize_transaction
+from services.categoriser import categorize_batch
 from services.categoriser import extract_merchant
 from services.summary import calculate_monthly_summary, get_category_summary
 from services.summary import ExcelExporter
-from services.bulk_categorizer import BulkCategorizer
-from services.categories_service import CategoriesService
+from services.bulk_categorizer import BulkCategorizer, UndoRow
+from services.categories_service import CategoriesService, new_rule_id
 from services.vat_service import VATService
 from services import matcher
 from services.invoice_parser import extract_invoice_metadata
@@ -84,7 +99,7 @@ from exceptions import (
     DatabaseError,
 )
 from error_handler import setup_exception_handlers
-from middleware import RequestTrackingMiddleware
+from middleware import RequestTrackingMiddleware, session_access_cache, session_lock_cache
 from security_middleware import SecurityHeadersMiddleware
 
 # Cloud Storage
@@ -92,7 +107,15 @@ from services.storage import get_storage
 from config import Config
 
 # Cache Service
-from services.cache import get_cache, cached
+from services.cache import get_cache, cached, OCRRegionStore, InvoiceMetadataCache
+
+# Optional multi-pattern prefilter for auto-apply rules
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except ImportError:
+    ahocorasick = None
+    _HAS_AHOCORASICK = False
 
 # Initialize Sentry Error Monitoring
 import sentry_sdk
@@ -153,6 +176,14 @@ def generate_file_key(filename: str, prefix: str = "invoices") -> str:
     return f"{prefix}/{unique_id}_{safe_filename}"
 
 
+# Audit rows waiting to be written in batches by _audit_log_flusher; deque appends
+# are thread-safe, so sync (threadpool) endpoints can queue without a lock
+_audit_log_queue: deque = deque()
+_audit_log_flusher_task: Optional[asyncio.Task] = None
+AUDIT_LOG_FLUSH_INTERVAL = 0.5  # seconds
+AUDIT_LOG_BATCH_SIZE = 1000
+
+
 def log_file_access(
     db: Session, 
     user_id: int, 
@@ -161,21 +192,115 @@ def log_file_access(
     request: Request = None, 
     invoice_id: int = None
 ):
-    """Log file access event for audit trail"""
-    from models import FileAccessLog
-    
-    log_entry = FileAccessLog(
-        user_id=user_id,
-        invoice_id=invoice_id,
-        file_key=file_key,
-        action=action,
-        ip_address=request.client.host if request else None,
-        user_agent=request.headers.get("user-agent") if request else None,
-        storage_backend=Config.STORAGE_BACKEND,
-    )
-    db.add(log_entry)
+    """Log file access event for audit trail.
+
+    While the app is running the row is queued and written in a batch by the
+    flusher; without it (scripts, tests without startup) it is written on db.
+    """
+    row = {
+        "user_id": user_id,
+        "invoice_id": invoice_id,
+        "file_key": file_key,
+        "action": action,
+        "ip_address": request.client.host if request else None,
+        "user_agent": request.headers.get("user-agent") if request else None,
+        "storage_backend": Config.STORAGE_BACKEND,
+        "created_at": datetime.utcnow(),
+    }
+    if _audit_log_flusher_task is not None:
+        _audit_log_queue.append(row)
+        return
+    db.execute(FileAccessLog.__table__.insert(), [row])
     db.commit()
-    return log_entry
+
+
+def flush_audit_log() -> int:
+    """Write queued audit rows, up to AUDIT_LOG_BATCH_SIZE per INSERT; returns how many were written.
+
+    A batch that fails to insert goes back to the front of the queue, in order,
+    and flushing stops until the next call, so audit rows are never dropped.
+    """
+    written = 0
+    while _audit_log_queue:
+        batch = []
+        while _audit_log_queue and len(batch) < AUDIT_LOG_BATCH_SIZE:
+            batch.append(_audit_log_queue.popleft())
+        db = SessionLocal()
+        try:
+            db.execute(FileAccessLog.__table__.insert(), batch)
+            db.commit()
+            written += len(batch)
+        except Exception:
+            _audit_log_queue.extendleft(reversed(batch))
+            logger.exception("Failed to write %d file access log rows; kept them queued", len(batch))
+            break
+        finally:
+            db.close()
+    return written
+
+
+async def _audit_log_flusher() -> None:
+    """Flush the audit queue every AUDIT_LOG_FLUSH_INTERVAL seconds until cancelled."""
+    while True:
+        await asyncio.sleep(AUDIT_LOG_FLUSH_INTERVAL)
+        if _audit_log_queue:
+            await run_in_threadpool(flush_audit_log)
+
+
+async def store_and_extract_invoice(file: UploadFile, file_key: str) -> dict:
+    """Upload an invoice PDF to storage and extract its metadata at the same time.
+
+    The upload (network) runs in the threadpool and the extraction (CPU-bound PDF
+    parsing) in the process pool, side by side, and the request waits for the slower
+    of the two. The PDF is spooled to a temp file (hashed on the way) that the
+    extractor reads from disk, so the content is never held in memory as one bytes
+    object. Metadata is cached by content hash, so a re-uploaded invoice is only
+    stored. Returns the metadata.
+    """
+    await file.seek(0)
+    digest = hashlib.sha256()
+    pdf_path = await spool_upload(file, '.pdf', digest)
+    await file.seek(0)
+    try:
+        digest = digest.hexdigest()
+        storage = get_storage()
+        cached_meta = await run_in_threadpool(invoice_metadata_cache.get, digest)
+
+        async def extract() -> dict:
+            if cached_meta is not None:
+                return cached_meta
+            meta = await run_cpu_bound(extract_invoice_metadata, pdf_path)
+            await run_in_threadpool(invoice_metadata_cache.set, digest, meta)
+            return meta
+
+        # Let both finish before raising so the upload never outlives the request's file
+        upload_result, meta = await asyncio.gather(
+            run_in_threadpool(storage.upload_fileobj, file.file, file_key, content_type="application/pdf"),
+            extract(),
+            return_exceptions=True
+        )
+    finally:
+        os.remove(pdf_path)
+    for result in (upload_result, meta):
+        if isinstance(result, BaseException):
+            raise result
+    return meta
+
+
+def run_in_new_session(func: Callable, *args, **kwargs):
+    """Call func(*args, db=<new session>, **kwargs) and close the session afterwards.
+
+    For BackgroundTasks: they run after the response is sent, when the
+    request's own session is already closed.
+    """
+    db = SessionLocal()
+    try:
+        return func(*args, db=db, **kwargs)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Background task {getattr(func, '__name__', func)} failed: {e}")
+    finally:
+        db.close()
 
 
 # API Metadata and Documentation
@@ -255,6 +380,7 @@ app = FastAPI(
     description=api_description,
     version="1.0.0",
     debug=DEBUG,
+    default_response_class=ORJSONResponse,
     openapi_tags=tags_metadata,
     contact={
         "name": "Bank Statement Analyzer Support",
@@ -314,6 +440,59 @@ vat_service = VATService()
 # Initialize categorization learning service
 learning_service = CategorizationLearningService()
 
+# Process pool for CPU-bound statement parsing (PDF extraction, CSV normalisation).
+# Created on first use so importing the app does not fork workers.
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _parse_pool
+
+
+async def run_cpu_bound(func, *args, **kwargs):
+    """Run a pure parser/matcher function in the process pool so it does not block the event loop.
+
+    Arguments and results cross a process boundary, so pass plain bytes/values only.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_parse_pool(), functools.partial(func, *args, **kwargs))
+
+async def spool_upload(file: UploadFile, suffix: str = '', digest=None) -> str:
+    """Stream an upload to a temporary file in 1MB chunks, enforcing the upload size cap.
+
+    Returns the file path; the caller removes it. If a hashlib object is
+    passed as digest it is updated with the content on the way through.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while chunk := await file.read(1 << 20):
+                size += len(chunk)
+                if size > Config.MAX_UPLOAD_SIZE_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File too large. Maximum size: {Config.MAX_UPLOAD_SIZE_MB}MB")
+                if digest is not None:
+                    digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+# Bounds concurrent OCR page extractions (Tesseract subprocesses) across requests
+_ocr_semaphore = asyncio.Semaphore(Config.OCR_CONCURRENCY)
+
+
+async def run_ocr_extraction(pdf_path: str, regions: dict, page: int, content_hash: Optional[str] = None) -> dict:
+    """Run OCR extraction for one page in a worker thread, limited by OCR_CONCURRENCY."""
+    from services.ocr_workflow import run_extraction
+
+    async with _ocr_semaphore:
+        return await asyncio.to_thread(run_extraction, pdf_path, regions, page=page, content_hash=content_hash)
+
 # CORS Configuration
 logger.info(f"Configuring CORS for {len(ALLOWED_ORIGINS)} origin(s)")
 if "*" not in [origin.strip() for origin in ALLOWED_ORIGINS]:
@@ -384,28 +563,456 @@ bulk_categorizer = BulkCategorizer()
 # In production, this would be in the database per session
 session_custom_categories: dict = {}  # (user_id, session_id) -> [custom_categories]
 
-# In-memory OCR regions store: (user_id, session_id) -> mapping of pages -> regions
-# Structure: { (user_id, session_id): { "pages": { 1: { 'date_region': {...}, ... }, 2: {...} }, "amount_type": "single" } }
-ocr_region_store: dict = {}
+# OCR regions store: (user_id, session_id) -> mapping of pages -> regions, shared across workers
+# Entry structure: { "pages": { 1: { 'date_region': {...}, ... }, 2: {...} }, "amount_type": "single" }
+ocr_region_store = OCRRegionStore()
+
+# Extracted invoice metadata keyed by SHA-256 of the PDF, so duplicate uploads skip parsing
+invoice_metadata_cache = InvoiceMetadataCache()
 
 
 def ensure_session_access(session_id: str, current_user: User, db: Session) -> None:
-    """Validate that the session belongs to the authenticated user via client ownership."""
+    """Validate that the session belongs to the authenticated user via client ownership.
+
+    The session's locked flag is read in the same round trip and remembered for
+    ensure_session_unlocked, so guarding a mutating request costs one query.
+    """
     if not session_id:
         raise ValidationError("session_id is required")
 
-    client_ids = [c.id for c in db.query(Client.id).filter(Client.user_id == current_user.id).all()]
-    if not client_ids:
-        raise NotFoundError("Client", "for user")
+    # Already verified earlier in this request
+    cache = session_access_cache.get()
+    cache_key = (session_id, current_user.id)
+    if cache is not None and cache_key in cache:
+        return
 
-    allowed = db.query(Transaction.id).filter(
-        Transaction.session_id == session_id,
-        Transaction.client_id.in_(client_ids)
-    ).first()
+    has_client, allowed, locked = db.query(
+        exists().where(Client.user_id == current_user.id),
+        exists().where(
+            Transaction.session_id == session_id,
+            Transaction.client_id == Client.id,
+            Client.user_id == current_user.id
+        ),
+        select(SessionState.locked).where(SessionState.session_id == session_id).scalar_subquery()
+    ).one()
 
+    if not has_client:
+        raise NotFoundError("Client", "for user")
     if not allowed:
         raise NotFoundError("Session", session_id)
 
+    if cache is not None:
+        cache[cache_key] = True
+    lock_cache = session_lock_cache.get()
+    if lock_cache is not None:
+        lock_cache[session_id] = bool(locked)
+
+
+def ensure_session_unlocked(session_id: str, db: Session) -> None:
+    """Raise 403 if the session is locked. Only the locked flag is read, once per request."""
+    cache = session_lock_cache.get()
+    if cache is not None and session_id in cache:
+        locked = cache[session_id]
+    else:
+        row = db.query(SessionState.locked).filter(SessionState.session_id == session_id).first()
+        locked = bool(row and row.locked)
+        if cache is not None:
+            cache[session_id] = locked
+
+    if locked:
+        raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+
+
+def get_owned_client(client_id: int, current_user: User, db: Session) -> Optional[Client]:
+    """Load a client by primary key (identity map first) and return it only if the user owns it."""
+    client = db.get(Client, client_id)
+    if client is None or client.user_id != current_user.id:
+        return None
+    return client
+
+
+def invalidate_session_caches(session_id: str, db: Session) -> None:
+    """Drop cached responses for a session and for the clients its transactions belong to.
+
+    Client-wide aggregates (e.g. /summary?client_id=...) are tagged by client only,
+    so editing a session's transactions must evict them as well.
+    """
+    cache = get_cache()
+    if not cache.enabled:
+        return
+    cache.invalidate_session(session_id)
+    client_ids = db.query(Transaction.client_id).filter(
+        Transaction.session_id == session_id, Transaction.client_id.isnot(None)
+    ).distinct()
+    for (client_id,) in client_ids:
+        cache.invalidate_client(client_id)
+
+
+# Cached statements for the single-transaction edit endpoints, built once so
+# SQLAlchemy does not recompile the SELECT on every call
+_transaction_in_session_stmt = lambda_stmt(
+    lambda: select(Transaction).where(
+        Transaction.id == bindparam("transaction_id"),
+        Transaction.session_id == bindparam("session_id")
+    )
+)
+_transaction_by_id_stmt = lambda_stmt(
+    lambda: select(Transaction).where(Transaction.id == bindparam("transaction_id"))
+)
+
+
+_FRIENDLY_NAME_SEP_RE = re.compile(r'[_\s]+')
+
+
+def friendly_session_name(filename: str) -> str:
+    """Session display name from an upload filename.
+
+    e.g. "FNB_ASPIRE_CURRENT_ACCOUNT_132.csv" -> "Fnb Aspire Current Account 132"
+    """
+    stem = filename.rsplit('.', 1)[0]  # Remove extension
+    return ' '.join(word.capitalize() for word in _FRIENDLY_NAME_SEP_RE.split(stem) if word)
+
+
+def _bulk_insert_transactions(db: Session, session_id: str, rows: list, merchant_links: list,
+                              return_ids: bool = False) -> list:
+    """Insert a statement's transaction rows with one Core executemany, then attach merchants.
+
+    rows are plain column dicts, so no ORM instances are built for them.
+    merchant_links holds (row index, merchant) pairs. The session is new, so
+    its transaction ids in id order line up with rows; they are read back
+    (and returned) only when merchant links or the caller need them.
+    """
+    if not rows:
+        return []
+    db.execute(Transaction.__table__.insert(), rows)
+    if not (merchant_links or return_ids):
+        return []
+    ids = [tid for (tid,) in db.query(Transaction.id).filter(Transaction.session_id == session_id).order_by(Transaction.id)]
+    if merchant_links:
+        db.execute(TransactionMerchant.__table__.insert(), [
+            {"transaction_id": ids[index], "session_id": session_id, "merchant": merchant}
+            for index, merchant in merchant_links
+        ])
+    return ids
+
+
+def _id_list_match(db: Session, id_column, ids: list):
+    """Filter criterion for id_column IN ids.
+
+    Long lists on PostgreSQL are sent as a VALUES list to join against, which
+    plans as an index nested loop instead of parsing a huge IN (...).
+    """
+    if len(ids) > 500 and db.get_bind().dialect.name == "postgresql":
+        id_list = values(column("id", Integer), name="id_list").data(
+            [(int(i),) for i in dict.fromkeys(ids)]
+        )
+        return id_column == id_list.c.id
+    return id_column.in_(ids)
+
+
+def _merchant_map(db: Session, transaction_ids: list) -> Dict[int, str]:
+    """Map transaction id -> merchant with one query per 500 ids (first merchant row wins, as with .first())."""
+    merchants = {}
+    for start in range(0, len(transaction_ids), 500):
+        rows = db.query(TransactionMerchant.transaction_id, TransactionMerchant.merchant).filter(
+            TransactionMerchant.transaction_id.in_(transaction_ids[start:start + 500])
+        ).order_by(TransactionMerchant.id)
+        for transaction_id, merchant in rows:
+            merchants.setdefault(transaction_id, merchant)
+    return merchants
+
+
+def _on_merchant_conflict(stmt, only_unassigned: bool):
+    """Turn an INSERT into transaction_merchants into an upsert on transaction_id.
+
+    Rows whose merchant is already set to the same value are left alone, as are
+    rows with any merchant when only_unassigned is set.
+    """
+    update_where = TransactionMerchant.merchant.is_distinct_from(stmt.excluded.merchant)
+    if only_unassigned:
+        update_where = update_where & or_(TransactionMerchant.merchant.is_(None), TransactionMerchant.merchant == "")
+    return stmt.on_conflict_do_update(
+        index_elements=[TransactionMerchant.transaction_id],
+        set_={"merchant": stmt.excluded.merchant},
+        where=update_where
+    )
+
+
+def _upsert_transaction_merchants(db: Session, rows: List[dict], only_unassigned: bool = False) -> int:
+    """Insert or update merchant rows (transaction_id, session_id, merchant) with INSERT ... ON CONFLICT.
+
+    Rows whose merchant is already set to the same value are left alone, as are rows
+    with any merchant when only_unassigned is set; returns how many rows changed.
+    """
+    insert_ = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    changed = 0
+    for start in range(0, len(rows), 500):
+        stmt = insert_(TransactionMerchant).values(rows[start:start + 500])
+        changed += db.execute(_on_merchant_conflict(stmt, only_unassigned)).rowcount
+    return changed
+
+
+def _set_merchant_for_ids(db: Session, session_id: str, ids: list, merchant: str, only_unassigned: bool = False) -> int:
+    """Set one merchant on the session's transactions among ids; returns how many rows changed.
+
+    Each batch of 500 ids is a single INSERT ... SELECT ... ON CONFLICT, so ids
+    outside the session are dropped by the same statement that writes the rest.
+    """
+    insert_ = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    changed = 0
+    for start in range(0, len(ids), 500):
+        source = select(
+            Transaction.id, literal(session_id, String), literal(merchant, String)
+        ).where(Transaction.session_id == session_id, Transaction.id.in_(ids[start:start + 500]))
+        stmt = insert_(TransactionMerchant).from_select(["transaction_id", "session_id", "merchant"], source)
+        changed += db.execute(_on_merchant_conflict(stmt, only_unassigned)).rowcount
+    return changed
+
+
+def _insert_invoice_match(db: Session, **values) -> None:
+    """Insert an InvoiceMatch unless the invoice already has one (invoice_id is unique)."""
+    insert_ = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    db.execute(
+        insert_(InvoiceMatch).values(**values)
+        .on_conflict_do_nothing(index_elements=[InvoiceMatch.invoice_id])
+    )
+
+
+def _compile_clause(clause: dict) -> Callable[[dict], bool]:
+    """Prepare a single {field, op, value} rule clause: lower-case, compile or cast the value up front."""
+    field = clause.get('field')
+    op = clause.get('op')
+    val = clause.get('value')
+
+    if op in ('contains', 'equals'):
+        # Case-insensitive ops read the pre-lowered copy from _rule_txn_view when present
+        lower_key = f"_{field}_lower"
+        target = str(val).lower()
+        if op == 'contains':
+            test = lambda v: target in v
+        else:
+            test = lambda v: v == target
+
+        def matches(txn: dict) -> bool:
+            v = txn.get(lower_key)
+            if v is None:
+                raw = txn.get(field)
+                if raw is None:
+                    return False
+                v = str(raw).lower()
+            return test(v)
+
+        return matches
+    elif op == 'regex':
+        try:
+            pattern = re.compile(val)
+        except (re.error, TypeError):
+            return lambda txn: False
+        test = lambda v: pattern.search(str(v)) is not None
+    elif op in ('gt', 'lt'):
+        try:
+            bound = float(val)
+        except (TypeError, ValueError):
+            return lambda txn: False
+        compare = bound.__lt__ if op == 'gt' else bound.__gt__
+
+        def test(v):
+            try:
+                return compare(float(v))
+            except (TypeError, ValueError):
+                return False
+    else:
+        return lambda txn: False
+
+    def matches(txn: dict) -> bool:
+        v = txn.get(field)
+        return v is not None and test(v)
+
+    return matches
+
+
+def _rule_txn_view(description, amount, date, category, **extra) -> dict:
+    """Build the txn dict that compiled rule predicates evaluate, lower-casing the text fields once per row."""
+    view = {"description": description, "amount": amount, "date": date, "category": category, **extra}
+    if description is not None:
+        view["_description_lower"] = str(description).lower()
+    if category is not None:
+        view["_category_lower"] = str(category).lower()
+    return view
+
+
+def _compile_conditions(conds: dict) -> Callable[[dict], bool]:
+    """Compile rule conditions ``{match_type: 'all'|'any', conditions: [...]}`` into a predicate over a txn dict."""
+    clauses = tuple(_compile_clause(cl) for cl in conds.get('conditions', []))
+    if conds.get('match_type', 'all') == 'any':
+        return lambda txn: any(c(txn) for c in clauses)
+    return lambda txn: all(c(txn) for c in clauses)
+
+
+def _compile_rules(rules: list) -> list:
+    """Pair each rule dict with its compiled condition predicate, dropping rules with malformed conditions."""
+    compiled = []
+    for r in rules:
+        try:
+            compiled.append((r, _compile_conditions(r.get('conditions', {}))))
+        except (AttributeError, TypeError):
+            continue
+    return compiled
+
+
+# Below this many rules scanning them all is cheaper than probing an automaton
+AHOCORASICK_MIN_RULES = 16
+
+
+def _description_needles(conds: dict) -> tuple:
+    """Lower-cased description substrings a txn must contain for these conditions to match.
+
+    Returns an empty tuple when the rule cannot be ruled out by substring
+    search alone (numeric/regex/other-field clauses, empty needles).
+    """
+    needles = [
+        str(cl.get('value')).lower()
+        for cl in conds.get('conditions', [])
+        if cl.get('field') == 'description' and cl.get('op') == 'contains'
+    ]
+    if conds.get('match_type', 'all') == 'any':
+        # every alternative must be a description needle, otherwise some row could match without one
+        if not needles or len(needles) != len(conds.get('conditions', [])) or not all(needles):
+            return ()
+        return tuple(needles)
+    # 'all': any single required needle gates the rule; the longest is the most selective
+    longest = max(needles, key=len, default='')
+    return (longest,) if longest else ()
+
+
+class CompiledRuleSet:
+    """Enabled rules in priority order, each paired with its compiled predicate.
+
+    When pyahocorasick is installed and there are enough rules, a txn
+    description is probed once against an automaton of the rules' required
+    ``contains`` needles and only rules whose needle occurs (plus rules that
+    cannot be prefiltered) are evaluated.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = _compile_rules(rules)
+        self._automaton = None
+        self._unfiltered = frozenset()
+        if _HAS_AHOCORASICK and len(self.rules) >= AHOCORASICK_MIN_RULES:
+            self._build_automaton()
+
+    def _build_automaton(self) -> None:
+        gated: Dict[str, List[int]] = {}
+        unfiltered = []
+        for idx, (r, _) in enumerate(self.rules):
+            needles = _description_needles(r.get('conditions', {}))
+            if not needles:
+                unfiltered.append(idx)
+            for needle in needles:
+                gated.setdefault(needle, []).append(idx)
+        if not gated:
+            return
+        automaton = ahocorasick.Automaton()
+        for needle, idxs in gated.items():
+            automaton.add_word(needle, tuple(idxs))
+        automaton.make_automaton()
+        self._automaton = automaton
+        self._unfiltered = frozenset(unfiltered)
+
+    def candidates(self, description) -> list:
+        """Rules (in priority order) that could match a txn with this description."""
+        if self._automaton is None:
+            return self.rules
+        hits = set(self._unfiltered)
+        if description is not None:
+            for _, idxs in self._automaton.iter(str(description).lower()):
+                hits.update(idxs)
+        return [self.rules[idx] for idx in sorted(hits)]
+
+
+# client_id -> (rules version token, CompiledRuleSet); see load_compiled_rules
+_compiled_rules_cache: Dict[Optional[int], tuple] = {}
+
+
+# rule id -> (updated_at, decoded conditions, decoded action)
+_rule_json_cache: Dict[int, tuple] = {}
+
+
+def _decode_rule_json(rule: Rule) -> tuple:
+    """Decoded (conditions, action) of a rule, re-parsed only when the rule has been updated."""
+    cached = _rule_json_cache.get(rule.id)
+    if cached is not None and cached[0] == rule.updated_at:
+        return cached[1], cached[2]
+    conditions = orjson.loads(rule.conditions)
+    action = orjson.loads(rule.action)
+    _rule_json_cache[rule.id] = (rule.updated_at, conditions, action)
+    return conditions, action
+
+
+def _encode_rule_json(value) -> str:
+    """Serialize rule conditions/action for the Rule text columns."""
+    return orjson.dumps(value).decode()
+
+
+def _rules_version(db: Session, client_id: Optional[int]) -> tuple:
+    """Cheap token that changes whenever a client's rules are created, edited or deleted."""
+    query = db.query(func.count(Rule.id), func.max(Rule.id), func.max(Rule.updated_at))
+    if client_id is not None:
+        query = query.filter(Rule.client_id == client_id)
+    return tuple(query.one())
+
+
+def load_compiled_rules(db: Session, client_id: Optional[int]) -> CompiledRuleSet:
+    """Return the enabled auto-apply rules for a client, in priority order, paired with compiled predicates.
+
+    The decoded and compiled rules are shared by all uploads for the client
+    until its rules version changes, so an upload costs one aggregate query
+    instead of loading and decoding every rule.
+    """
+    version = _rules_version(db, client_id)
+    cached = _compiled_rules_cache.get(client_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    rules_query = db.query(Rule).filter(Rule.enabled == 1, Rule.auto_apply == 1)
+    if client_id is not None:
+        rules_query = rules_query.filter(Rule.client_id == client_id)
+    enabled_rules = []
+    for r in rules_query.order_by(Rule.priority.asc()).all():
+        conditions, action = _decode_rule_json(r)
+        enabled_rules.append({
+            "id": r.id,
+            "name": r.name,
+            "priority": r.priority,
+            "conditions": conditions,
+            "action": action
+        })
+    compiled = CompiledRuleSet(enabled_rules)
+    _compiled_rules_cache[client_id] = (version, compiled)
+    return compiled
+
+
+def _apply_learned_categories(db: Session, current_user: User, rows: list) -> list:
+    """Give pending, still uncategorised transaction rows the user's learned categories.
+
+    Runs before the rows are inserted so each one is written once with its
+    final category. Returns the indices of the rows whose category was changed.
+    """
+    pending = [i for i, row in enumerate(rows) if not row["category"] or row["category"] == 'Other']
+    if not pending:
+        return []
+    categories = learning_service.suggest_categories(
+        str(current_user.id),
+        [SimpleNamespace(description=rows[i]["description"], category=rows[i]["category"]) for i in pending],
+        db
+    )
+    learned = []
+    for i, category in zip(pending, categories):
+        if category:
+            rows[i]["category"] = category
+            learned.append(i)
+    return learned
+
 
 # ============================================================================
 # REQUEST/RESPONSE MODELS
@@ -487,9 +1094,27 @@ class UpdateCategoryVATRequest(BaseModel):
 
 # Initialize database on startup
 @app.on_event("startup")
-def startup_event():
-    """Initialize database tables"""
-    init_db()
+async def startup_event():
+    """Initialize database tables and start the audit log flusher"""
+    global _audit_log_flusher_task
+    await run_in_threadpool(init_db)
+    _audit_log_flusher_task = asyncio.create_task(_audit_log_flusher())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the audit log flusher (writing what is queued) and the parser process pool"""
+    global _audit_log_flusher_task
+    if _audit_log_flusher_task is not None:
+        flusher, _audit_log_flusher_task = _audit_log_flusher_task, None
+        flusher.cancel()
+        # Wait for a flush that is already running so the final one starts after it
+        await asyncio.gather(flusher, return_exceptions=True)
+    await run_in_threadpool(flush_audit_log)
+    if _audit_log_queue:
+        logger.error("%d file access log rows could not be written at shutdown", len(_audit_log_queue))
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
 
 
 # =============================================================================
@@ -771,32 +1396,26 @@ def create_category(request: CreateCategoryRequest, session_id: str, current_use
     Returns:
         Updated list of all categories
     """
-    try:
-        ensure_session_access(session_id, current_user, db)
+    ensure_session_access(session_id, current_user, db)
 
-        # Use CategoriesService to create category
-        success, message = categories_service.create_category(
-            session_id, 
-            request.category_name,
-            is_income=request.is_income
-        )
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        # Return all categories (built-in + custom)
-        all_categories = categories_service.get_all_categories(session_id)
-        
-        return {
-            "success": True,
-            "message": message,
-            "categories": all_categories
-        }
+    # Use CategoriesService to create category
+    success, message = categories_service.create_category(
+        session_id, 
+        request.category_name,
+        is_income=request.is_income
+    )
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to create category: {str(e)}")
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    
+    # Return all categories (built-in + custom)
+    all_categories = categories_service.get_all_categories(session_id)
+    
+    return {
+        "success": True,
+        "message": message,
+        "categories": all_categories
+    }
 
 
 # =============================================================================
@@ -806,115 +1425,94 @@ def create_category(request: CreateCategoryRequest, session_id: str, current_use
 @app.get("/vat/config")
 def get_vat_config(session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get VAT configuration for a session"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        config = vat_service.get_session_vat_config(session_id)
-        if config:
-            return {
-                "vat_enabled": config.vat_enabled == 1,
-                "default_vat_rate": config.default_vat_rate
-            }
+    ensure_session_access(session_id, current_user, db)
+    config = vat_service.get_session_vat_config(session_id)
+    if config:
         return {
-            "vat_enabled": False,
-            "default_vat_rate": 15.0
+            "vat_enabled": config.vat_enabled == 1,
+            "default_vat_rate": config.default_vat_rate
         }
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to get VAT config: {str(e)}")
+    return {
+        "vat_enabled": False,
+        "default_vat_rate": 15.0
+    }
 
 
 @app.post("/vat/config")
 def update_vat_config(session_id: str, request: VATConfigRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Enable or disable VAT calculation for a session"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        if request.vat_enabled:
-            success, message = vat_service.enable_vat(session_id, request.default_vat_rate)
-            if success:
-                # Recalculate VAT for all existing transactions
-                recalc_success, recalc_msg, stats = vat_service.recalculate_all_transactions(session_id)
-                if recalc_success:
-                    return {
-                        "success": True,
-                        "message": message,
-                        "recalculation_stats": stats
-                    }
-                else:
-                    return {
-                        "success": True,
-                        "message": message,
-                        "recalculation_error": recalc_msg
-                    }
-        else:
-            success, message = vat_service.disable_vat(session_id)
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        return {
-            "success": True,
-            "message": message
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to update VAT config: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    if request.vat_enabled:
+        success, message = vat_service.enable_vat(session_id, request.default_vat_rate)
+        if success:
+            # Recalculate VAT for all existing transactions
+            recalc_success, recalc_msg, stats = vat_service.recalculate_all_transactions(session_id)
+            if recalc_success:
+                return {
+                    "success": True,
+                    "message": message,
+                    "recalculation_stats": stats
+                }
+            else:
+                return {
+                    "success": True,
+                    "message": message,
+                    "recalculation_error": recalc_msg
+                }
+    else:
+        success, message = vat_service.disable_vat(session_id)
+    
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    
+    return {
+        "success": True,
+        "message": message
+    }
 
 
 @app.get("/categories/with-vat")
 def get_categories_with_vat(session_id: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get all categories with their VAT settings"""
-    try:
-        if session_id:
-            ensure_session_access(session_id, current_user, db)
-        categories = categories_service.get_all_categories_with_vat(session_id)
-        return {"categories": categories}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to get categories: {str(e)}")
+    if session_id:
+        ensure_session_access(session_id, current_user, db)
+    categories = categories_service.get_all_categories_with_vat(session_id)
+    return {"categories": categories}
 
 
 @app.patch("/categories/{category_name}/vat")
 def update_category_vat(category_name: str, request: UpdateCategoryVATRequest, current_user: User = Depends(get_current_user)):
     """Update VAT settings for a custom category"""
-    try:
-        success, message = vat_service.update_category_vat_settings(
-            category_name,
-            request.vat_applicable,
-            request.vat_rate,
-            is_income=request.is_income
-        )
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        return {
-            "success": True,
-            "message": message
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to update VAT settings: {str(e)}")
+    success, message = vat_service.update_category_vat_settings(
+        category_name,
+        request.vat_applicable,
+        request.vat_rate,
+        is_income=request.is_income
+    )
+    
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    
+    return {
+        "success": True,
+        "message": message
+    }
 
 
 @app.post("/vat/recalculate")
 def recalculate_vat(session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Recalculate VAT for all transactions in a session"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        success, message, stats = vat_service.recalculate_all_transactions(session_id)
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        return {
-            "success": True,
-            "message": message,
-            "stats": stats
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to recalculate VAT: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    success, message, stats = vat_service.recalculate_all_transactions(session_id)
+    
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    
+    return {
+        "success": True,
+        "message": message,
+        "stats": stats
+    }
 
 
 @app.get("/vat/summary")
@@ -926,18 +1524,16 @@ def get_vat_summary(
     db: Session = Depends(get_db)
 ):
     """Get VAT summary for a session"""
+    ensure_session_access(session_id, current_user, db)
+    # Parse dates if provided
     try:
-        ensure_session_access(session_id, current_user, db)
-        # Parse dates if provided
         start = date.fromisoformat(start_date) if start_date else None
         end = date.fromisoformat(end_date) if end_date else None
-        
-        summary = vat_service.get_vat_summary(session_id, start, end)
-        return summary
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to get VAT summary: {str(e)}")
+    
+    summary = vat_service.get_vat_summary(session_id, start, end)
+    return summary
 
 
 @app.get("/vat/export")
@@ -961,49 +1557,45 @@ def export_vat_report(
         export_type: Type of export - 'both', 'input_only', or 'output_only'
         format: Output format - 'excel' or 'csv'
     """
-    try:
-        if not session_id and not client_id:
-            raise HTTPException(status_code=400, detail="Either session_id or client_id must be provided")
+    if not session_id and not client_id:
+        raise HTTPException(status_code=400, detail="Either session_id or client_id must be provided")
 
-        if session_id:
-            ensure_session_access(session_id, current_user, db)
-        if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
-            if not client:
-                raise HTTPException(status_code=404, detail="Client not found")
-        
-        # Validate export_type
-        if export_type not in ['both', 'input_only', 'output_only']:
-            raise HTTPException(status_code=400, detail="export_type must be 'both', 'input_only', or 'output_only'")
-        
-        # Parse dates if provided
+    if session_id:
+        ensure_session_access(session_id, current_user, db)
+    if client_id is not None:
+        client = get_owned_client(client_id, current_user, db)
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+    
+    # Validate export_type
+    if export_type not in ['both', 'input_only', 'output_only']:
+        raise HTTPException(status_code=400, detail="export_type must be 'both', 'input_only', or 'output_only'")
+    
+    # Parse dates if provided
+    try:
         start = date.fromisoformat(date_from) if date_from else None
         end = date.fromisoformat(date_to) if date_to else None
-        
-        # Generate report
-        report_bytes = vat_service.export_vat_report(session_id, start, end, format, client_id, export_type)
-        
-        # Determine filename and content type
-        identifier = session_id[:8] if session_id else f"client_{client_id}"
-        type_str = export_type.replace('_', '_')
-        if format == "csv":
-            filename = f"vat_{type_str}_{identifier}.csv"
-            media_type = "text/csv"
-        else:
-            filename = f"vat_{type_str}_{identifier}.xlsx"
-            media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        
-        return StreamingResponse(
-            report_bytes,
-            media_type=media_type,
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to export VAT report: {str(e)}")
+    
+    # Generate report
+    report_bytes = vat_service.export_vat_report(session_id, start, end, format, client_id, export_type)
+    
+    # Determine filename and content type
+    identifier = session_id[:8] if session_id else f"client_{client_id}"
+    type_str = export_type.replace('_', '_')
+    if format == "csv":
+        filename = f"vat_{type_str}_{identifier}.csv"
+        media_type = "text/csv"
+    else:
+        filename = f"vat_{type_str}_{identifier}.xlsx"
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    
+    return StreamingResponse(
+        report_bytes,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 
 # =============================================================================
@@ -1013,123 +1605,104 @@ def export_vat_report(
 @app.get("/clients", tags=["Clients"])
 def get_clients(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get all clients for authenticated user with statistics"""
-    try:
-        # Get clients for authenticated user only
-        clients = db.query(Client).filter(Client.user_id == current_user.id).all()
-        
-        # Build response with statistics
-        result = []
-        for c in clients:
-            # Get distinct session count (statements)
-            statement_count = db.query(func.count(func.distinct(Transaction.session_id)))\
-                .filter(Transaction.client_id == c.id)\
-                .scalar() or 0
-            
-            # Get total transaction count
-            transaction_count = db.query(func.count(Transaction.id))\
-                .filter(Transaction.client_id == c.id)\
-                .scalar() or 0
-            
-            # Get last statement date (most recent transaction date)
-            last_date = db.query(func.max(Transaction.date))\
-                .filter(Transaction.client_id == c.id)\
-                .scalar()
-            
-            result.append({
-                "id": c.id,
-                "name": c.name,
-                "created_at": c.created_at.isoformat(),
-                "statement_count": statement_count,
-                "transaction_count": transaction_count,
-                "last_statement_date": last_date.isoformat() if last_date else None
-            })
-        
-        return {"clients": result}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to fetch clients: {str(e)}")
+    # Get clients for authenticated user only
+    clients = db.query(Client).filter(Client.user_id == current_user.id).all()
+    
+    # Build response with statistics
+    result = []
+    for c in clients:
+        # Get distinct session count (statements)
+        statement_count = db.query(func.count(func.distinct(Transaction.session_id)))\
+            .filter(Transaction.client_id == c.id)\
+            .scalar() or 0
+        
+        # Get total transaction count
+        transaction_count = db.query(func.count(Transaction.id))\
+            .filter(Transaction.client_id == c.id)\
+            .scalar() or 0
+        
+        # Get last statement date (most recent transaction date)
+        last_date = db.query(func.max(Transaction.date))\
+            .filter(Transaction.client_id == c.id)\
+            .scalar()
+        
+        result.append({
+            "id": c.id,
+            "name": c.name,
+            "created_at": c.created_at,
+            "statement_count": statement_count,
+            "transaction_count": transaction_count,
+            "last_statement_date": last_date
+        })
+    
+    # Plain dicts of primitives/dates: let orjson serialize them directly
+    # instead of walking the payload through jsonable_encoder first
+    return ORJSONResponse({"clients": result})
 
 
 @app.post("/clients", tags=["Clients"])
 def create_client(name: str = Query(...), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Create a new client for authenticated user"""
-    try:
-        if not name or not name.strip():
-            raise HTTPException(status_code=400, detail="Client name is required")
-        
-        client = Client(user_id=current_user.id, name=name.strip())
-        db.add(client)
-        db.commit()
-        db.refresh(client)
-        
-        return {
-            "client": {
-                "id": client.id,
-                "name": client.name,
-                "created_at": client.created_at.isoformat(),
-                "statement_count": 0,
-                "transaction_count": 0,
-                "last_statement_date": None
-            }
+    if not name or not name.strip():
+        raise HTTPException(status_code=400, detail="Client name is required")
+    
+    client = Client(user_id=current_user.id, name=name.strip())
+    db.add(client)
+    db.commit()
+    db.refresh(client)
+    
+    return {
+        "client": {
+            "id": client.id,
+            "name": client.name,
+            "created_at": client.created_at.isoformat(),
+            "statement_count": 0,
+            "transaction_count": 0,
+            "last_statement_date": None
         }
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Failed to create client: {str(e)}")
+    }
 
 
 @app.put("/clients/{client_id}")
 def update_client(client_id: int, name: str = Query(...), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Update a client's name (authenticated user only)"""
-    try:
-        # Verify client belongs to authenticated user
-        client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        if not name or not name.strip():
-            raise HTTPException(status_code=400, detail="Client name is required")
-        
-        client.name = name.strip()
-        db.commit()
-        db.refresh(client)
-        
-        return {
-            "id": client.id,
-            "name": client.name,
-            "created_at": client.created_at.isoformat()
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Failed to update client: {str(e)}")
+    # Verify client belongs to authenticated user
+    client = get_owned_client(client_id, current_user, db)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    
+    if not name or not name.strip():
+        raise HTTPException(status_code=400, detail="Client name is required")
+    
+    client.name = name.strip()
+    db.commit()
+    db.refresh(client)
+    
+    return {
+        "id": client.id,
+        "name": client.name,
+        "created_at": client.created_at.isoformat()
+    }
 
 
 @app.delete("/clients/{client_id}")
 def delete_client(client_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Delete a client and all associated data (authenticated user only)"""
-    try:
-        # Verify client belongs to authenticated user
-        client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        # Delete all client data
-        db.query(Transaction).filter(Transaction.client_id == client_id).delete()
-        db.query(Rule).filter(Rule.client_id == client_id).delete()
-        db.query(Invoice).filter(Invoice.client_id == client_id).delete()
-        db.query(Reconciliation).filter(Reconciliation.client_id == client_id).delete()
-        db.query(OverallReconciliation).filter(OverallReconciliation.client_id == client_id).delete()
-        db.query(Client).filter(Client.id == client_id).delete()
-        db.commit()
-        
-        return {"message": "Client deleted successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Failed to delete client: {str(e)}")
+    # Verify client belongs to authenticated user
+    client = get_owned_client(client_id, current_user, db)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    
+    # Delete all client data
+    db.query(Transaction).filter(Transaction.client_id == client_id).delete()
+    db.query(Rule).filter(Rule.client_id == client_id).delete()
+    db.query(Invoice).filter(Invoice.client_id == client_id).delete()
+    db.query(Reconciliation).filter(Reconciliation.client_id == client_id).delete()
+    db.query(OverallReconciliation).filter(OverallReconciliation.client_id == client_id).delete()
+    db.query(Client).filter(Client.id == client_id).delete()
+    db.commit()
+    
+    return {"message": "Client deleted successfully"}
 
 
 # =============================================================================
@@ -1139,186 +1712,158 @@ def delete_client(client_id: int, current_user: User = Depends(get_current_user)
 @app.get("/rules", tags=["Rules"])
 def get_rules(session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get all categorization rules for this session"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        rules = categories_service.get_rules(session_id)
-        return {"rules": rules}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to fetch rules: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    rules = categories_service.get_rules(session_id)
+    return ORJSONResponse({"rules": rules})
 
 
 @app.post("/rules", tags=["Rules"])
 def create_rule(request: CreateRuleRequest, session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Create a new categorization rule"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        import uuid
-        rule_id = str(uuid.uuid4())
-        success, message = categories_service.create_rule(
-            session_id=session_id,
-            rule_id=rule_id,
-            name=request.name,
-            category=request.category,
-            keywords=request.keywords,
-            priority=request.priority,
-            auto_apply=request.auto_apply,
-            match_compound_words=request.match_compound_words
-        )
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        return {
-            "success": True,
-            "message": message,
-            "rule_id": rule_id,
-            "rules": categories_service.get_rules(session_id)
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to create rule: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    rule_id = new_rule_id()
+    success, message = categories_service.create_rule(
+        session_id=session_id,
+        rule_id=rule_id,
+        name=request.name,
+        category=request.category,
+        keywords=request.keywords,
+        priority=request.priority,
+        auto_apply=request.auto_apply,
+        match_compound_words=request.match_compound_words
+    )
+    
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    
+    return {
+        "success": True,
+        "message": message,
+        "rule_id": rule_id,
+        "rules": categories_service.get_rules(session_id)
+    }
 
 
 @app.put("/rules/{rule_id}")
 def update_rule(rule_id: str, request: UpdateRuleRequest, session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Update a categorization rule"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        updates = {k: v for k, v in request.dict().items() if v is not None}
-        success, message = categories_service.update_rule(session_id, rule_id, **updates)
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        return {
-            "success": True,
-            "message": message,
-            "rules": categories_service.get_rules(session_id)
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to update rule: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    updates = {k: v for k, v in request.dict().items() if v is not None}
+    success, message = categories_service.update_rule(session_id, rule_id, **updates)
+    
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    
+    return {
+        "success": True,
+        "message": message,
+        "rules": categories_service.get_rules(session_id)
+    }
 
 
 @app.delete("/rules/{rule_id}")
 def delete_rule(rule_id: str, session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Delete a categorization rule"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        success, message = categories_service.delete_rule(session_id, rule_id)
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        return {
-            "success": True,
-            "message": message,
-            "rules": categories_service.get_rules(session_id)
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to delete rule: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    success, message = categories_service.delete_rule(session_id, rule_id)
+    
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    
+    return {
+        "success": True,
+        "message": message,
+        "rules": categories_service.get_rules(session_id)
+    }
 
 
 @app.post("/rules/{rule_id}/preview")
 def preview_rule(rule_id: str, session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Preview which transactions would match a specific rule"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        # Get transactions for this session
-        transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
-        txn_dicts = [
-            {
-                "id": t.id,
-                "date": t.date,
-                "description": t.description,
-                "amount": t.amount,
-                "category": t.category
-            }
-            for t in transactions
-        ]
-        
-        preview = categories_service.preview_rule_matches(session_id, rule_id, txn_dicts)
-        return preview
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to preview rule: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    # Get transactions for this session
+    transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
+    txn_dicts = [
+        {
+            "id": t.id,
+            "date": t.date,
+            "description": t.description,
+            "amount": t.amount,
+            "category": t.category
+        }
+        for t in transactions
+    ]
+    
+    preview = categories_service.preview_rule_matches(session_id, rule_id, txn_dicts)
+    return preview
 
 
 @app.post("/rules/apply-bulk")
 def apply_rules_bulk(request: BulkApplyRulesRequest, session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Apply rules to all transactions in a session"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        # Get transactions for this session
-        transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
-        txn_dicts = [
-            {
-                "id": t.id,
-                "date": t.date,
-                "description": t.description,
-                "amount": t.amount,
-                "category": t.category
-            }
-            for t in transactions
-        ]
-        
-        # Apply rules
-        result = categories_service.apply_rules_to_transactions(
-            session_id,
-            txn_dicts,
-            rule_ids=request.rule_ids,
-            auto_apply_only=request.auto_apply_only
-        )
-        
-        # Update transactions in database
-        updated_ids = []
-        for txn_dict in result["transactions"]:
-            txn = db.query(Transaction).filter(Transaction.id == txn_dict["id"]).first()
-            if txn and txn.category != txn_dict.get("category"):
-                txn.category = txn_dict.get("category")
-                updated_ids.append(txn.id)
-        
-        db.commit()
-        
-        # **RECALCULATE VAT FOR ALL UPDATED TRANSACTIONS**
-        for txn_id in updated_ids:
-            vat_service.apply_vat_to_transaction(txn_id, session_id, force=False)
-        
-        return {
-            "success": True,
-            "message": f"Applied {result['rules_applied']} rule(s) to {result['updated']} transaction(s)",
-            "updated_count": result["updated"],
-            "rules_applied": result["rules_applied"]
+    ensure_session_access(session_id, current_user, db)
+    # Get transactions for this session
+    transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
+    txn_dicts = [
+        {
+            "id": t.id,
+            "date": t.date,
+            "description": t.description,
+            "amount": t.amount,
+            "category": t.category
         }
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to apply rules: {str(e)}")
+        for t in transactions
+    ]
+    
+    # Apply rules
+    result = categories_service.apply_rules_to_transactions(
+        session_id,
+        txn_dicts,
+        rule_ids=request.rule_ids,
+        auto_apply_only=request.auto_apply_only
+    )
+    
+    # Update transactions in database
+    updated_ids = []
+    for txn_dict in result["transactions"]:
+        txn = db.query(Transaction).filter(Transaction.id == txn_dict["id"]).first()
+        if txn and txn.category != txn_dict.get("category"):
+            txn.category = txn_dict.get("category")
+            updated_ids.append(txn.id)
+    
+    db.commit()
+    
+    # **RECALCULATE VAT FOR ALL UPDATED TRANSACTIONS**
+    if updated_ids:
+        vat_service.apply_vat_batch(updated_ids, session_id, force=False)
+    
+    return {
+        "success": True,
+        "message": f"Applied {result['rules_applied']} rule(s) to {result['updated']} transaction(s)",
+        "updated_count": result["updated"],
+        "rules_applied": result["rules_applied"]
+    }
 
 
 @app.get("/rules/statistics")
 def get_rule_statistics(session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get statistics for all rules"""
-    try:
-        ensure_session_access(session_id, current_user, db)
-        # Get transactions for this session
-        transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
-        txn_dicts = [
-            {
-                "id": t.id,
-                "date": t.date,
-                "description": t.description,
-                "amount": t.amount,
-                "category": t.category
-            }
-            for t in transactions
-        ]
-        
-        stats = categories_service.get_rule_statistics(session_id, txn_dicts)
-        return {"statistics": stats}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to fetch statistics: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    # Get transactions for this session
+    transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
+    txn_dicts = [
+        {
+            "id": t.id,
+            "date": t.date,
+            "description": t.description,
+            "amount": t.amount,
+            "category": t.category
+        }
+        for t in transactions
+    ]
+    
+    stats = categories_service.get_rule_statistics(session_id, txn_dicts)
+    return {"statistics": stats}
 
 
 # =============================================================================
@@ -1331,16 +1876,13 @@ def get_learned_rules(session_id: Optional[str] = None, current_user: User = Dep
     Get all auto-learned categorization rules for this user
     These rules are created automatically when users assign categories
     """
-    try:
-        effective_user_id = str(current_user.id)
-        
-        rules = learning_service.get_learned_rules(effective_user_id, db)
-        return {
-            "rules": rules,
-            "total": len(rules)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch learned rules: {str(e)}")
+    effective_user_id = str(current_user.id)
+    
+    rules = learning_service.get_learned_rules(effective_user_id, db)
+    return ORJSONResponse({
+        "rules": rules,
+        "total": len(rules)
+    })
 
 
 @app.put("/learned-rules/{rule_id}")
@@ -1353,17 +1895,12 @@ def update_learned_rule(
     """
     Update a learned rule (enable/disable, change category, edit pattern)
     """
-    try:
-        effective_user_id = str(current_user.id)
-        
-        success, message = learning_service.update_rule(rule_id, effective_user_id, request, db)
-        if not success:
-            raise HTTPException(status_code=404, detail=message)
-        return {"success": True, "message": message}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to update rule: {str(e)}")
+    effective_user_id = str(current_user.id)
+    
+    success, message = learning_service.update_rule(rule_id, effective_user_id, request, db)
+    if not success:
+        raise HTTPException(status_code=404, detail=message)
+    return {"success": True, "message": message}
 
 
 @app.delete("/learned-rules/{rule_id}")
@@ -1373,17 +1910,12 @@ def delete_learned_rule(
     db: Session = Depends(get_db)
 ):
     """Delete a learned categorization rule"""
-    try:
-        effective_user_id = str(current_user.id)
-        
-        success, message = learning_service.delete_rule(rule_id, effective_user_id, db)
-        if not success:
-            raise HTTPException(status_code=404, detail=message)
-        return {"success": True, "message": message}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to delete rule: {str(e)}")
+    effective_user_id = str(current_user.id)
+    
+    success, message = learning_service.delete_rule(rule_id, effective_user_id, db)
+    if not success:
+        raise HTTPException(status_code=404, detail=message)
+    return {"success": True, "message": message}
 
 
 @app.post("/learned-rules/apply")
@@ -1396,49 +1928,61 @@ def apply_learned_rules(
     Apply all learned rules to uncategorized transactions in this session
     Returns the number of transactions auto-categorized
     """
-    try:
-        ensure_session_access(session_id, current_user, db)
-        effective_user_id = str(current_user.id)
-        
-        # Prevent modifications if session is locked
-        ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-        if ss and ss.locked:
-            raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
-        
-        # Get uncategorized transactions
-        transactions = db.query(Transaction).filter(
-            Transaction.session_id == session_id
-        ).all()
-        
-        # Apply learned rules
-        suggestions = learning_service.apply_learned_rules(effective_user_id, transactions, db)
-        
-        # Update transactions with suggestions
-        updated_count = 0
-        updated_ids = []
-        for txn_id, category in suggestions.items():
-            txn = db.query(Transaction).filter(Transaction.id == txn_id).first()
-            if txn:
-                txn.category = category
-                updated_count += 1
-                updated_ids.append(txn_id)
-        
-        db.commit()
-        
-        # **RECALCULATE VAT FOR ALL UPDATED TRANSACTIONS**
-        for txn_id in updated_ids:
-            vat_service.apply_vat_to_transaction(txn_id, session_id, force=False)
-        
-        return {
-            "success": True,
-            "message": f"Auto-categorized {updated_count} transaction(s)",
-            "updated_count": updated_count,
-            "suggestions": suggestions
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to apply learned rules: {str(e)}")
+    ensure_session_access(session_id, current_user, db)
+    effective_user_id = str(current_user.id)
+    
+    # Prevent modifications if session is locked
+    ensure_session_unlocked(session_id, db)
+    
+    # Get uncategorized transactions (the learning service skips anything
+    # already categorized other than "Other", so don't load those rows)
+    transactions = db.query(
+        Transaction.id,
+        Transaction.description,
+        Transaction.category
+    ).filter(
+        Transaction.session_id == session_id,
+        or_(
+            Transaction.category.is_(None),
+            Transaction.category == "",
+            Transaction.category == "Other"
+        )
+    ).all()
+    current_categories = {t.id: t.category for t in transactions}
+    
+    # Apply learned rules
+    suggestions = learning_service.apply_learned_rules(effective_user_id, transactions, db)
+    
+    # Write all changed categories in one executemany UPDATE, skipping
+    # suggestions that would rewrite the same value
+    updates = [
+        {"txn_id": txn_id, "new_category": category}
+        for txn_id, category in suggestions.items()
+        if current_categories.get(txn_id) != category
+    ]
+    if updates:
+        txn_table = Transaction.__table__
+        db.execute(
+            txn_table.update()
+            .where(txn_table.c.id == bindparam("txn_id"))
+            .values(category=bindparam("new_category")),
+            updates
+        )
+    updated_ids = [u["txn_id"] for u in updates]
+    updated_count = len(updated_ids)
+    
+    db.commit()
+    
+    # **RECALCULATE VAT FOR ALL UPDATED TRANSACTIONS**
+    if updated_ids:
+        vat_service.apply_vat_batch(updated_ids, session_id, force=False)
+    
+    return {
+        "success": True,
+        "message": f"Auto-categorized {updated_count} transaction(s)",
+        "updated_count": updated_count,
+        "suggestions": suggestions
+    }
 
 
 # =============================================================================
@@ -1495,6 +2039,7 @@ async def detect_bank_format(file: UploadFile = File(...), current_user: User =
 @app.post("/upload")
 async def upload_statement(
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     preview: bool = False,
@@ -1523,13 +2068,11 @@ async def upload_statement(
         # Read file content
         file_content = await file.read()
 
-        # Validate and parse CSV
-        is_valid, error_msg = validate_csv(file_content)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=f"Invalid CSV: {error_msg}")
-
-        # Parse and normalize CSV (with automatic bank detection)
-        normalized_transactions, parse_warnings, skipped_rows, bank_source = normalize_csv(file_content)
+        # Validate, parse and normalize CSV in one pass (with automatic bank detection)
+        try:
+            normalized_transactions, parse_warnings, skipped_rows, bank_source = await run_cpu_bound(normalize_csv, file_content, strict=True)
+        except InvalidCSVError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
 
         if not normalized_transactions:
             raise HTTPException(status_code=400, detail="No valid transactions found in file")
@@ -1538,90 +2081,51 @@ async def upload_statement(
 
         # Validate client ownership if provided
         if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
 
         # Load enabled rules for potential auto-apply
         try:
-            rules_query = db.query(Rule).filter(Rule.enabled == 1)
-            if client_id is not None:
-                rules_query = rules_query.filter(Rule.client_id == client_id)
-            enabled_rules_db = rules_query.order_by(Rule.priority.asc()).all()
-            enabled_rules = [
-                {
-                    "id": r.id,
-                    "name": r.name,
-                    "priority": r.priority,
-                    "conditions": json.loads(r.conditions),
-                    "action": json.loads(r.action),
-                    "auto_apply": bool(r.auto_apply)
-                }
-                for r in enabled_rules_db
-            ]
+            compiled_rules = load_compiled_rules(db, client_id)
         except Exception:
-            enabled_rules = []
+            compiled_rules = CompiledRuleSet([])
 
         # If preview requested, return parsed rows without saving
         if preview:
-            # serialize dates to ISO
-            serialized = [
-                {"date": t["date"].isoformat(), "description": t["description"], "amount": t["amount"]}
-                for t in normalized_transactions
-            ]
-            return {"preview": True, "transactions": serialized, "warnings": parse_warnings or None, "skipped_rows": skipped_rows or None}
+            # orjson writes the date objects as ISO strings itself; returning the
+            # response directly skips walking the rows through jsonable_encoder
+            return ORJSONResponse({
+                "preview": True,
+                "transactions": [
+                    {"date": t["date"], "description": t["description"], "amount": t["amount"]}
+                    for t in normalized_transactions
+                ],
+                "warnings": parse_warnings or None,
+                "skipped_rows": jsonable_encoder(skipped_rows) if skipped_rows else None
+            })
 
         # Create session ID for this upload and save
         session_id = str(uuid.uuid4())
-        categories_found = set()
         filename = file.filename or "Statement"
 
         # Apply enabled rules (auto_apply only) using first-match-wins by priority
-        def txn_matches_conditions(txn: dict, conds: dict) -> bool:
-            # conds: { match_type: 'all'|'any', conditions: [ {field, op, value} ] }
-            match_type = conds.get('match_type', 'all')
-            clauses = conds.get('conditions', [])
-
-            def eval_clause(cl):
-                f = cl.get('field')
-                op = cl.get('op')
-                val = cl.get('value')
-                v = txn.get(f)
-                if v is None:
-                    return False
-                try:
-                    if op == 'contains':
-                        return str(val).lower() in str(v).lower()
-                    if op == 'equals':
-                        return str(v).lower() == str(val).lower()
-                    if op == 'regex':
-                        return re.search(val, str(v)) is not None
-                    if op == 'gt':
-                        return float(v) > float(val)
-                    if op == 'lt':
-                        return float(v) < float(val)
-                except Exception:
-                    return False
-                return False
-
-            results = [eval_clause(c) for c in clauses]
-            if match_type == 'any':
-                return any(results)
-            return all(results)
-
-        for txn_data in normalized_transactions:
-            # default categorization from existing logic
-            category, is_expense = categorize_transaction(txn_data["description"], txn_data["amount"])
+        new_rows = []
+        merchant_links = []
+        # default categorization from existing logic, for the whole statement at once
+        default_categories = categorize_batch(
+            [t["description"] for t in normalized_transactions],
+            [t["amount"] for t in normalized_transactions]
+        )
+        for txn_data, (category, is_expense) in zip(normalized_transactions, default_categories):
 
             # wrap txn for evaluation
-            tdict = {"description": txn_data["description"], "amount": txn_data["amount"], "date": txn_data.get("date"), "category": category}
+            tdict = _rule_txn_view(txn_data["description"], txn_data["amount"], txn_data.get("date"), category)
 
             # evaluate rules
-            for r in enabled_rules:
-                if not r.get('auto_apply'):
-                    continue
+            for r, rule_matches in compiled_rules.candidates(tdict["description"]):
                 try:
-                    if txn_matches_conditions(tdict, r.get('conditions', {})):
+                    if rule_matches(tdict):
                         act = r.get('action', {})
                         if act.get('type') == 'set_category' and act.get('category'):
                             category = act.get('category')
@@ -1634,65 +2138,49 @@ async def upload_statement(
                 except Exception:
                     continue
 
-            categories_found.add(category)
-            transaction = Transaction(
-                client_id=client_id,
-                session_id=session_id,
-                date=txn_data["date"],
-                description=txn_data["description"],
-                amount=txn_data["amount"],
-                category=category,
-                bank_source=bank_source,
-                balance_verified=txn_data.get("balance_verified"),
-                balance_difference=txn_data.get("balance_difference"),
-                validation_message=txn_data.get("validation_message")
-            )
-            db.add(transaction)
-            db.flush()
-            # persist merchant if present
+            new_rows.append({
+                "client_id": client_id,
+                "session_id": session_id,
+                "date": txn_data["date"],
+                "description": txn_data["description"],
+                "amount": txn_data["amount"],
+                "category": category,
+                "bank_source": bank_source,
+                "balance_verified": txn_data.get("balance_verified"),
+                "balance_difference": txn_data.get("balance_difference"),
+                "validation_message": txn_data.get("validation_message")
+            })
+            # merchant assignment needs the transaction id, so persist after the bulk insert
             if txn_data.get('_merchant'):
-                from models import TransactionMerchant as TM
-                tm = TM(transaction_id=transaction.id, session_id=session_id, merchant=txn_data.get('_merchant'))
-                db.add(tm)
-
-        db.commit()
+                merchant_links.append((len(new_rows) - 1, txn_data.get('_merchant')))
 
         # **APPLY LEARNED CATEGORIZATION RULES**
-        # Auto-categorize transactions based on previously learned patterns
+        # Auto-categorize transactions based on previously learned patterns,
+        # before the insert so rows are written with their final category
+        learned = []
         try:
-            all_transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
-            effective_user_id = str(current_user.id)
-            suggestions = learning_service.apply_learned_rules(effective_user_id, all_transactions, db)
-            
-            # Update transactions with learned categorizations
-            updated_ids = []
-            for txn_id, category in suggestions.items():
-                txn = db.query(Transaction).filter(Transaction.id == txn_id).first()
-                if txn:
-                    txn.category = category
-                    updated_ids.append(txn_id)
-            
-            if suggestions:
-                db.commit()
-                # **RECALCULATE VAT FOR ALL AUTO-CATEGORIZED TRANSACTIONS**
-                for txn_id in updated_ids:
-                    vat_service.apply_vat_to_transaction(txn_id, session_id, force=False)
-                print(f"✓ Auto-categorized {len(suggestions)} transaction(s) using learned rules")
+            learned = _apply_learned_categories(db, current_user, new_rows)
+            if learned:
+                print(f"✓ Auto-categorized {len(learned)} transaction(s) using learned rules")
         except Exception as learn_error:
             # Don't fail upload if auto-categorization fails
+            db.rollback()
             print(f"Warning: Failed to apply learned rules: {learn_error}")
+        categories_found = dict.fromkeys(row["category"] for row in new_rows)
 
-        # Create SessionState with friendly name extracted from filename
-        # e.g., "FNB_ASPIRE_CURRENT_ACCOUNT_132.csv" -> "FNB Aspire Account 132"
-        friendly_name = filename.rsplit('.', 1)[0]  # Remove extension
-        friendly_name = friendly_name.replace('_', ' ')  # Replace underscores with spaces
-        friendly_name = ' '.join(word.capitalize() for word in friendly_name.split())  # Capitalize
-        
-        ss = SessionState(session_id=session_id, friendly_name=friendly_name)
-        db.add(ss)
+        # Create SessionState with friendly name extracted from filename; it is
+        # committed together with the transactions in a single transaction
+        db.add(SessionState(session_id=session_id, friendly_name=friendly_session_name(filename)))
+        ids = _bulk_insert_transactions(db, session_id, new_rows, merchant_links, return_ids=bool(learned))
+        learned_ids = [ids[i] for i in learned]
         db.commit()
 
-        return {"session_id": session_id, "transaction_count": len(normalized_transactions), "categories": sorted(list(categories_found)), "warnings": parse_warnings or None, "skipped_rows": skipped_rows or None}
+        # **RECALCULATE VAT FOR ALL AUTO-CATEGORIZED TRANSACTIONS**
+        # Runs after the response is sent; the VAT service opens its own session
+        if learned_ids:
+            background_tasks.add_task(vat_service.apply_vat_batch, learned_ids, session_id)
+
+        return {"session_id": session_id, "transaction_count": len(normalized_transactions), "categories": sorted(categories_found), "warnings": parse_warnings or None, "skipped_rows": skipped_rows or None}
     
     except HTTPException:
         raise
@@ -1736,18 +2224,17 @@ async def upload_pdf_statement(
         logger.info(f"[PDF_UPLOAD] File read successfully, size: {len(content)} bytes")
 
         try:
-            csv_bytes, statement_year, detected_bank = pdf_to_csv_bytes(content)
+            csv_bytes, statement_year, detected_bank = await run_cpu_bound(pdf_to_csv_bytes, content)
             logger.info(f"[PDF_UPLOAD] PDF parsed successfully, detected year: {statement_year}, bank: {detected_bank}")
         except PDFParserError as pe:
             raise HTTPException(status_code=400, detail=f"PDF parse error: {str(pe)}")
 
-        # Validate generated CSV
-        is_valid, error_msg = validate_csv(csv_bytes)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=f"Extracted CSV invalid: {error_msg}")
-
-        # Pass detected bank to normalize_csv when available to avoid mis-detection
-        normalized_transactions, parse_warnings, skipped_rows, bank_source = normalize_csv(csv_bytes, statement_year, detected_bank if 'detected_bank' in locals() else None)
+        # Validate the generated CSV while normalizing it; pass detected bank
+        # to normalize_csv when available to avoid mis-detection
+        try:
+            normalized_transactions, parse_warnings, skipped_rows, bank_source = await run_cpu_bound(normalize_csv, csv_bytes, statement_year, detected_bank, strict=True)
+        except InvalidCSVError as e:
+            raise HTTPException(status_code=400, detail=f"Extracted CSV invalid: {e}")
 
         if not normalized_transactions:
             raise HTTPException(status_code=400, detail="No valid transactions found in PDF")
@@ -1757,80 +2244,44 @@ async def upload_pdf_statement(
         # Validate client ownership if provided
         if client_id is not None:
             logger.info(f"[PDF_UPLOAD] Validating client {client_id} belongs to user {current_user.id}")
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 logger.error(f"[PDF_UPLOAD] Client {client_id} not found or doesn't belong to user {current_user.id}")
                 raise HTTPException(status_code=404, detail=f"Client {client_id} not found or doesn't belong to your account")
 
         # Load enabled rules for potential auto-apply
         try:
-            rules_query = db.query(Rule).filter(Rule.enabled == 1)
-            if client_id is not None:
-                rules_query = rules_query.filter(Rule.client_id == client_id)
-            enabled_rules_db = rules_query.order_by(Rule.priority.asc()).all()
-            enabled_rules = [
-                {
-                    "id": r.id,
-                    "name": r.name,
-                    "priority": r.priority,
-                    "conditions": json.loads(r.conditions),
-                    "action": json.loads(r.action),
-                    "auto_apply": bool(r.auto_apply)
-                }
-                for r in enabled_rules_db
-            ]
+            compiled_rules = load_compiled_rules(db, client_id)
         except Exception:
-            enabled_rules = []
+            compiled_rules = CompiledRuleSet([])
 
         # Preview mode: return parsed rows without saving
         if preview:
-            serialized = [
-                {"date": t["date"].isoformat(), "description": t["description"], "amount": t["amount"]}
-                for t in normalized_transactions
-            ]
-            return {"preview": True, "transactions": serialized, "warnings": parse_warnings or None, "skipped_rows": skipped_rows or None}
+            # orjson writes the date objects as ISO strings itself; returning the
+            # response directly skips walking the rows through jsonable_encoder
+            return ORJSONResponse({
+                "preview": True,
+                "transactions": [
+                    {"date": t["date"], "description": t["description"], "amount": t["amount"]}
+                    for t in normalized_transactions
+                ],
+                "warnings": parse_warnings or None,
+                "skipped_rows": jsonable_encoder(skipped_rows) if skipped_rows else None
+            })
 
         session_id = str(uuid.uuid4())
-        categories_found = set()
-
-        # reuse same matching logic as CSV upload
-        def txn_matches_conditions(txn: dict, conds: dict) -> bool:
-            match_type = conds.get('match_type', 'all')
-            clauses = conds.get('conditions', [])
-            def eval_clause(cl):
-                f = cl.get('field')
-                op = cl.get('op')
-                val = cl.get('value')
-                v = txn.get(f)
-                if v is None:
-                    return False
-                try:
-                    if op == 'contains':
-                        return str(val).lower() in str(v).lower()
-                    if op == 'equals':
-                        return str(v).lower() == str(val).lower()
-                    if op == 'regex':
-                        return re.search(val, str(v)) is not None
-                    if op == 'gt':
-                        return float(v) > float(val)
-                    if op == 'lt':
-                        return float(v) < float(val)
-                except Exception:
-                    return False
-                return False
-            results = [eval_clause(c) for c in clauses]
-            if match_type == 'any':
-                return any(results)
-            return all(results)
-
-        for txn_data in normalized_transactions:
-            category, is_expense = categorize_transaction(txn_data["description"], txn_data["amount"])
-            tdict = {"description": txn_data["description"], "amount": txn_data["amount"], "date": txn_data.get("date"), "category": category}
-            for r in enabled_rules:
-                if not r.get('auto_apply'):
-                    continue
+
+        new_rows = []
+        merchant_links = []
+        default_categories = categorize_batch(
+            [t["description"] for t in normalized_transactions],
+            [t["amount"] for t in normalized_transactions]
+        )
+        for txn_data, (category, is_expense) in zip(normalized_transactions, default_categories):
+            tdict = _rule_txn_view(txn_data["description"], txn_data["amount"], txn_data.get("date"), category)
+            for r, rule_matches in compiled_rules.candidates(tdict["description"]):
                 try:
-                    if txn_matches_conditions(tdict, r.get('conditions', {})):
+                    if rule_matches(tdict):
                         act = r.get('action', {})
                         if act.get('type') == 'set_category' and act.get('category'):
                             category = act.get('category')
@@ -1841,56 +2292,37 @@ async def upload_pdf_statement(
                 except Exception:
                     continue
 
-            categories_found.add(category)
-            transaction = Transaction(
-                session_id=session_id,
-                client_id=client_id,
-                date=txn_data["date"],
-                description=txn_data["description"],
-                amount=txn_data["amount"],
-                category=category,
-                bank_source=bank_source,
-                balance_verified=txn_data.get("balance_verified"),
-                balance_difference=txn_data.get("balance_difference"),
-                validation_message=txn_data.get("validation_message")
-            )
-            db.add(transaction)
-            db.flush()
+            new_rows.append({
+                "session_id": session_id,
+                "client_id": client_id,
+                "date": txn_data["date"],
+                "description": txn_data["description"],
+                "amount": txn_data["amount"],
+                "category": category,
+                "bank_source": bank_source,
+                "balance_verified": txn_data.get("balance_verified"),
+                "balance_difference": txn_data.get("balance_difference"),
+                "validation_message": txn_data.get("validation_message")
+            })
             if txn_data.get('_merchant'):
-                from models import TransactionMerchant as TM
-                tm = TM(transaction_id=transaction.id, session_id=session_id, merchant=txn_data.get('_merchant'))
-                db.add(tm)
-
-        db.commit()
+                merchant_links.append((len(new_rows) - 1, txn_data.get('_merchant')))
 
         # **APPLY LEARNED CATEGORIZATION RULES**
         try:
-            all_transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
-            effective_user_id = str(current_user.id)
-            suggestions = learning_service.apply_learned_rules(effective_user_id, all_transactions, db)
-            
-            for txn_id, category in suggestions.items():
-                txn = db.query(Transaction).filter(Transaction.id == txn_id).first()
-                if txn:
-                    txn.category = category
-            
-            if suggestions:
-                db.commit()
-                print(f"✓ Auto-categorized {len(suggestions)} transaction(s) using learned rules")
+            learned = _apply_learned_categories(db, current_user, new_rows)
+            if learned:
+                print(f"✓ Auto-categorized {len(learned)} transaction(s) using learned rules")
         except Exception as learn_error:
+            db.rollback()
             print(f"Warning: Failed to apply learned rules: {learn_error}")
+        categories_found = dict.fromkeys(row["category"] for row in new_rows)
 
-        # Create SessionState with friendly name from filename
-        filename = file.filename or "Statement"
-        friendly_name = filename.rsplit('.', 1)[0]  # Remove extension
-        friendly_name = friendly_name.replace('_', ' ')  # Replace underscores with spaces
-        friendly_name = ' '.join(word.capitalize() for word in friendly_name.split())  # Capitalize
-        
-        ss = SessionState(session_id=session_id, friendly_name=friendly_name)
-        db.add(ss)
+        # Create SessionState with friendly name from filename, committed with the transactions
+        db.add(SessionState(session_id=session_id, friendly_name=friendly_session_name(file.filename or "Statement")))
+        _bulk_insert_transactions(db, session_id, new_rows, merchant_links)
         db.commit()
 
-        return {"session_id": session_id, "transaction_count": len(normalized_transactions), "categories": sorted(list(categories_found)), "bank_source": bank_source, "warnings": parse_warnings or None, "skipped_rows": skipped_rows or None}
+        return {"session_id": session_id, "transaction_count": len(normalized_transactions), "categories": sorted(categories_found), "bank_source": bank_source, "warnings": parse_warnings or None, "skipped_rows": skipped_rows or None}
     except HTTPException:
         raise
     except Exception as e:
@@ -1920,62 +2352,30 @@ def save_parsed_transactions(
             raise HTTPException(status_code=400, detail="transactions must be a non-empty list")
 
         session_id = str(uuid.uuid4())
-        categories_found = set()
 
         # Validate client ownership if provided
         if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
 
         # load enabled auto-apply rules
         try:
-            rules_query = db.query(Rule).filter(Rule.enabled == 1)
-            if client_id is not None:
-                rules_query = rules_query.filter(Rule.client_id == client_id)
-            enabled_rules_db = rules_query.order_by(Rule.priority.asc()).all()
-            enabled_rules = [
-                {"id": r.id, "conditions": json.loads(r.conditions), "action": json.loads(r.action), "auto_apply": bool(r.auto_apply)}
-                for r in enabled_rules_db
-            ]
+            compiled_rules = load_compiled_rules(db, client_id)
         except Exception:
-            enabled_rules = []
-
-        def txn_matches_conditions(txn: dict, conds: dict) -> bool:
-            match_type = conds.get('match_type', 'all')
-            clauses = conds.get('conditions', [])
-            def eval_clause(cl):
-                f = cl.get('field')
-                op = cl.get('op')
-                val = cl.get('value')
-                v = txn.get(f)
-                if v is None:
-                    return False
-                try:
-                    if op == 'contains':
-                        return str(val).lower() in str(v).lower()
-                    if op == 'equals':
-                        return str(v).lower() == str(val).lower()
-                    if op == 'regex':
-                        return re.search(val, str(v)) is not None
-                    if op == 'gt':
-                        return float(v) > float(val)
-                    if op == 'lt':
-                        return float(v) < float(val)
-                except Exception:
-                    return False
-                return False
-            results = [eval_clause(c) for c in clauses]
-            if match_type == 'any':
-                return any(results)
-            return all(results)
-
-        for item in txns:
+            compiled_rules = CompiledRuleSet([])
+
+        new_rows = []
+        merchant_links = []
+        rows = [item for item in txns if item.get("date") and item.get("amount") is not None]
+        default_categories = categorize_batch(
+            [item.get("description") or "" for item in rows],
+            [item["amount"] for item in rows]
+        )
+        for item, (category, is_expense) in zip(rows, default_categories):
             d = item.get("date")
             desc = item.get("description") or ""
             amount = item.get("amount")
-            if not d or amount is None:
-                continue
             # parse date string to date
             if isinstance(d, str):
                 date_obj = parse_date(d)
@@ -1984,14 +2384,10 @@ def save_parsed_transactions(
             else:
                 date_obj = d
 
-            category, is_expense = categorize_transaction(desc, amount)
-
-            tdict = {"description": desc, "amount": amount, "date": date_obj, "category": category}
-            for r in enabled_rules:
-                if not r.get('auto_apply'):
-                    continue
+            tdict = _rule_txn_view(desc, amount, date_obj, category)
+            for r, rule_matches in compiled_rules.candidates(tdict["description"]):
                 try:
-                    if txn_matches_conditions(tdict, r.get('conditions', {})):
+                    if rule_matches(tdict):
                         act = r.get('action', {})
                         if act.get('type') == 'set_category' and act.get('category'):
                             category = act.get('category')
@@ -2002,48 +2398,36 @@ def save_parsed_transactions(
                 except Exception:
                     continue
 
-            categories_found.add(category)
-            transaction = Transaction(
-                client_id=client_id,
-                session_id=session_id,
-                date=date_obj,
-                description=desc,
-                amount=amount,
-                category=category,
-                balance_verified=item.get("balance_verified"),
-                balance_difference=item.get("balance_difference"),
-                validation_message=item.get("validation_message")
-            )
-            db.add(transaction)
-            db.flush()
+            new_rows.append({
+                "client_id": client_id,
+                "session_id": session_id,
+                "date": date_obj,
+                "description": desc,
+                "amount": amount,
+                "category": category,
+                "balance_verified": item.get("balance_verified"),
+                "balance_difference": item.get("balance_difference"),
+                "validation_message": item.get("validation_message")
+            })
             if item.get('_merchant'):
-                from models import TransactionMerchant as TM
-                tm = TM(transaction_id=transaction.id, session_id=session_id, merchant=item.get('_merchant'))
-                db.add(tm)
-
-        db.commit()
+                merchant_links.append((len(new_rows) - 1, item.get('_merchant')))
 
         # **APPLY LEARNED CATEGORIZATION RULES**
         # Auto-categorize transactions based on previously learned patterns
         try:
-            all_transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
-            effective_user_id = str(current_user.id)
-            suggestions = learning_service.apply_learned_rules(effective_user_id, all_transactions, db)
-            
-            # Update transactions with learned categorizations
-            for txn_id, category in suggestions.items():
-                txn = db.query(Transaction).filter(Transaction.id == txn_id).first()
-                if txn:
-                    txn.category = category
-            
-            if suggestions:
-                db.commit()
-                print(f"✓ Auto-categorized {len(suggestions)} transaction(s) using learned rules")
+            learned = _apply_learned_categories(db, current_user, new_rows)
+            if learned:
+                print(f"✓ Auto-categorized {len(learned)} transaction(s) using learned rules")
         except Exception as learn_error:
             # Don't fail save if auto-categorization fails
+            db.rollback()
             print(f"Warning: Failed to apply learned rules: {learn_error}")
+        categories_found = dict.fromkeys(row["category"] for row in new_rows)
+
+        _bulk_insert_transactions(db, session_id, new_rows, merchant_links)
+        db.commit()
 
-        return {"session_id": session_id, "transaction_count": len(txns), "categories": sorted(list(categories_found))}
+        return {"session_id": session_id, "transaction_count": len(txns), "categories": sorted(categories_found)}
     except HTTPException:
         raise
     except Exception as e:
@@ -2059,37 +2443,30 @@ def save_parsed_transactions(
 async def pdf_debug_extract(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
     """Return raw extracted text and table previews per page to help debug parsing."""
     try:
-        content = await file.read()
         # import helpers from pdf_parser
         try:
-            from services.pdf_parser import _HAS_PDFPLUMBER, pdfplumber
+            from services.pdf_parser import _HAS_PDFPLUMBER, pdfplumber, extract_debug_page
         except Exception:
             raise HTTPException(status_code=500, detail='PDF debug helper not available')
 
         if not _HAS_PDFPLUMBER or pdfplumber is None:
             raise HTTPException(status_code=400, detail='pdfplumber not available; install pdfplumber')
 
-        pages_out = []
-        import io
-        with pdfplumber.open(io.BytesIO(content)) as pdf:
-            for i, page in enumerate(pdf.pages, start=1):
-                try:
-                    text = page.extract_text() or ''
-                except Exception:
-                    text = ''
-                text_preview = text[:5000]
-                tables = []
-                try:
-                    t = page.extract_tables()
-                    for table in t:
-                        rows_preview = [[('' if c is None else str(c)) for c in row] for row in table[:10]]
-                        tables.append(rows_preview)
-                except Exception:
-                    tables = []
+        # Stream the upload to disk; workers open it by path instead of
+        # receiving a copy of the whole PDF each
+        pdf_path = await spool_upload(file, '.pdf')
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                page_count = len(pdf.pages)
 
-                pages_out.append({'page': i, 'text_preview': text_preview, 'tables': tables})
+            # Pages are independent, so extract them in parallel in the parse pool
+            pages_out = await asyncio.gather(*(
+                run_cpu_bound(extract_debug_page, pdf_path, i) for i in range(page_count)
+            ))
+        finally:
+            os.remove(pdf_path)
 
-        return {'pages': pages_out}
+        return ORJSONResponse({'pages': pages_out})
     except HTTPException:
         raise
     except Exception as e:
@@ -2097,7 +2474,7 @@ async def pdf_debug_extract(file: UploadFile = File(...), current_user: User = D
 
 
 @app.post("/ocr/regions")
-async def save_ocr_regions(payload: dict, session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def save_ocr_regions(payload: dict, session_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Save OCR region definitions for a user's session.
 
     Expected payload example:
@@ -2137,8 +2514,7 @@ async def save_ocr_regions(payload: dict, session_id: str, current_user: User =
 
         # Allow either a single page payload or a multi-page payload (pages dict)
         # If payload contains 'pages', expect structure: { "1": {date_region:..., description_region:...}, "2": {...} }
-        store_key = (current_user.id, session_id)
-        entry = ocr_region_store.get(store_key, {'pages': {}, 'amount_type': 'single'})
+        entry = ocr_region_store.get(current_user.id, session_id) or {'pages': {}, 'amount_type': 'single'}
 
         if 'pages' in payload and isinstance(payload['pages'], dict):
             for p_str, regs in payload['pages'].items():
@@ -2158,7 +2534,7 @@ async def save_ocr_regions(payload: dict, session_id: str, current_user: User =
         if 'amount_type' in payload:
             entry['amount_type'] = payload.get('amount_type', entry.get('amount_type', 'single'))
 
-        ocr_region_store[store_key] = entry
+        ocr_region_store.set(current_user.id, session_id, entry)
 
         return {"success": True, "message": "Regions saved", "session_id": session_id, "pages_saved": list(entry['pages'].keys())}
     except HTTPException:
@@ -2190,30 +2566,36 @@ async def ocr_extract(
     
     try:
         ensure_session_access(session_id, current_user, db)
-        store_key = (current_user.id, session_id)
-        if not session_id or store_key not in ocr_region_store:
+        saved = ocr_region_store.get(current_user.id, session_id) if session_id else None
+        if saved is None:
             raise HTTPException(status_code=400, detail="session_id is required and must have saved regions via /ocr/regions")
 
-        content = await file.read()
-        saved = ocr_region_store[store_key]
         pages_map = saved.get('pages', {})
         amount_type = saved.get('amount_type', 'single')
 
-        from services.ocr_workflow import run_extraction
+        if page is not None and int(page) not in pages_map:
+            raise HTTPException(status_code=400, detail=f"No regions saved for page {page}")
 
         results = {}
-
-        # If a specific page was requested, only run that one
-        if page is not None:
-            if int(page) not in pages_map:
-                raise HTTPException(status_code=400, detail=f"No regions saved for page {page}")
-            res = run_extraction(content, pages_map[int(page)], page=int(page))
-            results[int(page)] = res
-        else:
-            # Run extraction for each saved page
-            for pnum, regs in pages_map.items():
-                res = run_extraction(content, regs, page=int(pnum))
-                results[int(pnum)] = res
+        # The content hash keys the rendered-page cache, so re-running with tuned
+        # regions on the same PDF skips rendering
+        digest = hashlib.sha256()
+        pdf_path = await spool_upload(file, '.pdf', digest)
+        content_hash = digest.hexdigest()
+        try:
+            # If a specific page was requested, only run that one
+            if page is not None:
+                res = await run_ocr_extraction(pdf_path, pages_map[int(page)], int(page), content_hash)
+                results[int(page)] = res
+            else:
+                # Pages are independent: OCR them concurrently
+                page_nums = [int(pnum) for pnum in pages_map]
+                page_results = await asyncio.gather(*(
+                    run_ocr_extraction(pdf_path, regs, pnum, content_hash) for pnum, regs in zip(page_nums, pages_map.values())
+                ))
+                results = dict(zip(page_nums, page_results))
+        finally:
+            os.remove(pdf_path)
 
         return { 'success': True, 'preview': True, 'results': results, 'amount_type': amount_type }
 
@@ -2222,8 +2604,23 @@ async def ocr_extract(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Columns serialized by GET /transactions
+TRANSACTION_LIST_COLUMNS = (
+    Transaction.id,
+    Transaction.session_id,
+    Transaction.date,
+    Transaction.description,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.invoice_id,
+    Transaction.vat_amount,
+    Transaction.amount_excl_vat,
+    Transaction.amount_incl_vat,
+)
+
+
 @app.get("/transactions", tags=["Transactions"])
-async def get_transactions(
+def get_transactions(
     request: Request,
     session_id: Optional[str] = None,
     client_id: Optional[int] = None,
@@ -2232,6 +2629,7 @@ async def get_transactions(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     limit: Optional[int] = None,
+    format: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -2242,17 +2640,19 @@ async def get_transactions(
         - session_id (optional): Session ID from upload (legacy)
         - client_id (optional): Filter by client (new multi-client support)
         - category (optional): Filter by category
+        - format (optional): 'ndjson' streams one transaction object per line
     """
     
-    # Fetch transactions - filter by session_id or client_id
+    # Fetch transactions - filter by session_id or client_id. Only the listed
+    # columns are selected, so rows come back as plain tuples, not ORM instances
     if session_id:
         ensure_session_access(session_id, current_user, db)
-        query = db.query(Transaction).filter(Transaction.session_id == session_id)
+        query = db.query(*TRANSACTION_LIST_COLUMNS).filter(Transaction.session_id == session_id)
     elif client_id:
-        client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+        client = get_owned_client(client_id, current_user, db)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
-        query = db.query(Transaction).filter(Transaction.client_id == client_id)
+        query = db.query(*TRANSACTION_LIST_COLUMNS).filter(Transaction.client_id == client_id)
     else:
         raise HTTPException(status_code=400, detail="Either session_id or client_id must be provided")
 
@@ -2263,33 +2663,42 @@ async def get_transactions(
     # Date filters (expect YYYY-MM-DD)
     if date_from:
         try:
-            df = datetime.strptime(date_from, "%Y-%m-%d").date()
+            df = date.fromisoformat(date_from)
             query = query.filter(Transaction.date >= df)
         except Exception:
             raise HTTPException(status_code=400, detail="date_from must be YYYY-MM-DD")
 
     if date_to:
         try:
-            dt = datetime.strptime(date_to, "%Y-%m-%d").date()
+            dt = date.fromisoformat(date_to)
             query = query.filter(Transaction.date <= dt)
         except Exception:
             raise HTTPException(status_code=400, detail="date_to must be YYYY-MM-DD")
 
     if q and q.strip():
-        # simple case-insensitive substring match on description and amount
+        # case-insensitive substring match on description; a numeric query also
+        # matches amounts of that value (either sign) with an index-friendly range
         like_pattern = f"%{q.strip()}%"
-        query = query.filter(
-            or_(
-                Transaction.description.ilike(like_pattern),
-                func.cast(Transaction.amount, String).ilike(like_pattern)
+        try:
+            amount_q = abs(float(q.strip().replace(',', '')))
+        except ValueError:
+            amount_q = None
+        if amount_q is None:
+            query = query.filter(Transaction.description.ilike(like_pattern))
+        else:
+            query = query.filter(
+                or_(
+                    Transaction.description.ilike(like_pattern),
+                    Transaction.amount.between(amount_q - 0.005, amount_q + 0.005),
+                    Transaction.amount.between(-amount_q - 0.005, -amount_q + 0.005)
+                )
             )
-        )
 
-    transactions = query.order_by(Transaction.date.desc()).all()
+    query = query.order_by(Transaction.date.desc())
     
-    # Apply limit if provided (for dashboard preview)
+    # Apply limit if provided (for dashboard preview) in SQL, so only those rows are fetched
     if limit and limit > 0:
-        transactions = transactions[:limit]
+        query = query.limit(limit)
     
     # Get session state friendly names for statement identification
     session_names = {}
@@ -2303,27 +2712,43 @@ async def get_transactions(
         if session_state:
             session_names[session_id] = session_state.friendly_name
     
-    return {
-        "session_id": session_id,
-        "count": len(transactions),
-        "transactions": [
+    def serialize(rows) -> list:
+        merchants = _merchant_map(db, [t.id for t in rows])
+        return [
             {
                 "id": t.id,
                 "session_id": t.session_id,
                 "statement_name": session_names.get(t.session_id, "Unknown Statement"),
-                "date": t.date.isoformat(),
+                "date": t.date,
                 "description": t.description,
                 "amount": t.amount,
                 "category": t.category,
                 "invoice_id": t.invoice_id,
-                "merchant": (db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == t.id).first().merchant if db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == t.id).first() else None),
+                "merchant": merchants.get(t.id),
                 "vat_amount": t.vat_amount,
                 "amount_excl_vat": t.amount_excl_vat,
                 "amount_incl_vat": t.amount_incl_vat
             }
-            for t in transactions
+            for t in rows
         ]
-    }
+    
+    if format == "ndjson":
+        # Fetch and encode 500 rows at a time so memory stays flat for large exports
+        def stream_rows():
+            rows = iter(query.yield_per(500))
+            while batch := list(itertools.islice(rows, 500)):
+                yield b"".join(orjson.dumps(row) + b"\n" for row in serialize(batch))
+        
+        return StreamingResponse(stream_rows(), media_type="application/x-ndjson")
+    
+    transactions = serialize(query.all())
+    
+    # Plain dicts of primitives/dates: let orjson serialize them directly
+    return ORJSONResponse({
+        "session_id": session_id,
+        "count": len(transactions),
+        "transactions": transactions
+    })
 
 
 @app.get("/sessions/{session_id}/validation-report")
@@ -2337,45 +2762,64 @@ def get_validation_report(
     Shows which transactions were verified against their balance information.
     """
     ensure_session_access(session_id, current_user, db)
-    transactions = db.query(Transaction).filter(
-        Transaction.session_id == session_id
-    ).order_by(Transaction.date.asc()).all()
     
-    if not transactions:
+    # Counts and income/expense totals per verification state (1, 0, NULL) in one grouped query
+    stats = {True: (0, 0, 0), False: (0, 0, 0), None: (0, 0, 0)}
+    for balance_verified, count, income, expenses in db.query(
+        Transaction.balance_verified,
+        func.count(Transaction.id),
+        func.coalesce(func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)), 0),
+        func.coalesce(func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)), 0)
+    ).filter(Transaction.session_id == session_id).group_by(Transaction.balance_verified):
+        key = None if balance_verified is None else bool(balance_verified)
+        stats[key] = tuple(a + b for a, b in zip(stats[key], (count, income, expenses)))
+    
+    total_count = sum(count for count, _, _ in stats.values())
+    if not total_count:
         raise HTTPException(status_code=404, detail=f"No transactions found for session {session_id}")
     
     # Calculate statistics
-    verified = sum(1 for t in transactions if t.balance_verified is True)
-    failed = sum(1 for t in transactions if t.balance_verified is False)
-    no_balance = sum(1 for t in transactions if t.balance_verified is None)
+    verified, verified_income, verified_expenses = stats[True]
+    failed = stats[False][0]
+    no_balance = stats[None][0]
     
     # Calculate income/expenses with verification breakdown
-    verified_income = sum(t.amount for t in transactions if t.balance_verified is True and t.amount > 0)
-    verified_expenses = sum(t.amount for t in transactions if t.balance_verified is True and t.amount < 0)
-    unverified_income = sum(t.amount for t in transactions if t.balance_verified is not True and t.amount > 0)
-    unverified_expenses = sum(t.amount for t in transactions if t.balance_verified is not True and t.amount < 0)
+    unverified_income = stats[False][1] + stats[None][1]
+    unverified_expenses = stats[False][2] + stats[None][2]
     
     total_income = verified_income + unverified_income
     total_expenses = verified_expenses + unverified_expenses
     total_net = total_income + total_expenses
     
-    # Group failures by issue
+    # Only the listed columns are loaded; no ORM instances for the per-transaction listing
+    transactions = db.query(
+        Transaction.id,
+        Transaction.date,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.balance_verified,
+        Transaction.balance_difference,
+        Transaction.validation_message
+    ).filter(
+        Transaction.session_id == session_id
+    ).order_by(Transaction.date.asc()).all()
+    
+    # Group failures by issue, from the rows already loaded for the listing. Keys are
+    # formatted in Python (round half to even), which SQL round() would not reproduce
     failures_by_diff = {}
     for t in transactions:
-        if t.balance_verified is False:
-            diff_bucket = f">{t.balance_difference:.0f}" if t.balance_difference else "unknown"
-            if diff_bucket not in failures_by_diff:
-                failures_by_diff[diff_bucket] = 0
-            failures_by_diff[diff_bucket] += 1
+        if t.balance_verified is not None and not t.balance_verified:
+            key = f">{t.balance_difference:.0f}" if t.balance_difference else "unknown"
+            failures_by_diff[key] = failures_by_diff.get(key, 0) + 1
     
-    return {
+    return ORJSONResponse({
         "session_id": session_id,
         "summary": {
-            "total_transactions": len(transactions),
+            "total_transactions": total_count,
             "verified_count": verified,
             "failed_count": failed,
             "no_balance_count": no_balance,
-            "verification_rate": f"{verified / max(1, len(transactions) - no_balance) * 100:.1f}%" if (len(transactions) - no_balance) > 0 else "N/A"
+            "verification_rate": f"{verified / max(1, total_count - no_balance) * 100:.1f}%" if (total_count - no_balance) > 0 else "N/A"
         },
         "financials": {
             "verified": {
@@ -2407,7 +2851,7 @@ def get_validation_report(
             }
             for t in transactions
         ]
-    }
+    })
 
 
 @app.post("/invoice/upload")
@@ -2465,7 +2909,7 @@ def get_statements(client_id: Optional[int] = None, current_user: User = Depends
     try:
         # Get unique session_ids for this user's clients
         if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
             session_ids = db.query(Transaction.session_id).filter(
@@ -2488,36 +2932,33 @@ def get_statements(client_id: Optional[int] = None, current_user: User = Depends
             SessionState.session_id.in_(session_ids)
         ).all()
         
+        # Transaction count and date range for every session in one grouped query
+        stats_query = db.query(
+            Transaction.session_id,
+            func.count(Transaction.id),
+            func.min(Transaction.date),
+            func.max(Transaction.date)
+        ).filter(Transaction.session_id.in_(session_ids))
+        if client_id:
+            stats_query = stats_query.filter(Transaction.client_id == client_id)
+        stats_by_session = {
+            sid: (txn_count, min_date, max_date)
+            for sid, txn_count, min_date, max_date in stats_query.group_by(Transaction.session_id)
+        }
+        
         result = []
         for session in sessions:
-            # Get transaction count and date range for this session
-            txn_query = db.query(Transaction).filter(Transaction.session_id == session.session_id)
-            if client_id:
-                txn_query = txn_query.filter(Transaction.client_id == client_id)
-            
-            txn_count = txn_query.count()
-            
             # Skip if no transactions (shouldn't happen but safety check)
-            if txn_count == 0:
+            if session.session_id not in stats_by_session:
                 continue
-            
-            # Get date range
-            date_stats = db.query(
-                func.min(Transaction.date).label('min_date'),
-                func.max(Transaction.date).label('max_date')
-            ).filter(Transaction.session_id == session.session_id)
-            
-            if client_id:
-                date_stats = date_stats.filter(Transaction.client_id == client_id)
-            
-            stats = date_stats.first()
+            txn_count, min_date, max_date = stats_by_session[session.session_id]
             
             result.append({
                 "session_id": session.session_id,
                 "friendly_name": session.friendly_name or "Unknown Statement",
                 "transaction_count": txn_count,
-                "date_from": stats.min_date.isoformat() if stats.min_date else None,
-                "date_to": stats.max_date.isoformat() if stats.max_date else None,
+                "date_from": min_date.isoformat() if min_date else None,
+                "date_to": max_date.isoformat() if max_date else None,
                 "created_at": session.created_at.isoformat() if session.created_at else None
             })
         
@@ -2548,7 +2989,7 @@ def list_invoices(
             ensure_session_access(session_id, current_user, db)
             rows = db.query(Invoice).filter(Invoice.session_id == session_id).all()
         elif client_id:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
             rows = db.query(Invoice).filter(Invoice.client_id == client_id).all()
@@ -2603,27 +3044,37 @@ def match_invoices(session_id: str, current_user: User = Depends(get_current_use
             for t in txns_db
         ]
 
-        matches = matcher.find_best_matches(invoices, txns)
+        # Scoring is invoices x transactions of pure Python: run it in the process pool so it
+        # does not hold the GIL; this (sync) endpoint's threadpool thread just waits for it
+        matches = _get_parse_pool().submit(matcher.find_best_matches, invoices, txns).result()
 
-        # Persist or update suggested matches
+        # Persist or update suggested matches: one lookup for all invoices, then bulk writes
+        existing = {}
+        for im_id, inv_id in db.query(InvoiceMatch.id, InvoiceMatch.invoice_id).filter(
+            InvoiceMatch.invoice_id.in_([m.get("invoice_id") for m in matches])
+        ).order_by(InvoiceMatch.id):
+            existing.setdefault(inv_id, im_id)
+
+        now = datetime.utcnow()
+        updates, inserts = [], []
         for m in matches:
             # Upsert a suggested match for this invoice
             inv_id = m.get("invoice_id")
-            txn_id = m.get("transaction_id")
-            score = int(m.get("score") or 0)
-            explanation = m.get("explanation")
-
-            existing = db.query(InvoiceMatch).filter(InvoiceMatch.invoice_id == inv_id).first()
-            if existing:
-                existing.transaction_id = txn_id
-                existing.confidence = score
-                existing.explanation = explanation
-                existing.status = 'suggested'
-                existing.suggested_at = datetime.utcnow()
+            values = {
+                "transaction_id": m.get("transaction_id"),
+                "confidence": int(m.get("score") or 0),
+                "explanation": m.get("explanation"),
+                "status": 'suggested',
+            }
+            if inv_id in existing:
+                updates.append({"id": existing[inv_id], "suggested_at": now, **values})
             else:
-                im = InvoiceMatch(invoice_id=inv_id, transaction_id=txn_id, confidence=score, explanation=explanation, status='suggested')
-                db.add(im)
+                inserts.append({"invoice_id": inv_id, **values})
 
+        if updates:
+            db.bulk_update_mappings(InvoiceMatch, updates)
+        if inserts:
+            db.bulk_insert_mappings(InvoiceMatch, inserts)
         db.commit()
 
         # Build response in requested shape
@@ -2716,15 +3167,15 @@ def list_matches(session_id: str, current_user: User = Depends(get_current_user)
     """List suggested/confirmed/rejected matches for a session."""
     try:
         ensure_session_access(session_id, current_user, db)
-        # join invoices and invoice_matches and include suggested transaction details
-        rows = db.query(Invoice, InvoiceMatch).filter(Invoice.session_id == session_id).outerjoin(InvoiceMatch, InvoiceMatch.invoice_id == Invoice.id).all()
+        # join invoices, invoice_matches and the suggested transactions in one query
+        rows = db.query(Invoice, InvoiceMatch, Transaction).filter(Invoice.session_id == session_id)\
+            .outerjoin(InvoiceMatch, InvoiceMatch.invoice_id == Invoice.id)\
+            .outerjoin(Transaction, Transaction.id == InvoiceMatch.transaction_id).all()
         out = []
-        for inv, im in rows:
+        for inv, im, txn in rows:
             txn_obj = None
-            if im and im.transaction_id:
-                txn = db.query(Transaction).filter(Transaction.id == im.transaction_id).first()
-                if txn:
-                    txn_obj = {"id": txn.id, "date": txn.date.isoformat() if txn.date else None, "description": txn.description, "amount": txn.amount}
+            if txn:
+                txn_obj = {"id": txn.id, "date": txn.date.isoformat() if txn.date else None, "description": txn.description, "amount": txn.amount}
 
             row = {
                 "invoice_id": inv.id,
@@ -2738,7 +3189,7 @@ def list_matches(session_id: str, current_user: User = Depends(get_current_user)
                 "explanation": im.explanation if im else None,
             }
             out.append(row)
-        return {"matches": out}
+        return ORJSONResponse({"matches": out})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -2749,20 +3200,24 @@ def unmatched_view(session_id: str, current_user: User = Depends(get_current_use
     try:
         ensure_session_access(session_id, current_user, db)
 
-        # transactions with confirmed matches
-        confirmed_txn_ids = {im.transaction_id for im in db.query(InvoiceMatch).filter(InvoiceMatch.status == 'confirmed').all()}
-        txns_db = db.query(Transaction).filter(Transaction.session_id == session_id).all()
+        # transactions without a confirmed match, filtered by the database (anti-join)
+        txns_db = db.query(Transaction.id, Transaction.date, Transaction.description, Transaction.amount).filter(
+            Transaction.session_id == session_id,
+            ~exists().where(InvoiceMatch.transaction_id == Transaction.id, InvoiceMatch.status == 'confirmed')
+        )
         unmatched_txns = [
             {"id": t.id, "date": t.date.isoformat(), "description": t.description, "amount": t.amount}
-            for t in txns_db if t.id not in confirmed_txn_ids
+            for t in txns_db
         ]
 
-        # invoices with confirmed matches
-        confirmed_inv_ids = {im.invoice_id for im in db.query(InvoiceMatch).filter(InvoiceMatch.status == 'confirmed').all()}
-        invs_db = db.query(Invoice).filter(Invoice.session_id == session_id).all()
+        # invoices without a confirmed match
+        invs_db = db.query(Invoice.id, Invoice.supplier_name, Invoice.invoice_date, Invoice.total_amount).filter(
+            Invoice.session_id == session_id,
+            ~exists().where(InvoiceMatch.invoice_id == Invoice.id, InvoiceMatch.status == 'confirmed')
+        )
         unmatched_invoices = [
             {"id": i.id, "supplier_name": i.supplier_name, "invoice_date": i.invoice_date.isoformat(), "total_amount": i.total_amount}
-            for i in invs_db if i.id not in confirmed_inv_ids
+            for i in invs_db
         ]
 
         return {"unmatched_transactions": unmatched_txns, "unmatched_invoices": unmatched_invoices}
@@ -2770,10 +3225,50 @@ def unmatched_view(session_id: str, current_user: User = Depends(get_current_use
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _learn_from_categorization(
+    user_id: str,
+    session_id: str,
+    transaction_id: int,
+    description: str,
+    category: str,
+    db: Session,
+    keyword: Optional[str] = None
+):
+    """Learn categorization rules from a user's categorization (run as a background task)."""
+    try:
+        # Get merchant if it exists
+        merchant = None
+        tm = db.query(TransactionMerchant).filter(
+            TransactionMerchant.transaction_id == transaction_id
+        ).first()
+        if tm:
+            merchant = tm.merchant
+        
+        learned_rules = learning_service.learn_from_categorization(
+            user_id=user_id,
+            session_id=session_id,
+            description=description,
+            category=category,
+            merchant=merchant,
+            keyword=keyword,
+            db=db
+        )
+        if learned_rules:
+            logger.debug(
+                "Learned %d new categorization pattern(s) for user %s (keyword: %r)",
+                len(learned_rules), user_id, keyword
+            )
+    except Exception:
+        # Don't fail anything if learning fails, just log it
+        logger.warning("Failed to learn from categorization", exc_info=True)
+
+
 @app.post("/bulk-categorise/ids")
 def bulk_categorize_by_ids(
     payload: dict,
     session_id: str,
+    background_tasks: BackgroundTasks,
+    return_rows: str = Query("changed", alias="return"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -2781,14 +3276,13 @@ def bulk_categorize_by_ids(
     Apply a category to an explicit list of transaction IDs for a session.
 
     Body payload: { "ids": [1,2,3], "category": "Fees & Charges" }
+    Query ?return=changed (default) lists only the updated transactions; ?return=all lists the whole session.
     """
     try:
         ensure_session_access(session_id, current_user, db)
 
         # Prevent modifications if session is locked
-        ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-        if ss and ss.locked:
-            raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+        ensure_session_unlocked(session_id, db)
 
         ids = payload.get("ids") or []
         category = payload.get("category")
@@ -2799,57 +3293,36 @@ def bulk_categorize_by_ids(
             raise HTTPException(status_code=400, detail="category is required")
 
         # Fetch transactions to update (ensure they belong to session)
-        txns_db = db.query(Transaction).filter(
-            Transaction.session_id == session_id,
-            Transaction.id.in_(ids)
-        ).all()
+        scope = (Transaction.session_id == session_id, _id_list_match(db, Transaction.id, ids))
+        original_state = [
+            UndoRow(*row)
+            for row in db.query(Transaction.id, Transaction.category, Transaction.description).filter(*scope)
+        ]
 
-        if not txns_db:
+        if not original_state:
             raise HTTPException(status_code=404, detail="No matching transactions found for these IDs")
 
-        # Save original state for undo
-        original_state = [
-            {"id": t.id, "category": t.category, "description": t.description}
-            for t in txns_db
-        ]
+        # Update in a single statement
+        db.query(Transaction).filter(*scope).update(
+            {Transaction.category: category}, synchronize_session=False
+        )
 
-        # Update
-        for t in txns_db:
-            t.category = category
+        # **RECALCULATE VAT FOR ALL UPDATED TRANSACTIONS** on this session, committed with the update
+        vat_service.apply_vat_batch([t.id for t in original_state], session_id, force=False, db=db)
         db.commit()
-        
-        # **RECALCULATE VAT FOR ALL UPDATED TRANSACTIONS**
-        for t in txns_db:
-            vat_service.apply_vat_to_transaction(t.id, session_id, force=False)
-        
-        # Learn from this bulk categorization
-        try:
-            # Use the first transaction as representative for learning
-            if txns_db:
-                representative_txn = txns_db[0]
-                # Get merchant if it exists
-                merchant = None
-                tm = db.query(TransactionMerchant).filter(
-                    TransactionMerchant.transaction_id == representative_txn.id
-                ).first()
-                if tm:
-                    merchant = tm.merchant
-                
-                effective_user_id = str(current_user.id)
-                learned_rules = learning_service.learn_from_categorization(
-                    user_id=effective_user_id,
-                    session_id=session_id,
-                    description=representative_txn.description,
-                    category=category,
-                    merchant=merchant,
-                    keyword=None,  # No keyword for ID-based selection
-                    db=db
-                )
-                if learned_rules:
-                    print(f"Learned {len(learned_rules)} rules from bulk categorization by IDs")
-        except Exception as e:
-            print(f"Warning: Failed to learn from bulk categorization: {e}")
-            # Don't fail the whole operation for learning issues
+        invalidate_session_caches(session_id, db)
+        
+        # Learn from this bulk categorization after the response is sent; the
+        # first transaction is the representative
+        background_tasks.add_task(
+            run_in_new_session,
+            _learn_from_categorization,
+            user_id=str(current_user.id),
+            session_id=session_id,
+            transaction_id=original_state[0].id,
+            description=original_state[0].description,
+            category=category
+        )
 
         # Record undo action in bulk_categorizer
         try:
@@ -2862,16 +3335,19 @@ def bulk_categorize_by_ids(
                 category=category,
                 timestamp=datetime.utcnow().isoformat(),
                 matched_transactions=original_state,
-                transaction_ids=[t["id"] for t in original_state]
+                transaction_ids=[t.id for t in original_state]
             )
         except Exception:
             # non-fatal: undo will not be available
             pass
 
-        # Return updated list
-        updated_transactions_db = db.query(Transaction).filter(
-            Transaction.session_id == session_id
-        ).all()
+        # Return updated list, reloading the changed rows in one query
+        updated_transactions_db = db.query(Transaction).filter(Transaction.session_id == session_id)
+        if return_rows != "all":
+            updated_transactions_db = updated_transactions_db.filter(
+                _id_list_match(db, Transaction.id, [t.id for t in original_state])
+            )
+        updated_transactions_db = updated_transactions_db.all()
 
         updated_transactions = [
             {
@@ -2888,17 +3364,16 @@ def bulk_categorize_by_ids(
         ]
 
         return {
-            "updated_count": len(txns_db),
+            "updated_count": len(original_state),
             "transactions": updated_transactions,
-            "undo_available": bulk_categorizer.get_last_action_info() is not None,
-            "message": f"Updated {len(txns_db)} transaction(s)"
+            "undo_available": bulk_categorizer.last_action is not None,
+            "message": f"Updated {len(original_state)} transaction(s)"
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Bulk categorization by IDs failed")
         raise HTTPException(status_code=400, detail=f"Bulk by IDs failed: {str(e)}")
 
 
@@ -2907,6 +3382,7 @@ def update_transaction_category(
     transaction_id: int, 
     request: dict,
     session_id: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     learn_rule: bool = False,
     keyword: Optional[str] = None,
@@ -2929,9 +3405,7 @@ def update_transaction_category(
         ensure_session_access(session_id, current_user, db)
         
         # Prevent modifications if session is locked
-        ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-        if ss and ss.locked:
-            raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+        ensure_session_unlocked(session_id, db)
 
         category = request.get("category")
         new_description = request.get("description")  # Optional description update
@@ -2941,27 +3415,29 @@ def update_transaction_category(
             raise HTTPException(status_code=400, detail="Either category or description is required")
         
         # Find the transaction
-        transaction = db.query(Transaction).filter(
-            Transaction.id == transaction_id,
-            Transaction.session_id == session_id
-        ).first()
+        transaction = db.execute(
+            _transaction_in_session_stmt,
+            {"transaction_id": transaction_id, "session_id": session_id}
+        ).scalars().first()
         
         if not transaction:
             # Provide helpful diagnostic information for 404 errors
             
-            # Check if transaction exists in ANY session
-            txn_any_session = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+            # Check if transaction exists in ANY session (and which one), and if this
+            # session has ANY transactions, in a single round-trip
+            txn_any_session, txn_session_id, session_has_txns = db.query(
+                exists().where(Transaction.id == transaction_id),
+                select(Transaction.session_id).where(Transaction.id == transaction_id).scalar_subquery(),
+                exists().where(Transaction.session_id == session_id)
+            ).one()
             
-            # Check if session has ANY transactions
-            session_has_txns = db.query(Transaction).filter(Transaction.session_id == session_id).count()
-            
-            if txn_any_session and txn_any_session.session_id != session_id:
+            if txn_any_session and txn_session_id != session_id:
                 # Transaction exists but in a different session
                 detail = f"Transaction {transaction_id} exists in a different session. Session mismatch. Please refresh the page."
-            elif session_has_txns == 0 and txn_any_session:
+            elif not session_has_txns and txn_any_session:
                 # This session has no transactions, but other sessions do
                 detail = "This session has no transactions. The database may have been reset. Please upload a new statement."
-            elif session_has_txns == 0:
+            elif not session_has_txns:
                 # No transactions anywhere
                 detail = "No transactions found. Please upload a bank statement first."
             else:
@@ -2976,81 +3452,52 @@ def update_transaction_category(
         
         # Update description if provided (with warning - affects rules)
         if new_description is not None and new_description != transaction.description:
+            logger.debug(
+                "Description updated for transaction %s: %r -> %r",
+                transaction_id, transaction.description, new_description
+            )
             transaction.description = new_description
-            print(f"⚠️  Description updated for transaction {transaction_id}: '{transaction.description}' -> '{new_description}'")
-        
-        db.commit()
-        
-        # Invalidate cache for this session
-        cache = get_cache()
-        cache.invalidate_session(session_id)
         
         # **RECALCULATE VAT IF CATEGORY CHANGED**
-        # When category changes, VAT applicability may change
+        # When category changes, VAT applicability may change. VAT is set on this
+        # session so the category, keyword propagation and VAT commit together
         if category:
-            vat_service.apply_vat_to_transaction(transaction_id, session_id, force=False)
-        
-        # **LEARN FROM THIS CATEGORIZATION** (only if explicitly requested and category was provided)
-        # Create pattern-based rules so similar transactions are auto-categorized in future
-        if learn_rule and category:
-            try:
-                # Get merchant if it exists
-                merchant = None
-                tm = db.query(TransactionMerchant).filter(
-                    TransactionMerchant.transaction_id == transaction_id
-                ).first()
-                if tm:
-                    merchant = tm.merchant
-                
-                learned_rules = learning_service.learn_from_categorization(
-                    user_id=str(current_user.id),
-                    session_id=session_id,
-                    description=transaction.description,
-                    category=category,
-                    merchant=merchant,
-                    keyword=keyword,  # Pass keyword separately
-                    db=db
-                )
-                # Log how many rules were learned (optional)
-                if learned_rules:
-                    print(f"✓ Learned {len(learned_rules)} new categorization pattern(s) for user {str(current_user.id)}")
-                    if keyword:
-                        print(f"  Using keyword: '{keyword}' (contains pattern)")
-                
-                # **APPLY TO ALL MATCHING TRANSACTIONS IN CURRENT SESSION**
-                # Update all other transactions with the keyword in their description
-                if keyword and len(keyword.strip()) >= 3:
-                    keyword_upper = keyword.strip().upper()
-                    # Find all transactions in this session containing the keyword
-                    matching_transactions = db.query(Transaction).filter(
-                        Transaction.session_id == session_id,
-                        Transaction.id != transaction_id,  # Exclude the current one (already updated)
-                        Transaction.description.ilike(f"%{keyword_upper}%")
-                    ).all()
-                    
-                    updated_count = 0
-                    for txn in matching_transactions:
-                        txn.category = category
-                        updated_count += 1
-                    
-                    if updated_count > 0:
-                        db.commit()
-                        # Recalculate VAT for all matching transactions
-                        for txn in matching_transactions:
-                            vat_service.apply_vat_to_transaction(txn.id, session_id, force=False)
-                        print(f"  ✓ Also updated {updated_count} matching transaction(s) in current session")
-                
-            except Exception as learn_error:
-                # Don't fail the update if learning fails, just log it
-                print(f"Warning: Failed to learn from categorization: {learn_error}")
-        
-        # Refresh transaction to get updated VAT fields
-        transaction = db.query(Transaction).filter(
-            Transaction.id == transaction_id,
-            Transaction.session_id == session_id
-        ).first()
-        
-        return {
+            vat_service.apply_vat_batch([transaction_id], session_id, force=False, db=db)
+        
+        # **APPLY TO ALL MATCHING TRANSACTIONS IN CURRENT SESSION**
+        # Update all other transactions with the keyword in their description
+        if learn_rule and category and keyword and len(keyword.strip()) >= 3:
+            keyword_upper = keyword.strip().upper()
+            # All transactions in this session containing the keyword
+            propagate_scope = (
+                Transaction.session_id == session_id,
+                Transaction.id != transaction_id,  # Exclude the current one (already updated)
+                Transaction.description.ilike(f"%{keyword_upper}%")
+            )
+            if db.get_bind().dialect.full_returning:
+                # Update and collect the ids for the VAT pass in one statement
+                matching_ids = db.execute(
+                    update(Transaction)
+                    .where(*propagate_scope)
+                    .values(category=category)
+                    .returning(Transaction.id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+            else:
+                matching_ids = [txn_id for (txn_id,) in db.query(Transaction.id).filter(*propagate_scope)]
+                if matching_ids:
+                    db.query(Transaction).filter(
+                        Transaction.id.in_(matching_ids)
+                    ).update({"category": category}, synchronize_session=False)
+            
+            if matching_ids:
+                # Recalculate VAT for all matching transactions
+                vat_service.apply_vat_batch(matching_ids, session_id, force=False, db=db)
+                logger.debug("Also updated %d matching transaction(s) in session %s", len(matching_ids), session_id)
+        
+        # The recalculated VAT fields were set on this instance, so the response is
+        # built before the commit expires it instead of re-selecting the row afterwards
+        updated = {
             "id": transaction.id,
             "date": transaction.date.isoformat(),
             "description": transaction.description,
@@ -3060,6 +3507,28 @@ def update_transaction_category(
             "amount_excl_vat": transaction.amount_excl_vat,
             "amount_incl_vat": transaction.amount_incl_vat
         }
+        
+        db.commit()
+        
+        # Invalidate cache for this session and its client
+        invalidate_session_caches(session_id, db)
+        
+        # **LEARN FROM THIS CATEGORIZATION** (only if explicitly requested and category was provided)
+        # Create pattern-based rules so similar transactions are auto-categorized in future.
+        # Runs after the response is sent, so the merchant lookup and rule writes add no latency
+        if learn_rule and category:
+            background_tasks.add_task(
+                run_in_new_session,
+                _learn_from_categorization,
+                user_id=str(current_user.id),
+                session_id=session_id,
+                transaction_id=transaction_id,
+                description=updated["description"],
+                category=category,
+                keyword=keyword
+            )
+        
+        return updated
     
     except HTTPException:
         raise
@@ -3078,12 +3547,12 @@ def update_transaction_merchant(transaction_id: int, request: dict, session_id:
         if session_id:
             ensure_session_access(session_id, current_user, db)
         if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
 
         # ensure transaction exists
-        txn = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+        txn = db.execute(_transaction_by_id_stmt, {"transaction_id": transaction_id}).scalars().first()
         if not txn:
             raise HTTPException(status_code=404, detail="Transaction not found")
 
@@ -3094,26 +3563,20 @@ def update_transaction_merchant(transaction_id: int, request: dict, session_id:
 
         # Check if session is locked if session_id provided
         if session_id:
-            ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-            if ss and ss.locked:
-                raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+            ensure_session_unlocked(session_id, db)
 
         # If merchant is blank, treat as clearing the merchant assignment
         if str(merchant).strip() == "":
-            tm = db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == transaction_id).first()
-            if tm:
-                db.delete(tm)
-                db.commit()
+            db.query(TransactionMerchant).filter(
+                TransactionMerchant.transaction_id == transaction_id
+            ).delete(synchronize_session=False)
+            db.commit()
             return {"id": transaction_id, "merchant": None}
 
         # Otherwise create or update mapping
-        tm = db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == transaction_id).first()
-        if not tm:
-            tm = TransactionMerchant(transaction_id=transaction_id, session_id=txn.session_id, merchant=merchant)
-            db.add(tm)
-        else:
-            tm.merchant = merchant
-
+        _upsert_transaction_merchants(
+            db, [{"transaction_id": transaction_id, "session_id": txn.session_id, "merchant": merchant}]
+        )
         db.commit()
 
         return {"id": transaction_id, "merchant": merchant}
@@ -3134,7 +3597,7 @@ def apply_merchant_to_similar(transaction_id: int, request: dict, session_id: Op
         if session_id:
             ensure_session_access(session_id, current_user, db)
         if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
 
@@ -3145,12 +3608,10 @@ def apply_merchant_to_similar(transaction_id: int, request: dict, session_id: Op
 
         # Check if session is locked if session_id provided
         if session_id:
-            ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-            if ss and ss.locked:
-                raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+            ensure_session_unlocked(session_id, db)
 
         # Find all transactions with the same description within the same session/client scope
-        similar_query = db.query(Transaction).filter(
+        similar_query = db.query(Transaction.id, Transaction.session_id).filter(
             Transaction.description == source_txn.description,
             Transaction.id != transaction_id  # Exclude the source transaction
         )
@@ -3163,17 +3624,11 @@ def apply_merchant_to_similar(transaction_id: int, request: dict, session_id: Op
         if not similar_txns:
             return {"updated_count": 0, "message": "No similar transactions found"}
 
-        updated = 0
-        for t in similar_txns:
-            tm = db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == t.id).first()
-            if not tm:
-                tm = TransactionMerchant(transaction_id=t.id, session_id=t.session_id, merchant=merchant)
-                db.add(tm)
-                updated += 1
-            else:
-                if tm.merchant != merchant:
-                    tm.merchant = merchant
-                    updated += 1
+        # One upsert for all similar transactions; unchanged merchants are not counted
+        updated = _upsert_transaction_merchants(db, [
+            {"transaction_id": t.id, "session_id": t.session_id, "merchant": merchant}
+            for t in similar_txns
+        ])
 
         db.commit()
 
@@ -3194,32 +3649,32 @@ def clear_all_categories(request: Optional[ClearCategoriesRequest] = Body(None),
         if session_id:
             ensure_session_access(session_id, current_user, db)
         if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
 
         # Prevent modifications if session is locked
         if session_id:
-            ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-            if ss and ss.locked:
-                raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+            ensure_session_unlocked(session_id, db)
 
-        # Get all transactions for this session or client
+        # All transactions for this session or client
         if session_id:
-            transactions = db.query(Transaction).filter(Transaction.session_id == session_id).all()
+            scope = Transaction.session_id == session_id
         else:
-            transactions = db.query(Transaction).filter(Transaction.client_id == client_id).all()
-        
-        if not transactions:
+            scope = Transaction.client_id == client_id
+
+        # Clear categories in one UPDATE. An empty category carries no VAT, so the
+        # VAT fields are cleared with it rather than recalculated row by row
+        count = db.query(Transaction).filter(scope, Transaction.category != "").update({
+            "category": "",
+            "vat_amount": None,
+            "amount_excl_vat": None,
+            "amount_incl_vat": None
+        }, synchronize_session=False)
+
+        if not count and not db.query(exists().where(scope)).scalar():
             return {"success": True, "cleared_count": 0, "message": "No transactions to clear"}
 
-        # Clear categories for all transactions
-        count = 0
-        for txn in transactions:
-            if txn.category:
-                txn.category = ""
-                count += 1
-
         db.commit()
 
         return {"success": True, "cleared_count": count, "message": f"Cleared categories from {count} transaction(s)"}
@@ -3270,6 +3725,7 @@ def download_invoice_file(request: Request, invoice_id: int, session_id: str, cu
 @app.post("/invoice/upload_file")
 async def upload_invoice_file(
     request: Request,
+    background_tasks: BackgroundTasks,
     supplier_name: str = None,
     invoice_date: str = None,
     total_amount: float = None,
@@ -3310,11 +3766,11 @@ async def upload_invoice_file(
             if not filename.lower().endswith('.pdf'):
                 raise HTTPException(status_code=400, detail="Only PDF files are allowed for file upload")
             
-            # Upload to cloud storage
-            content = await file.read()
+            # Stream the spooled upload to cloud storage without reading it into memory
             file_key = generate_file_key(filename, prefix="invoices")
             storage = get_storage()
-            storage.upload_file(content, file_key, content_type="application/pdf")
+            await file.seek(0)
+            storage.upload_fileobj(file.file, file_key, content_type="application/pdf")
 
         inv = Invoice(
             session_id=session_id,
@@ -3328,9 +3784,12 @@ async def upload_invoice_file(
         db.add(inv)
         db.commit()
         
-        # Log file upload
+        # Log file upload after the response is sent
         if file_key:
-            log_file_access(db, current_user.id, file_key, "upload", request, inv.id)
+            background_tasks.add_task(
+                run_in_new_session, log_file_access,
+                user_id=current_user.id, file_key=file_key, action="upload", request=request, invoice_id=inv.id
+            )
         
         return {"success": True, "invoice_id": inv.id, "file_key": file_key}
     except HTTPException:
@@ -3342,6 +3801,7 @@ async def upload_invoice_file(
 @app.post("/invoice/upload_file_auto")
 async def upload_invoice_file_auto(
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     session_id: str = None,
     current_user: User = Depends(get_current_user),
@@ -3359,15 +3819,9 @@ async def upload_invoice_file_auto(
         if not filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-        content = await file.read()
-
-        # Upload to cloud storage
+        # Upload to cloud storage while extracting metadata
         file_key = generate_file_key(filename, prefix="invoices")
-        storage = get_storage()
-        storage.upload_file(content, file_key, content_type="application/pdf")
-
-        # Extract metadata
-        meta = extract_invoice_metadata(content)
+        meta = await store_and_extract_invoice(file, file_key)
         if not meta.get('supplier_name') and not meta.get('total_amount'):
             # minimal sanity check
             raise HTTPException(status_code=400, detail="Failed to extract key fields from invoice. Please provide metadata manually.")
@@ -3382,10 +3836,14 @@ async def upload_invoice_file_auto(
             file_reference=file_key
         )
         db.add(inv)
-        db.commit()
+        # Flush for inv.id; the invoice and its match are committed together below
+        db.flush()
         
-        # Log file upload
-        log_file_access(db, current_user.id, file_key, "upload", request, inv.id)
+        # Log file upload after the response is sent
+        background_tasks.add_task(
+            run_in_new_session, log_file_access,
+            user_id=current_user.id, file_key=file_key, action="upload", request=request, invoice_id=inv.id
+        )
 
         # Run matching against transactions in this session
         txns_db = db.query(Transaction).filter(Transaction.session_id == session_id).all()
@@ -3404,17 +3862,8 @@ async def upload_invoice_file_auto(
         m = matches[0] if matches else None
         # persist suggestion
         if m:
-            existing = db.query(InvoiceMatch).filter(InvoiceMatch.invoice_id == inv.id).first()
-            if existing:
-                existing.transaction_id = m.get('transaction_id')
-                existing.confidence = int(m.get('score') or 0)
-                existing.explanation = m.get('explanation')
-                existing.status = 'suggested'
-                existing.suggested_at = datetime.utcnow()
-            else:
-                im = InvoiceMatch(invoice_id=inv.id, transaction_id=m.get('transaction_id'), confidence=int(m.get('score') or 0), explanation=m.get('explanation'), status='suggested')
-                db.add(im)
-            db.commit()
+            _insert_invoice_match(db, invoice_id=inv.id, transaction_id=m.get('transaction_id'), confidence=int(m.get('score') or 0), explanation=m.get('explanation'), status='suggested')
+        db.commit()
 
         return {
             "success": True,
@@ -3431,6 +3880,7 @@ async def upload_invoice_file_auto(
 @app.post("/invoice/upload_file_direct")
 async def upload_invoice_file_direct(
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     session_id: str = None,
     transaction_id: int = None,
@@ -3459,15 +3909,9 @@ async def upload_invoice_file_direct(
         if not txn:
             raise HTTPException(status_code=404, detail="Transaction not found in this session")
 
-        content = await file.read()
-
-        # Upload to cloud storage
+        # Upload to cloud storage while extracting metadata
         file_key = generate_file_key(filename, prefix="invoices")
-        storage = get_storage()
-        storage.upload_file(content, file_key, content_type="application/pdf")
-
-        # Extract metadata
-        meta = extract_invoice_metadata(content)
+        meta = await store_and_extract_invoice(file, file_key)
         if not meta.get('supplier_name') and not meta.get('total_amount'):
             raise HTTPException(status_code=400, detail="Failed to extract key fields from invoice. Please provide metadata manually.")
 
@@ -3485,23 +3929,25 @@ async def upload_invoice_file_direct(
             file_reference=file_key
         )
         db.add(inv)
-        db.commit()
+        # Flush for inv.id; the invoice and its match are committed together below
+        db.flush()
         
-        # Log file upload
-        log_file_access(db, current_user.id, file_key, "upload", request, inv.id)
+        # Log file upload after the response is sent
+        background_tasks.add_task(
+            run_in_new_session, log_file_access,
+            user_id=current_user.id, file_key=file_key, action="upload", request=request, invoice_id=inv.id
+        )
 
         # Directly link to the transaction (confirmed match)
-        existing_match = db.query(InvoiceMatch).filter(InvoiceMatch.invoice_id == inv.id).first()
-        if not existing_match:
-            im = InvoiceMatch(
-                invoice_id=inv.id,
-                transaction_id=transaction_id,
-                confidence=100,  # Direct upload = 100% confidence
-                explanation="Directly uploaded for this transaction",
-                status='confirmed'
-            )
-            db.add(im)
-            db.commit()
+        _insert_invoice_match(
+            db,
+            invoice_id=inv.id,
+            transaction_id=transaction_id,
+            confidence=100,  # Direct upload = 100% confidence
+            explanation="Directly uploaded for this transaction",
+            status='confirmed'
+        )
+        db.commit()
 
         return {
             "success": True,
@@ -3531,9 +3977,7 @@ def bulk_set_merchant_by_ids(payload: dict = Body(...), session_id: str = Query(
         ensure_session_access(session_id, current_user, db)
 
         # Prevent modifications if session is locked
-        ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-        if ss and ss.locked:
-            raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+        ensure_session_unlocked(session_id, db)
 
         ids = payload.get("ids") or []
         merchant = payload.get("merchant")
@@ -3543,22 +3987,12 @@ def bulk_set_merchant_by_ids(payload: dict = Body(...), session_id: str = Query(
         if merchant is None or not str(merchant).strip():
             raise HTTPException(status_code=400, detail="merchant is required")
 
-        txns_db = db.query(Transaction).filter(Transaction.session_id == session_id, Transaction.id.in_(ids)).all()
-        if not txns_db:
+        updated = _set_merchant_for_ids(db, session_id, ids, merchant)
+        # Nothing changed: either every row already had this merchant or no id is in the session
+        if not updated and not db.query(
+            exists().where(Transaction.session_id == session_id, Transaction.id.in_(ids))
+        ).scalar():
             raise HTTPException(status_code=404, detail="No matching transactions found for these IDs")
-
-        updated = 0
-        for t in txns_db:
-            tm = db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == t.id).first()
-            if not tm:
-                tm = TransactionMerchant(transaction_id=t.id, session_id=session_id, merchant=merchant)
-                db.add(tm)
-                updated += 1
-            else:
-                if tm.merchant != merchant:
-                    tm.merchant = merchant
-                    updated += 1
-
         db.commit()
 
         return {"updated_count": updated, "message": f"Updated {updated} transaction(s) with merchant '{merchant}'"}
@@ -3575,9 +4009,7 @@ def bulk_set_merchant_by_keyword(request: dict = Body(...), session_id: str = Qu
         ensure_session_access(session_id, current_user, db)
 
         # Prevent modifications if session is locked
-        ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-        if ss and ss.locked:
-            raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+        ensure_session_unlocked(session_id, db)
 
         keyword = request.get("keyword")
         merchant = request.get("merchant")
@@ -3586,11 +4018,23 @@ def bulk_set_merchant_by_keyword(request: dict = Body(...), session_id: str = Qu
         if not merchant or not str(merchant).strip():
             raise HTTPException(status_code=400, detail="merchant is required")
 
-        # Load all transactions for session as dicts
-        txns_db = db.query(Transaction).filter(Transaction.session_id == session_id).all()
+        # Load candidate transactions as dicts (only the columns the matcher reads)
+        query = db.query(
+            Transaction.id, Transaction.description, Transaction.category, Transaction.date, Transaction.amount
+        ).filter(Transaction.session_id == session_id)
+        if only_unassigned:
+            query = query.filter(or_(Transaction.category.is_(None), Transaction.category.in_(("", "Other"))))
+        # Every match contains each word of the keyword, so narrow in SQL first and let
+        # BulkCategorizer make the final call. Non-ASCII keywords skip this because
+        # SQLite only case-folds ASCII.
+        keyword_words = (keyword or "").split()
+        if all(word.isascii() for word in keyword_words):
+            for word in keyword_words:
+                escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                query = query.filter(Transaction.description.ilike(f"%{escaped}%", escape="\\"))
         transactions = [
-            {"id": t.id, "description": t.description, "category": t.category, "date": t.date, "amount": t.amount}
-            for t in txns_db
+            {"id": tid, "description": description, "category": category, "date": date, "amount": amount}
+            for tid, description, category, date, amount in query
         ]
 
         from services.bulk_categorizer import BulkCategorizer
@@ -3600,18 +4044,7 @@ def bulk_set_merchant_by_keyword(request: dict = Body(...), session_id: str = Qu
         if not matching_ids:
             return {"updated_count": 0, "message": "No matching transactions"}
 
-        updated = 0
-        for tid in matching_ids:
-            tm = db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == tid).first()
-            if not tm:
-                tm = TransactionMerchant(transaction_id=tid, session_id=session_id, merchant=merchant)
-                db.add(tm)
-                updated += 1
-            else:
-                if not only_unassigned or not tm.merchant:
-                    if tm.merchant != merchant:
-                        tm.merchant = merchant
-                        updated += 1
+        updated = _set_merchant_for_ids(db, session_id, matching_ids, merchant, only_unassigned=only_unassigned)
 
         db.commit()
         return {"updated_count": updated, "message": f"Updated {updated} transaction(s) with merchant '{merchant}'"}
@@ -3638,12 +4071,16 @@ def upsert_merchant_rule(request: dict = Body(...), current_user: User = Depends
         keyword_norm = keyword.lower()
         existing_rule = None
 
-        # Look for an existing merchant rule that matches this keyword
-        rules = db.query(Rule).all()
-        for r in rules:
+        # Look for an existing merchant rule that matches this keyword. The stored JSON text
+        # is pre-filtered in SQL so only candidate rules are parsed; the keyword is only
+        # matched textually when it needs no escaping in JSON (older rows were written by
+        # json.dumps, which also escapes non-ASCII)
+        rules_query = db.query(Rule).filter(Rule.action.contains('"set_merchant"'))
+        if json.dumps(keyword_norm)[1:-1] == keyword_norm:
+            rules_query = rules_query.filter(func.lower(Rule.conditions).contains(keyword_norm, autoescape=True))
+        for r in rules_query:
             try:
-                conds = json.loads(r.conditions)
-                action = json.loads(r.action)
+                conds, action = _decode_rule_json(r)
             except Exception:
                 continue
 
@@ -3663,10 +4100,10 @@ def upsert_merchant_rule(request: dict = Body(...), current_user: User = Depends
                 break
 
         if existing_rule:
-            action = json.loads(existing_rule.action)
+            action = orjson.loads(existing_rule.action)
             action["type"] = "set_merchant"
             action["merchant"] = merchant
-            existing_rule.action = json.dumps(action)
+            existing_rule.action = _encode_rule_json(action)
             existing_rule.auto_apply = 1 if auto_apply else 0
             existing_rule.enabled = 1 if enabled else 0
             existing_rule.name = f"Merchant: {merchant} ({keyword})"
@@ -3685,8 +4122,8 @@ def upsert_merchant_rule(request: dict = Body(...), current_user: User = Depends
             name=f"Merchant: {merchant} ({keyword})",
             enabled=1 if enabled else 0,
             priority=int(request.get("priority", 100)),
-            conditions=json.dumps(conditions),
-            action=json.dumps(action),
+            conditions=_encode_rule_json(conditions),
+            action=_encode_rule_json(action),
             auto_apply=1 if auto_apply else 0
         )
         db.add(r)
@@ -3704,13 +4141,13 @@ def list_merchants(session_id: str, current_user: User = Depends(get_current_use
     try:
         ensure_session_access(session_id, current_user, db)
         # merchants saved explicitly
-        rows = db.query(TransactionMerchant).filter(TransactionMerchant.session_id == session_id).all()
-        merchants = {r.merchant for r in rows if r.merchant}
+        rows = db.query(TransactionMerchant.merchant).filter(TransactionMerchant.session_id == session_id).distinct()
+        merchants = {merchant for (merchant,) in rows if merchant}
 
-        # also extract heuristics from transactions to suggest candidates
-        txns = db.query(Transaction).filter(Transaction.session_id == session_id).all()
-        for t in txns:
-            m = extract_merchant(t.description)
+        # also extract heuristics from transactions to suggest candidates, once per distinct description
+        descriptions = db.query(Transaction.description).filter(Transaction.session_id == session_id).distinct()
+        for (description,) in descriptions:
+            m = extract_merchant(description)
             if m:
                 merchants.add(m)
 
@@ -3725,7 +4162,7 @@ def list_merchants(session_id: str, current_user: User = Depends(get_current_use
 
 @app.get("/summary")
 @cached(ttl=1800)  # Cache for 30 minutes
-async def get_summary(request: Request, session_id: Optional[str] = None, client_id: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_summary(request: Request, session_id: Optional[str] = None, client_id: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """
     Get monthly summary for a session or client
     
@@ -3737,7 +4174,7 @@ async def get_summary(request: Request, session_id: Optional[str] = None, client
     if session_id:
         ensure_session_access(session_id, current_user, db)
     if client_id is not None:
-        client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+        client = get_owned_client(client_id, current_user, db)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
 
@@ -3747,7 +4184,7 @@ async def get_summary(request: Request, session_id: Optional[str] = None, client
 
 @app.get("/category-summary")
 @cached(ttl=1800)  # Cache for 30 minutes
-async def get_category_totals(request: Request, session_id: Optional[str] = None, client_id: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_category_totals(request: Request, session_id: Optional[str] = None, client_id: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """
     Get total amounts by category for a session or client
     """
@@ -3757,7 +4194,7 @@ async def get_category_totals(request: Request, session_id: Optional[str] = None
     if session_id:
         ensure_session_access(session_id, current_user, db)
     if client_id is not None:
-        client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+        client = get_owned_client(client_id, current_user, db)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
 
@@ -3799,7 +4236,7 @@ def get_reconciliations(session_id: Optional[str] = None, client_id: Optional[in
     """Return list of reconciliations for session or client"""
     try:
         if client_id:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
             # Get reconciliations directly for this client
@@ -3837,7 +4274,7 @@ def set_reconciliation(request: ReconciliationRequest, session_id: Optional[str]
 
         # Query based on client_id or session_id
         if client_id:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
             rec = db.query(Reconciliation).filter(
@@ -3893,7 +4330,7 @@ def get_reconciliation_overview(session_id: Optional[str] = None, client_id: Opt
         else:  # client_id
             logger.info(f"[reconciliation/overview] Fetching overview for client_id={client_id}")
             # Check if client exists
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 logger.warning(f"[reconciliation/overview] Client not found: client_id={client_id}")
                 raise HTTPException(status_code=404, detail=f"Client {client_id} not found")
@@ -3970,7 +4407,7 @@ def session_status(session_id: str, current_user: User = Depends(get_current_use
 
 
 @app.get("/sessions")
-async def list_sessions(request: Request, client_id: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def list_sessions(request: Request, client_id: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Return a list of previous upload sessions with basic metadata.
 
     Query parameters:
@@ -3994,7 +4431,7 @@ async def list_sessions(request: Request, client_id: Optional[int] = None, curre
         
         # Filter by client_id if provided
         if client_id:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
             query = query.filter(Transaction.client_id == client_id)
@@ -4065,29 +4502,26 @@ def delete_session(session_id: str, current_user: User = Depends(get_current_use
     """
     try:
         ensure_session_access(session_id, current_user, db)
-        # Count what we're deleting
-        txn_count = db.query(Transaction).filter(Transaction.session_id == session_id).count()
-        inv_count = db.query(Invoice).filter(Invoice.session_id == session_id).count()
-        merchant_count = db.query(TransactionMerchant).filter(TransactionMerchant.session_id == session_id).count()
         
         # Get invoice IDs for this session to delete their matches
         invoice_ids = db.query(Invoice.id).filter(Invoice.session_id == session_id).all()
         invoice_ids = [inv_id[0] for inv_id in invoice_ids]
         
-        # Delete all associated data
-        db.query(Transaction).filter(Transaction.session_id == session_id).delete()
-        db.query(TransactionMerchant).filter(TransactionMerchant.session_id == session_id).delete()
+        # Delete all associated data; the deleted row counts come back from the DELETEs
+        txn_count = db.query(Transaction).filter(Transaction.session_id == session_id).delete()
+        merchant_count = db.query(TransactionMerchant).filter(TransactionMerchant.session_id == session_id).delete()
         
         # Delete invoice matches by invoice IDs
         if invoice_ids:
             db.query(InvoiceMatch).filter(InvoiceMatch.invoice_id.in_(invoice_ids)).delete()
         
-        db.query(Invoice).filter(Invoice.session_id == session_id).delete()
+        inv_count = db.query(Invoice).filter(Invoice.session_id == session_id).delete()
         db.query(Reconciliation).filter(Reconciliation.session_id == session_id).delete()
         db.query(OverallReconciliation).filter(OverallReconciliation.session_id == session_id).delete()
         db.query(SessionState).filter(SessionState.session_id == session_id).delete()
         
         db.commit()
+        ocr_region_store.delete(current_user.id, session_id)
         
         return {
             "success": True,
@@ -4130,33 +4564,27 @@ def bulk_delete_sessions(
         total_txns = 0
         total_invs = 0
         total_merchants = 0
-        deleted_count = 0
+        deleted_sessions = []
         
         for session_id in request.session_ids:
             # Verify user has access to this session
             ensure_session_access(session_id, current_user, db)
             
-            # Count what we're deleting
-            txn_count = db.query(Transaction).filter(Transaction.session_id == session_id).count()
-            inv_count = db.query(Invoice).filter(Invoice.session_id == session_id).count()
-            merchant_count = db.query(TransactionMerchant).filter(TransactionMerchant.session_id == session_id).count()
-            
-            if txn_count == 0 and inv_count == 0:
-                continue  # Skip if no data for this session
-            
             # Get invoice IDs for this session to delete their matches
             invoice_ids = db.query(Invoice.id).filter(Invoice.session_id == session_id).all()
             invoice_ids = [inv_id[0] for inv_id in invoice_ids]
             
-            # Delete all associated data
-            db.query(Transaction).filter(Transaction.session_id == session_id).delete()
-            db.query(TransactionMerchant).filter(TransactionMerchant.session_id == session_id).delete()
+            # Delete all associated data; the deleted row counts come back from the DELETEs
+            txn_count = db.query(Transaction).filter(Transaction.session_id == session_id).delete()
+            if txn_count == 0 and not invoice_ids:
+                continue  # Skip if no data for this session
+            merchant_count = db.query(TransactionMerchant).filter(TransactionMerchant.session_id == session_id).delete()
             
             # Delete invoice matches by invoice IDs
             if invoice_ids:
                 db.query(InvoiceMatch).filter(InvoiceMatch.invoice_id.in_(invoice_ids)).delete()
             
-            db.query(Invoice).filter(Invoice.session_id == session_id).delete()
+            inv_count = db.query(Invoice).filter(Invoice.session_id == session_id).delete()
             db.query(Reconciliation).filter(Reconciliation.session_id == session_id).delete()
             db.query(OverallReconciliation).filter(OverallReconciliation.session_id == session_id).delete()
             db.query(SessionState).filter(SessionState.session_id == session_id).delete()
@@ -4164,14 +4592,16 @@ def bulk_delete_sessions(
             total_txns += txn_count
             total_invs += inv_count
             total_merchants += merchant_count
-            deleted_count += 1
+            deleted_sessions.append(session_id)
         
         db.commit()
+        for session_id in deleted_sessions:
+            ocr_region_store.delete(current_user.id, session_id)
         
         return {
             "success": True,
-            "message": f"{deleted_count} session(s) deleted successfully",
-            "deleted_sessions": deleted_count,
+            "message": f"{len(deleted_sessions)} session(s) deleted successfully",
+            "deleted_sessions": len(deleted_sessions),
             "total_transactions": total_txns,
             "total_invoices": total_invs
         }
@@ -4190,7 +4620,7 @@ def list_rules(client_id: Optional[int] = None, current_user: User = Depends(get
     try:
         if client_id:
             # Verify client belongs to authenticated user
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
             rows = db.query(Rule).filter(Rule.client_id == client_id).order_by(Rule.priority.asc()).all()
@@ -4200,13 +4630,14 @@ def list_rules(client_id: Optional[int] = None, current_user: User = Depends(get
             rows = db.query(Rule).filter(Rule.client_id.in_(client_ids)).order_by(Rule.priority.asc()).all()
         out = []
         for r in rows:
+            conditions, action = _decode_rule_json(r)
             out.append({
                 "id": r.id,
                 "name": r.name,
                 "enabled": bool(r.enabled),
                 "priority": r.priority,
-                "conditions": json.loads(r.conditions),
-                "action": json.loads(r.action),
+                "conditions": conditions,
+                "action": action,
                 "auto_apply": bool(r.auto_apply)
             })
         return {"rules": out}
@@ -4228,7 +4659,7 @@ def create_rule(request: dict, client_id: Optional[int] = None, current_user: Us
 
         # Verify client ownership if client_id provided
         if client_id is not None:
-            client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=404, detail="Client not found")
 
@@ -4237,8 +4668,8 @@ def create_rule(request: dict, client_id: Optional[int] = None, current_user: Us
             name=name,
             enabled=1 if request.get("enabled", True) else 0,
             priority=int(request.get("priority", 100)),
-            conditions=json.dumps(conditions),
-            action=json.dumps(action),
+            conditions=_encode_rule_json(conditions),
+            action=_encode_rule_json(action),
             auto_apply=1 if request.get("auto_apply", False) else 0
         )
         db.add(r)
@@ -4253,13 +4684,13 @@ def create_rule(request: dict, client_id: Optional[int] = None, current_user: Us
 @app.put("/rules/{rule_id}")
 def update_rule(rule_id: int, request: dict, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        r = db.query(Rule).filter(Rule.id == rule_id).first()
+        r = db.get(Rule, rule_id)
         if not r:
             raise HTTPException(status_code=404, detail="Rule not found")
 
         # Verify rule belongs to user's client
         if r.client_id:
-            client = db.query(Client).filter(Client.id == r.client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(r.client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=403, detail="Access denied")
 
@@ -4270,9 +4701,9 @@ def update_rule(rule_id: int, request: dict, current_user: User = Depends(get_cu
         if "priority" in request:
             r.priority = int(request.get("priority"))
         if "conditions" in request:
-            r.conditions = json.dumps(request.get("conditions"))
+            r.conditions = _encode_rule_json(request.get("conditions"))
         if "action" in request:
-            r.action = json.dumps(request.get("action"))
+            r.action = _encode_rule_json(request.get("action"))
         if "auto_apply" in request:
             r.auto_apply = 1 if request.get("auto_apply") else 0
         db.commit()
@@ -4286,13 +4717,13 @@ def update_rule(rule_id: int, request: dict, current_user: User = Depends(get_cu
 @app.delete("/rules/{rule_id}")
 def delete_rule(rule_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        r = db.query(Rule).filter(Rule.id == rule_id).first()
+        r = db.get(Rule, rule_id)
         if not r:
             raise HTTPException(status_code=404, detail="Rule not found")
 
         # Verify rule belongs to user's client
         if r.client_id:
-            client = db.query(Client).filter(Client.id == r.client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(r.client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=403, detail="Access denied")
 
@@ -4305,38 +4736,6 @@ def delete_rule(rule_id: int, current_user: User = Depends(get_current_user), db
         raise HTTPException(status_code=400, detail=str(e))
 
 
-def _txn_matches_conditions(txn: dict, conds: dict) -> bool:
-    match_type = conds.get('match_type', 'all')
-    clauses = conds.get('conditions', [])
-
-    def eval_clause(cl):
-        f = cl.get('field')
-        op = cl.get('op')
-        val = cl.get('value')
-        v = txn.get(f)
-        if v is None:
-            return False
-        try:
-            if op == 'contains':
-                return str(val).lower() in str(v).lower()
-            if op == 'equals':
-                return str(v).lower() == str(val).lower()
-            if op == 'regex':
-                return re.search(val, str(v)) is not None
-            if op == 'gt':
-                return float(v) > float(val)
-            if op == 'lt':
-                return float(v) < float(val)
-        except Exception:
-            return False
-        return False
-
-    results = [eval_clause(c) for c in clauses]
-    if match_type == 'any':
-        return any(results)
-    return all(results)
-
-
 @app.post("/rules/{rule_id}/preview")
 def preview_rule(rule_id: int, payload: dict, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Preview a rule against a session: body { session_id: '...' }"""
@@ -4347,22 +4746,22 @@ def preview_rule(rule_id: int, payload: dict, current_user: User = Depends(get_c
 
         ensure_session_access(sid, current_user, db)
 
-        r = db.query(Rule).filter(Rule.id == rule_id).first()
+        r = db.get(Rule, rule_id)
         if not r:
             raise HTTPException(status_code=404, detail="Rule not found")
 
         # Verify rule belongs to user's client
         if r.client_id:
-            client = db.query(Client).filter(Client.id == r.client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(r.client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=403, detail="Access denied")
 
-        conds = json.loads(r.conditions)
+        rule_matches = _compile_conditions(_decode_rule_json(r)[0])
         txns_db = db.query(Transaction).filter(Transaction.session_id == sid).all()
         matches = []
         for t in txns_db:
-            td = {"id": t.id, "description": t.description, "amount": t.amount, "date": t.date, "category": t.category}
-            if _txn_matches_conditions(td, conds):
+            td = _rule_txn_view(t.description, t.amount, t.date, t.category, id=t.id)
+            if rule_matches(td):
                 matches.append({"id": t.id, "description": t.description, "amount": t.amount, "category": t.category})
         return {"matches": matches, "count": len(matches)}
     except HTTPException:
@@ -4382,31 +4781,29 @@ def apply_rule(rule_id: int, payload: dict, session_id: str = None, current_user
         ensure_session_access(sid, current_user, db)
 
         # Prevent modifications if session is locked
-        ss = db.query(SessionState).filter(SessionState.session_id == sid).first()
-        if ss and ss.locked:
-            raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
+        ensure_session_unlocked(sid, db)
 
-        r = db.query(Rule).filter(Rule.id == rule_id).first()
+        r = db.get(Rule, rule_id)
         if not r:
             raise HTTPException(status_code=404, detail="Rule not found")
 
         # Verify rule belongs to user's client
         if r.client_id:
-            client = db.query(Client).filter(Client.id == r.client_id, Client.user_id == current_user.id).first()
+            client = get_owned_client(r.client_id, current_user, db)
             if not client:
                 raise HTTPException(status_code=403, detail="Access denied")
 
-        conds = json.loads(r.conditions)
-        action = json.loads(r.action)
+        conditions, action = _decode_rule_json(r)
+        rule_matches = _compile_conditions(conditions)
 
         txns_db = db.query(Transaction).filter(Transaction.session_id == sid).all()
         matched = []
         original_state = []
         for t in txns_db:
-            td = {"id": t.id, "description": t.description, "amount": t.amount, "date": t.date, "category": t.category}
-            if _txn_matches_conditions(td, conds):
+            td = _rule_txn_view(t.description, t.amount, t.date, t.category, id=t.id)
+            if rule_matches(td):
                 matched.append(t.id)
-                original_state.append({"id": t.id, "category": t.category, "description": t.description})
+                original_state.append(UndoRow(t.id, t.category, t.description))
 
         if not matched:
             return {"updated_count": 0, "message": "No matching transactions"}
@@ -4431,23 +4828,17 @@ def apply_rule(rule_id: int, payload: dict, session_id: str = None, current_user
                     category=newcat,
                     timestamp=datetime.utcnow().isoformat(),
                     matched_transactions=original_state,
-                    transaction_ids=[t['id'] for t in original_state]
+                    transaction_ids=[t.id for t in original_state]
                 )
             except Exception:
                 pass
 
         elif action.get('type') == 'set_merchant' and action.get('merchant'):
             newm = action.get('merchant')
-            for tid in matched:
-                tm = db.query(TransactionMerchant).filter(TransactionMerchant.transaction_id == tid).first()
-                if not tm:
-                    tm = TransactionMerchant(transaction_id=tid, session_id=sid, merchant=newm)
-                    db.add(tm)
-                    updated_count += 1
-                else:
-                    if tm.merchant != newm:
-                        tm.merchant = newm
-                        updated_count += 1
+            updated_count = _upsert_transaction_merchants(db, [
+                {"transaction_id": tid, "session_id": sid, "merchant": newm}
+                for tid in matched
+            ])
             db.commit()
 
         # return updated transactions list
@@ -4457,7 +4848,7 @@ def apply_rule(rule_id: int, payload: dict, session_id: str = None, current_user
             for t in updated_txns_db
         ]
 
-        return {"updated_count": updated_count, "transactions": updated_transactions, "undo_available": bulk_categorizer.get_last_action_info() is not None, "message": f"Updated {updated_count} transaction(s)"}
+        return {"updated_count": updated_count, "transactions": updated_transactions, "undo_available": bulk_categorizer.last_action is not None, "message": f"Updated {updated_count} transaction(s)"}
     except HTTPException:
         raise
     except Exception as e:
@@ -4733,23 +5124,19 @@ def bulk_categorize(
         ensure_session_access(session_id, current_user, db)
 
         # Prevent modifications if session is locked
-        ss = db.query(SessionState).filter(SessionState.session_id == session_id).first()
-        if ss and ss.locked:
-            raise HTTPException(status_code=403, detail="Session is locked and cannot be modified")
-
-        print(f"\n=== BULK CATEGORIZE REQUEST ===")
-        print(f"Session ID: {session_id}")
-        print(f"User ID: {current_user.id}")
-        print(f"Keyword: {request.keyword}")
-        print(f"Category: {request.category}")
-        print(f"Only uncategorised: {request.only_uncategorised}")
+        ensure_session_unlocked(session_id, db)
+
+        logger.debug(
+            "Bulk categorize request: session=%s user=%s keyword=%r category=%r only_uncategorised=%s",
+            session_id, current_user.id, request.keyword, request.category, request.only_uncategorised
+        )
         
         # Get all transactions for this session
         transactions_db = db.query(Transaction).filter(
             Transaction.session_id == session_id
         ).all()
         
-        print(f"Total transactions found: {len(transactions_db)}")
+        logger.debug("Total transactions found: %d", len(transactions_db))
         
         if not transactions_db:
             raise HTTPException(status_code=404, detail="No transactions found for this session")
@@ -4774,29 +5161,25 @@ def bulk_categorize(
             request.only_uncategorised
         )
         
-        print(f"Updated count from categorizer: {updated_count}")
-        print(f"Error msg: {error_msg}")
+        logger.debug("Updated count from categorizer: %d (error: %r)", updated_count, error_msg)
         
         if error_msg:
             raise HTTPException(status_code=400, detail=error_msg)
         
         # Update database with new categories
         if updated_count > 0:
-            print(f"Updating {updated_count} transactions in database")
+            logger.debug("Updating %d transactions in database", updated_count)
             updated_txn_ids = []
             for txn_dict in updated_txns:
-                print(f"  - ID: {txn_dict['id']}, Category: {txn_dict['category']}")
                 db.query(Transaction).filter(
                     Transaction.id == txn_dict["id"]
                 ).update({"category": txn_dict["category"]})
                 updated_txn_ids.append(txn_dict["id"])
             db.commit()
-            print("Database commit successful")
             
             # **RECALCULATE VAT FOR ALL UPDATED TRANSACTIONS**
-            print(f"Recalculating VAT for {len(updated_txn_ids)} transactions")
-            for txn_id in updated_txn_ids:
-                vat_service.apply_vat_to_transaction(txn_id, session_id, force=False)
+            if updated_txn_ids:
+                vat_service.apply_vat_batch(updated_txn_ids, session_id, force=False)
             
             # Learn from this bulk categorization
             try:
@@ -4824,12 +5207,12 @@ def bulk_categorize(
                             db=db
                         )
                         if learned_rules:
-                            print(f"Learned {len(learned_rules)} rules from bulk categorization")
-            except Exception as e:
-                print(f"Warning: Failed to learn from bulk categorization: {e}")
+                            logger.debug("Learned %d rules from bulk categorization", len(learned_rules))
+            except Exception:
+                logger.warning("Failed to learn from bulk categorization", exc_info=True)
                 # Don't fail the whole operation for learning issues
         else:
-            print("No transactions to update")
+            logger.debug("No transactions to update")
         
         # Get updated list
         updated_transactions_db = db.query(Transaction).filter(
@@ -4850,24 +5233,21 @@ def bulk_categorize(
             for t in updated_transactions_db
         ]
         
-        # Invalidate cache for this session (bulk update affects all caches)
+        # Invalidate cache for this session and its client (bulk update affects all caches)
         if updated_count > 0:
-            cache = get_cache()
-            cache.invalidate_session(session_id)
+            invalidate_session_caches(session_id, db)
         
         return {
             "updated_count": updated_count,
             "transactions": updated_transactions,
-            "undo_available": bulk_categorizer.get_last_action_info() is not None,
+            "undo_available": bulk_categorizer.last_action is not None,
             "message": f"Updated {updated_count} transaction(s)" if updated_count > 0 else "No matching transactions"
         }
     
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f"Bulk categorization error: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Bulk categorization failed")
         raise HTTPException(status_code=400, detail=f"Bulk categorization failed: {str(e)}")
 
 
@@ -4940,15 +5320,13 @@ def undo_bulk_categorize(session_id: str, current_user: User = Depends(get_curre
             "success": success,
             "message": message,
             "transactions": updated_transactions,
-            "undo_available": bulk_categorizer.get_last_action_info() is not None
+            "undo_available": bulk_categorizer.last_action is not None
         }
     
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f"Undo error: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Undo of bulk categorization failed")
         raise HTTPException(status_code=400, detail=f"Undo failed: {str(e)}")
 
 
@@ -5015,7 +5393,7 @@ async def upload_pdf_async(
 
 
 @app.post("/bulk_categorize_async", tags=["Background Jobs"])
-async def bulk_categorize_async_endpoint(
+def bulk_categorize_async_endpoint(
     request: Request,
     session_id: str,
     db: Session = Depends(get_db),
@@ -5070,7 +5448,7 @@ async def bulk_categorize_async_endpoint(
 
 
 @app.post("/reports/generate_async", tags=["Background Jobs"])
-async def generate_report_async_endpoint(
+def generate_report_async_endpoint(
     request: Request,
     session_id: str,
     db: Session = Depends(get_db),
@@ -5127,7 +5505,7 @@ async def generate_report_async_endpoint(
 
 
 @app.get("/tasks/{task_id}/status", tags=["Background Jobs"])
-async def get_task_status(
+def get_task_status(
     task_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -5157,7 +5535,7 @@ async def get_task_status(
 
 
 @app.get("/tasks/{task_id}/result", tags=["Background Jobs"])
-async def get_task_result(
+def get_task_result(
     task_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -5193,7 +5571,7 @@ async def get_task_result(
 
 
 @app.delete("/tasks/{task_id}", tags=["Background Jobs"])
-async def cancel_task(
+def cancel_task(
     task_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -5273,7 +5651,7 @@ async def flush_cache(current_user: User = Depends(get_current_user)):
 
 
 @app.delete("/cache/session/{session_id}", tags=["Cache"])
-async def invalidate_session_cache(
+def invalidate_session_cache(
     session_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -6,7 +6,8 @@ Adds unique request IDs for tracing and logging
 import uuid
 import time
 import logging
-from typing import Callable
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
 
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -14,6 +15,19 @@ from starlette.types import ASGIApp
 
 logger = logging.getLogger(__name__)
 
+# Per-request memo of (session_id, user_id) pairs that already passed
+# ensure_session_access. RequestTrackingMiddleware binds a fresh dict for every
+# request; the default None disables caching outside a request (e.g. Celery).
+session_access_cache: ContextVar[Optional[Dict[Tuple[str, int], bool]]] = ContextVar(
+    "session_access_cache", default=None
+)
+
+# Per-request memo of SessionState.locked by session_id, read by
+# ensure_session_unlocked. Bound and reset alongside session_access_cache.
+session_lock_cache: ContextVar[Optional[Dict[str, bool]]] = ContextVar(
+    "session_lock_cache", default=None
+)
+
 
 class RequestTrackingMiddleware(BaseHTTPMiddleware):
     """
@@ -31,6 +45,10 @@ class RequestTrackingMiddleware(BaseHTTPMiddleware):
         # Extract user ID if available (set by auth dependency)
         request.state.user_id = None
         
+        # Start this request with an empty session-access cache
+        cache_token = session_access_cache.set({})
+        lock_cache_token = session_lock_cache.set({})
+        
         # Track request start time
         start_time = time.time()
         
@@ -69,3 +87,6 @@ class RequestTrackingMiddleware(BaseHTTPMiddleware):
                 f"Duration: {duration_ms:.2f}ms"
             )
             raise
+        finally:
+            session_access_cache.reset(cache_token)
+            session_lock_cache.reset(lock_cache_token)
@@ -3,7 +3,7 @@ Database models for Bank Statement Analyzer
 Handles storage of transactions and session data
 """
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, create_engine, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, create_engine, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -75,6 +75,19 @@ class Transaction(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Category filters/group-bys are always scoped to a session
+        Index("ix_transactions_session_id_category", "session_id", "category"),
+        # Per-client MAX(date) lookups (client list) can be served from the index
+        Index("ix_transactions_client_id_date", "client_id", "date"),
+        # Per-session MIN/MAX(date) for the statements list
+        Index("ix_transactions_session_id_date", "session_id", "date"),
+        # Bulk edits by id list are always scoped to a session
+        Index("ix_transactions_session_id_id", "session_id", "id"),
+        # Client-wide category filters (transactions list, summaries)
+        Index("ix_transactions_client_id_category", "client_id", "category"),
+    )
+
 
 class Reconciliation(Base):
     """
@@ -112,9 +125,13 @@ class TransactionMerchant(Base):
     to avoid altering the original schema in-place on existing deployments.
     """
     __tablename__ = "transaction_merchants"
+    __table_args__ = (
+        # The session's merchant list (SELECT DISTINCT merchant) is read from the index alone
+        Index("ix_transaction_merchants_session_id_merchant", "session_id", "merchant"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    transaction_id = Column(Integer, index=True)
+    transaction_id = Column(Integer, index=True, unique=True)  # One merchant per transaction (upserted)
     session_id = Column(String, index=True)
     merchant = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -149,6 +166,7 @@ class Rule(Base):
     action = Column(String, nullable=False)      # JSON string
     auto_apply = Column(Integer, default=0)      # 1 = auto-apply on upload
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class Invoice(Base):
@@ -178,11 +196,11 @@ class InvoiceMatch(Base):
     __tablename__ = "invoice_matches"
 
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, index=True)
+    invoice_id = Column(Integer, index=True, unique=True)
     transaction_id = Column(Integer, index=True)
     confidence = Column(Integer, nullable=False)
     explanation = Column(String, nullable=True)
-    status = Column(String, default='suggested')
+    status = Column(String, default='suggested', index=True)
     suggested_at = Column(DateTime, default=datetime.utcnow)
     confirmed_at = Column(DateTime, nullable=True)
 
@@ -311,7 +329,9 @@ elif is_postgresql:
     engine_config["pool_timeout"] = 30  # Seconds to wait for connection
     engine_config["pool_pre_ping"] = True  # Verify connections before using
     engine_config["pool_recycle"] = 3600  # Recycle connections after 1 hour
-    
+    # Batch executemany INSERT/UPDATE into multi-row statements (psycopg2 fast execution helpers)
+    engine_config["executemany_mode"] = "values_plus_batch"
+
     # Connection arguments for PostgreSQL
     connect_args = {
         "options": "-c statement_timeout=30000"  # 30 second query timeout
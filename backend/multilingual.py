@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import re
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
 
@@ -110,6 +111,35 @@ def normalize_headers(headers: List[str]) -> Dict[str, int]:
     return result
 
 
+@lru_cache(maxsize=1024)
+def compile_keyword_pattern(keywords: Tuple[str, ...], strict_boundaries: bool = True) -> Optional["re.Pattern[str]"]:
+    """Compile keywords into a single case-insensitive alternation pattern.
+
+    The pattern matches a text when *any* of the keywords would match it via
+    `_word_match` with the same `strict_boundaries` setting, so callers can scan
+    a description once per rule instead of once per keyword. Returns None when
+    no usable (non-blank) keywords are given. Results are cached, so passing the
+    same tuple of keywords repeatedly is cheap.
+    """
+    escaped = [re.escape(kw.strip()) for kw in keywords if kw and kw.strip()]
+    if not escaped:
+        return None
+    alternation = "(?:" + "|".join(escaped) + ")"
+
+    if strict_boundaries:
+        # Strict: keyword must be a separate word (original behavior)
+        # \w includes alphanumeric and underscore
+        pattern = r"(?<!\w)" + alternation + r"(?!\w)"
+    else:
+        # Loose: keyword can be part of a compound word (CamelCase)
+        # Match when:
+        # 1. Keyword is at word boundary OR preceded by lowercase (compound word start), OR
+        # 2. Keyword is followed by capital letter (case transition) OR non-alphanumeric OR end of string
+        # This catches patterns like: NaVATFeb, RenteOpDTBal, SARSOnline
+        pattern = r"(?:(?<!\w)|(?<=[a-z]))" + alternation + r"(?=(?:[A-Z]|\W|$))"
+    return re.compile(pattern, flags=re.IGNORECASE)
+
+
 def _word_match(keyword: str, text: str, strict_boundaries: bool = True) -> bool:
     """Match keyword in text with optional strict word boundaries.
     
@@ -123,23 +153,10 @@ def _word_match(keyword: str, text: str, strict_boundaries: bool = True) -> bool
         - strict_boundaries=True: 'vat' matches 'VAT Payment' but not 'NaVATFeb'
         - strict_boundaries=False: 'vat' matches 'VAT Payment' and 'NaVATFeb'
     """
-    kw = keyword.strip()
-    if not kw:
+    rx = compile_keyword_pattern((keyword,), strict_boundaries)
+    if rx is None:
         return False
-    
-    if strict_boundaries:
-        # Strict: keyword must be a separate word (original behavior)
-        # \w includes alphanumeric and underscore
-        pattern = r"(?<!\w)" + re.escape(kw) + r"(?!\w)"
-        return re.search(pattern, text, flags=re.IGNORECASE) is not None
-    else:
-        # Loose: keyword can be part of a compound word (CamelCase)
-        # Match when:
-        # 1. Keyword is at word boundary OR preceded by lowercase (compound word start), OR
-        # 2. Keyword is followed by capital letter (case transition) OR non-alphanumeric OR end of string
-        # This catches patterns like: NaVATFeb, RenteOpDTBal, SARSOnline
-        pattern = r"(?:(?<!\w)|(?<=[a-z]))" + re.escape(kw) + r"(?=(?:[A-Z]|\W|$))"
-        return re.search(pattern, text, flags=re.IGNORECASE) is not None
+    return rx.search(text) is not None
 
 
 def match_keyword_in_text(keyword: str, text: str, strict_boundaries: bool = True) -> bool:
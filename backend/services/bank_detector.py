@@ -8,6 +8,15 @@ import re
 from enum import Enum
 
 
+# Patterns used by the scorers, compiled once at import rather than per call
+_SB_HEADER_ORDER_RE = re.compile(r"\bdebit\b.*\bcredit\b.*\bdate\b.*\bbalance\b")
+_ABSA_DATE_HEADER_RE = re.compile(r"trans(action)?\s*date|transaction\s*date")
+_YYYYMMDD_RE = re.compile(r"^\d{8}$")
+_ABSA_YYYYMMDD_RE = re.compile(r"^202[0-9]{5}$")  # 2025xxxx format
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_SLASH_DATE_RE = re.compile(r"^\d{4}/\d{2}/\d{2}$")
+
+
 class BankType(Enum):
     """Supported bank types"""
     STANDARD_BANK = "standard_bank"
@@ -62,11 +71,18 @@ class BankDetector:
         headers_lower = [h.lower() for h in csv_headers]
         headers_str = " ".join(headers_lower)
 
+        # Only the first 3 sample rows are ever inspected; stringify them once
+        # here instead of once per scorer
+        sample_cells = [
+            [str(cell).strip() for cell in row]
+            for row in (sample_rows or [])[:3]
+        ]
+
         scores = {
-            BankType.STANDARD_BANK: BankDetector._score_standard_bank(headers_str, csv_headers, sample_rows),
-            BankType.ABSA: BankDetector._score_absa(headers_str, csv_headers, sample_rows),
-            BankType.CAPITEC: BankDetector._score_capitec(headers_str, csv_headers, sample_rows),
-            BankType.FNB: BankDetector._score_fnb(headers_str, csv_headers, sample_rows),
+            BankType.STANDARD_BANK: BankDetector._score_standard_bank(headers_str, csv_headers, sample_cells),
+            BankType.ABSA: BankDetector._score_absa(headers_str, csv_headers, sample_cells),
+            BankType.CAPITEC: BankDetector._score_capitec(headers_str, csv_headers, sample_cells),
+            BankType.FNB: BankDetector._score_fnb(headers_str, csv_headers, sample_cells, sample_rows),
         }
 
         best_bank = max(scores, key=scores.get)
@@ -79,7 +95,7 @@ class BankDetector:
         return best_bank, confidence
 
     @staticmethod
-    def _score_standard_bank(headers_str: str, headers: List[str], sample_rows: List[List[str]]) -> float:
+    def _score_standard_bank(headers_str: str, headers: List[str], sample_cells: List[List[str]]) -> float:
         """Score likelihood of Standard Bank format"""
         score = 0.0
         max_score = 0.0
@@ -89,16 +105,16 @@ class BankDetector:
             score += 0.3
         if "service fee" in headers_str:
             score += 0.2
-        if re.search(r"\bdebit\b.*\bcredit\b.*\bdate\b.*\bbalance\b", headers_str):
+        if _SB_HEADER_ORDER_RE.search(headers_str):
             score += 0.3
 
         max_score += 0.8
 
         # Check for date format YYYYMMDD in samples
-        if sample_rows:
-            for row in sample_rows[:3]:
+        if sample_cells:
+            for row in sample_cells:
                 for cell in row:
-                    if re.match(r"^\d{8}$", str(cell).strip()):
+                    if _YYYYMMDD_RE.match(cell):
                         score += 0.2
                         break
                 if score > 0.9:
@@ -109,30 +125,29 @@ class BankDetector:
         return min(score, 1.0) / max(max_score, 1.0)
 
     @staticmethod
-    def _score_absa(headers_str: str, headers: List[str], sample_rows: List[List[str]]) -> float:
+    def _score_absa(headers_str: str, headers: List[str], sample_cells: List[List[str]]) -> float:
         """Score likelihood of ABSA format"""
         score = 0.0
         max_score = 0.0
 
         # Check for ABSA-specific headers
-        if re.search(r"trans(action)?\s*date|transaction\s*date", headers_str):
+        if _ABSA_DATE_HEADER_RE.search(headers_str):
             score += 0.3
         if "debit" in headers_str and "credit" in headers_str:
             score += 0.2
-        if re.search(r"description", headers_str):
+        if "description" in headers_str:
             score += 0.1
 
         max_score += 0.6
 
         # Check for DD/MM/YYYY date format (ABSA's OCR extraction produces YYYYMMDD format)
-        if sample_rows:
-            for row in sample_rows[:3]:
-                for cell in row:
-                    cell_str = str(cell).strip()
+        if sample_cells:
+            for row in sample_cells:
+                for cell_str in row:
                     # ABSA: Look for dates that DON'T match Standard Bank patterns
                     # Standard Bank dates are 8-digit YYYYMMDD
                     # ABSA OCR gives YYYYMMDD but with only month/day pattern 20250601
-                    if re.match(r"^202[0-9]{5}$", cell_str):  # 2025xxxx format
+                    if _ABSA_YYYYMMDD_RE.match(cell_str):
                         score += 0.4
                         break
                 if score >= 0.7:
@@ -143,7 +158,7 @@ class BankDetector:
         return min(score, 1.0) / max(max_score, 1.0)
 
     @staticmethod
-    def _score_capitec(headers_str: str, headers: List[str], sample_rows: List[List[str]]) -> float:
+    def _score_capitec(headers_str: str, headers: List[str], sample_cells: List[List[str]]) -> float:
         """Score likelihood of Capitec format"""
         score = 0.0
 
@@ -162,10 +177,10 @@ class BankDetector:
             score += 0.1
 
         # Check for YYYY-MM-DD date format
-        if sample_rows:
-            for row in sample_rows[:3]:
+        if sample_cells:
+            for row in sample_cells:
                 for cell in row:
-                    if re.match(r"^\d{4}-\d{2}-\d{2}", str(cell).strip()):
+                    if _ISO_DATE_RE.match(cell):
                         score += 0.2
                         break
                 if score > 0.7:
@@ -174,7 +189,8 @@ class BankDetector:
         return min(score, 1.0)
 
     @staticmethod
-    def _score_fnb(headers_str: str, headers: List[str], sample_rows: List[List[str]]) -> float:
+    def _score_fnb(headers_str: str, headers: List[str], sample_cells: List[List[str]],
+                   sample_rows: List[List[str]] = None) -> float:
         """Score likelihood of FNB format"""
         score = 0.0
         max_score = 0.0
@@ -188,10 +204,10 @@ class BankDetector:
         max_score += 0.6
 
         # Date format: YYYY/MM/DD
-        if sample_rows:
-            for row in sample_rows[:3]:
+        if sample_cells:
+            for row in sample_cells:
                 for cell in row:
-                    if re.match(r"^\d{4}/\d{2}/\d{2}$", str(cell).strip()):
+                    if _SLASH_DATE_RE.match(cell):
                         score += 0.3
                         break
                 if score >= 0.8:
@@ -214,11 +230,13 @@ class BankDetector:
     @staticmethod
     def get_bank_name(bank_type: BankType) -> str:
         """Get human-readable bank name"""
-        mapping = {
-            BankType.STANDARD_BANK: "Standard Bank",
-            BankType.ABSA: "ABSA Bank",
-            BankType.CAPITEC: "Capitec Bank",
-            BankType.FNB: "FNB (First National Bank)",
-            BankType.UNKNOWN: "Unknown/Generic",
-        }
-        return mapping.get(bank_type, "Unknown")
+        return _BANK_NAMES.get(bank_type, "Unknown")
+
+
+_BANK_NAMES = {
+    BankType.STANDARD_BANK: "Standard Bank",
+    BankType.ABSA: "ABSA Bank",
+    BankType.CAPITEC: "Capitec Bank",
+    BankType.FNB: "FNB (First National Bank)",
+    BankType.UNKNOWN: "Unknown/Generic",
+}
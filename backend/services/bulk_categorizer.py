@@ -3,7 +3,7 @@ Bulk Transaction Categorization Service
 Handles safe, reversible bulk category updates with undo capability
 """
 
-from typing import List, Dict, Tuple, Optional, Any
+from typing import List, Dict, Tuple, Optional, Any, NamedTuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import re
@@ -13,6 +13,13 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import multilingual
 
 
+class UndoRow(NamedTuple):
+    """Original state of one transaction touched by a bulk action"""
+    id: int
+    category: Optional[str]
+    description: Optional[str]
+
+
 @dataclass
 class BulkAction:
     """Represents a bulk categorization action for undo purposes"""
@@ -20,7 +27,7 @@ class BulkAction:
     keyword: str
     category: str
     timestamp: str
-    matched_transactions: List[Dict[str, Any]]  # Store original state
+    matched_transactions: List[UndoRow]  # Store original state
     transaction_ids: List[int]
     
     def to_dict(self) -> Dict:
@@ -152,14 +159,11 @@ class BulkCategorizer:
             return 0, [], ""
         
         # Store original state for undo (before modification)
-        original_state = []
-        for txn in transactions:
-            if txn.get("id") in matching_ids:
-                original_state.append({
-                    "id": txn.get("id"),
-                    "category": txn.get("category"),
-                    "description": txn.get("description")
-                })
+        original_state = [
+            UndoRow(txn.get("id"), txn.get("category"), txn.get("description"))
+            for txn in transactions
+            if txn.get("id") in matching_ids
+        ]
         
         # Apply new category
         updated_count = 0
@@ -203,10 +207,13 @@ class BulkCategorizer:
             return False, "No undo available", transactions
         
         # Restore original categories
-        for original in self.last_action.matched_transactions:
-            for txn in transactions:
-                if txn.get("id") == original.get("id"):
-                    txn["category"] = original.get("category")
+        original_categories = {
+            original.id: original.category
+            for original in self.last_action.matched_transactions
+        }
+        for txn in transactions:
+            if txn.get("id") in original_categories:
+                txn["category"] = original_categories[txn.get("id")]
 
         # Capture info for message, then clear undo buffer
         action_info = {
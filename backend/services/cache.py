@@ -8,13 +8,17 @@ with automatic TTL expiration and cache invalidation.
 
 import os
 import json
+import asyncio
 import hashlib
+from collections import OrderedDict
 from typing import Optional, Any, Callable
-from functools import wraps
-from datetime import datetime, timedelta
+from functools import wraps, partial
+from datetime import date, datetime, timedelta
 
+import orjson
 import redis
 from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 
 
 class CacheService:
@@ -27,6 +31,7 @@ class CacheService:
     - Automatic cache invalidation
     - Cache statistics (hit/miss/size)
     - Pattern-based cache deletion
+    - Tag sets per user/client/session so invalidation needs no KEYS scan
     """
     
     def __init__(self):
@@ -180,6 +185,64 @@ class CacheService:
             print(f"Cache delete pattern error: {e}")
             return 0
     
+    def _tag_key(self, field: str, value: Any) -> str:
+        """Redis set holding the cache keys stored for one user/client/session"""
+        return f"cache-tags:{field}:{value}"
+    
+    def tag(self, key: str, ttl: Optional[int] = None, **tags) -> None:
+        """
+        Record a cache key under its user/client/session so it can be invalidated
+        without scanning the keyspace.
+        
+        Args:
+            key: Cache key that was just set
+            ttl: TTL of the cache entry; the tag set lives at least as long
+            **tags: Tag fields and values (e.g. session_id='abc'); None values are skipped
+        """
+        if not self.enabled or not self.redis_client:
+            return
+        
+        tag_keys = [self._tag_key(field, value) for field, value in tags.items() if value is not None]
+        if not tag_keys:
+            return
+        
+        try:
+            ttl = ttl or self.ttl_default
+            pipe = self.redis_client.pipeline()
+            for tag_key in tag_keys:
+                pipe.sadd(tag_key, key)
+                pipe.ttl(tag_key)
+            remaining = pipe.execute()[1::2]
+            
+            # Only ever extend a tag set's expiry so longer-lived entries stay indexed
+            pipe = self.redis_client.pipeline()
+            for tag_key, tag_ttl in zip(tag_keys, remaining):
+                if tag_ttl < ttl:
+                    pipe.expire(tag_key, ttl)
+            pipe.execute()
+        except Exception as e:
+            print(f"Cache tag error: {e}")
+    
+    def _invalidate_tag(self, field: str, value: Any) -> int:
+        """Delete every cache key recorded under one tag"""
+        if not self.enabled or not self.redis_client:
+            return 0
+        
+        try:
+            tag_key = self._tag_key(field, value)
+            keys = self.redis_client.smembers(tag_key)
+            pipe = self.redis_client.pipeline()
+            if keys:
+                pipe.delete(*keys)
+            pipe.delete(tag_key)
+            deleted = pipe.execute()[0] if keys else 0
+            if deleted:
+                self._increment_stat('deletes', deleted)
+            return deleted
+        except Exception as e:
+            print(f"Cache invalidate error: {e}")
+            return 0
+    
     def invalidate_session(self, session_id: str) -> int:
         """
         Invalidate all cache entries for a session.
@@ -190,8 +253,7 @@ class CacheService:
         Returns:
             Number of keys deleted
         """
-        pattern = f"cache:*:*session_id*{session_id}*"
-        return self.delete_pattern(pattern)
+        return self._invalidate_tag('session_id', session_id)
     
     def invalidate_user(self, user_id: int) -> int:
         """
@@ -203,8 +265,7 @@ class CacheService:
         Returns:
             Number of keys deleted
         """
-        pattern = f"cache:*:*user_id*{user_id}*"
-        return self.delete_pattern(pattern)
+        return self._invalidate_tag('user_id', user_id)
     
     def invalidate_client(self, client_id: int) -> int:
         """
@@ -216,8 +277,7 @@ class CacheService:
         Returns:
             Number of keys deleted
         """
-        pattern = f"cache:*:*client_id*{client_id}*"
-        return self.delete_pattern(pattern)
+        return self._invalidate_tag('client_id', client_id)
     
     def flush_all(self) -> bool:
         """
@@ -336,6 +396,151 @@ def get_cache() -> CacheService:
     return _cache_service
 
 
+class OCRRegionStore:
+    """
+    Saved OCR regions per (user_id, session_id), one Redis key per session.
+    
+    Regions saved via /ocr/regions must be visible to whichever worker
+    serves the following /ocr/extract, and must survive restarts, so they
+    live in Redis rather than a module-level dict. Entries expire after
+    `ttl` and are removed when their session is deleted. Without Redis, the
+    most recently used LOCAL_MAX_ENTRIES sessions are kept in this process.
+    """
+    
+    key_prefix = 'ocr:regions:'
+    ttl = int(os.getenv('CACHE_TTL_OCR_REGIONS', '2592000'))  # 30 days
+    LOCAL_MAX_ENTRIES = 256
+    
+    def __init__(self, cache: Optional[CacheService] = None):
+        self._cache = cache
+        self._local: OrderedDict = OrderedDict()
+    
+    @property
+    def _redis(self):
+        cache = self._cache or get_cache()
+        return cache.redis_client if cache.enabled else None
+    
+    def _key(self, user_id: int, session_id: str) -> str:
+        return f"{self.key_prefix}{user_id}:{session_id}"
+    
+    def _get_local(self, key: str) -> Optional[dict]:
+        entry = self._local.get(key)
+        if entry is not None:
+            self._local.move_to_end(key)
+        return entry
+    
+    def get(self, user_id: int, session_id: str) -> Optional[dict]:
+        """
+        Get the saved entry for a session.
+        
+        Returns:
+            {'pages': {page_number: regions}, 'amount_type': ...} or None
+        """
+        key = self._key(user_id, session_id)
+        client = self._redis
+        if client is None:
+            return self._get_local(key)
+        
+        try:
+            raw = client.get(key)
+        except Exception as e:
+            print(f"OCR region store get error: {e}")
+            return self._get_local(key)
+        if raw is None:
+            return None
+        entry = orjson.loads(raw)
+        # JSON object keys are strings; page numbers are ints everywhere else
+        entry['pages'] = {int(p): regs for p, regs in entry.get('pages', {}).items()}
+        return entry
+    
+    def set(self, user_id: int, session_id: str, entry: dict) -> None:
+        """Save the entry for a session, restarting its TTL"""
+        key = self._key(user_id, session_id)
+        client = self._redis
+        if client is not None:
+            try:
+                client.setex(key, self.ttl, orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS))
+                return
+            except Exception as e:
+                print(f"OCR region store set error: {e}")
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.LOCAL_MAX_ENTRIES:
+            self._local.popitem(last=False)
+    
+    def delete(self, user_id: int, session_id: str) -> None:
+        """Remove the entry for a deleted session"""
+        key = self._key(user_id, session_id)
+        self._local.pop(key, None)
+        client = self._redis
+        if client is not None:
+            try:
+                client.delete(key)
+            except Exception as e:
+                print(f"OCR region store delete error: {e}")
+
+
+class InvoiceMetadataCache:
+    """
+    Extracted invoice metadata keyed by the SHA-256 hex digest of the PDF.
+    
+    The same invoice is often uploaded more than once (retries, forwarded
+    duplicates), and extraction means PDF parsing and possibly OCR, so the
+    result is cached by content fingerprint. Without Redis, the most
+    recently used LOCAL_MAX_ENTRIES digests are kept in this process only.
+    """
+    
+    key_prefix = 'invoice:meta:'
+    ttl = int(os.getenv('CACHE_TTL_INVOICE_META', '604800'))  # 7 days
+    LOCAL_MAX_ENTRIES = 256
+    
+    def __init__(self, cache: Optional[CacheService] = None):
+        self._cache = cache
+        self._local: OrderedDict = OrderedDict()
+    
+    @property
+    def _redis(self):
+        cache = self._cache or get_cache()
+        return cache.redis_client if cache.enabled else None
+    
+    def get(self, digest: str) -> Optional[dict]:
+        """Get cached metadata for a content digest, or None"""
+        client = self._redis
+        if client is None:
+            meta = self._local.get(digest)
+            if meta is None:
+                return None
+            self._local.move_to_end(digest)
+            return dict(meta)
+        
+        try:
+            raw = client.get(self.key_prefix + digest)
+        except Exception as e:
+            print(f"Invoice metadata cache get error: {e}")
+            return None
+        if raw is None:
+            return None
+        meta = orjson.loads(raw)
+        # orjson writes dates as ISO strings; callers store invoice_date as a date
+        if meta.get('invoice_date'):
+            meta['invoice_date'] = date.fromisoformat(meta['invoice_date'])
+        return meta
+    
+    def set(self, digest: str, meta: dict) -> None:
+        """Cache metadata for a content digest"""
+        client = self._redis
+        if client is not None:
+            try:
+                client.setex(self.key_prefix + digest, self.ttl, orjson.dumps(meta))
+                return
+            except Exception as e:
+                print(f"Invoice metadata cache set error: {e}")
+        self._local[digest] = dict(meta)
+        self._local.move_to_end(digest)
+        while len(self._local) > self.LOCAL_MAX_ENTRIES:
+            self._local.popitem(last=False)
+
+
 def cached(ttl: Optional[int] = None):
     """
     Decorator for caching FastAPI endpoint responses.
@@ -350,13 +555,19 @@ def cached(ttl: Optional[int] = None):
         ttl: Time to live in seconds (optional, uses default if not specified)
     """
     def decorator(func: Callable):
+        # Sync endpoints do blocking DB work: run them in the threadpool, as FastAPI would
+        if asyncio.iscoroutinefunction(func):
+            call_endpoint = func
+        else:
+            call_endpoint = partial(run_in_threadpool, func)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
             cache = get_cache()
             
             # Skip cache if disabled
             if not cache.enabled:
-                return await func(*args, **kwargs)
+                return await call_endpoint(*args, **kwargs)
             
             # Extract request parameters for cache key
             request = kwargs.get('request')
@@ -381,10 +592,17 @@ def cached(ttl: Optional[int] = None):
                 return cached_response
             
             # Call original function
-            response = await func(*args, **kwargs)
+            response = await call_endpoint(*args, **kwargs)
             
-            # Cache the response
-            cache.set(cache_key, response, ttl)
+            # Cache the response, indexed for invalidation
+            if cache.set(cache_key, response, ttl):
+                cache.tag(
+                    cache_key,
+                    ttl,
+                    user_id=cache_params.get('user_id'),
+                    client_id=cache_params.get('client_id'),
+                    session_id=cache_params.get('session_id'),
+                )
             
             return response
         
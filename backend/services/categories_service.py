@@ -9,13 +9,28 @@ import os
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 import json
+import re
+import time
+from functools import lru_cache
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import multilingual
+import pandas as pd
 from sqlalchemy.orm import Session
 from models import CustomCategory, SessionLocal
 
+try:
+    import hyperscan
+    _HAS_HYPERSCAN = True
+except ImportError:
+    hyperscan = None
+    _HAS_HYPERSCAN = False
+
+# Above this many rules, keyword scanning switches from per-rule regex passes
+# to a single Hyperscan pass per description (when hyperscan is installed)
+HYPERSCAN_MIN_RULES = 32
+
 
 # Built-in categories that are always available
 BUILT_IN_CATEGORIES = [
@@ -56,6 +71,58 @@ BUILT_IN_CATEGORY_VAT_DEFAULTS = {
 }
 
 
+# Crockford base32 alphabet used by ULIDs (no I, L, O, U)
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def new_rule_id() -> str:
+    """Generate a 26-char ULID: 48-bit ms timestamp + 80 random bits.
+
+    ULIDs sort lexicographically in creation order, so rule IDs stay
+    index-friendly instead of scattering like random uuid4 strings.
+    """
+    value = (int(time.time() * 1000) << 80) | int.from_bytes(os.urandom(10), "big")
+    chars = []
+    for _ in range(26):
+        value, idx = divmod(value, 32)
+        chars.append(_ULID_ALPHABET[idx])
+    return "".join(reversed(chars))
+
+
+@lru_cache(maxsize=32)
+def _compile_hyperscan_prefilter(keyword_sets: Tuple[Tuple[str, ...], ...]) -> Tuple[Any, frozenset]:
+    """Compile the Hyperscan prefilter for rules' keywords, given in priority order.
+    
+    Returns (database or None, indexes of rules that are always candidates).
+    Compiling takes far longer than scanning a batch, so it is done once per
+    distinct rule set; editing a rule's keywords or order changes the key.
+    """
+    expressions = []
+    ids = []
+    always_candidates = set()
+    for rule_idx, keywords in enumerate(keyword_sets):
+        for kw in keywords:
+            kw = kw.strip()
+            if not kw:
+                continue
+            if not kw.isascii():
+                always_candidates.add(rule_idx)
+                continue
+            expressions.append(re.escape(kw).encode("ascii"))
+            ids.append(rule_idx)
+    
+    scan_db = None
+    if expressions:
+        scan_db = hyperscan.Database()
+        scan_db.compile(
+            expressions=expressions,
+            ids=ids,
+            elements=len(expressions),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions)
+        )
+    return scan_db, frozenset(always_candidates)
+
+
 @dataclass
 class CategoryRule:
     """Represents a categorization rule with keywords and priority"""
@@ -325,11 +392,31 @@ class CategoriesService:
         
         return [r.to_dict() for r in self.session_rules[session_id]]
     
+    @staticmethod
+    def _descriptions_series(transactions: List[Dict[str, Any]]) -> pd.Series:
+        """Build the description column once so rules can be matched vectorized"""
+        return pd.Series(
+            [txn.get("description") or "" for txn in transactions],
+            dtype=object
+        )
+    
+    @staticmethod
+    def _rule_mask(rule: CategoryRule, descriptions: pd.Series) -> pd.Series:
+        """Boolean mask of descriptions matched by any of the rule's keywords"""
+        rx = multilingual.compile_keyword_pattern(
+            tuple(rule.keywords),
+            strict_boundaries=not rule.match_compound_words
+        )
+        if rx is None or descriptions.empty:
+            return pd.Series(False, index=descriptions.index, dtype=bool)
+        return descriptions.str.contains(rx, regex=True, na=False)
+    
     def preview_rule_matches(
         self,
         session_id: str,
         rule_id: str,
-        transactions: List[Dict[str, Any]]
+        transactions: List[Dict[str, Any]],
+        descriptions: Optional[pd.Series] = None
     ) -> Dict[str, Any]:
         """Preview which transactions would match a specific rule"""
         if session_id not in self.session_rules:
@@ -344,22 +431,28 @@ class CategoriesService:
         if not rule:
             return {"matched": [], "count": 0, "percentage": 0}
         
+        if descriptions is None:
+            descriptions = self._descriptions_series(transactions)
+        mask = self._rule_mask(rule, descriptions)
+        
         matched_txns = []
-        for txn in transactions:
-            # Don't lowercase before matching - multilingual.match_keyword_in_text handles case-insensitivity
-            desc = txn.get("description", "")
-            for keyword in rule.keywords:
-                # Keywords are already lowercase from storage, but match_keyword_in_text handles case-insensitivity
-                # Pass the match_compound_words flag to allow matching in compound words if enabled
-                if multilingual.match_keyword_in_text(keyword, desc, strict_boundaries=not rule.match_compound_words):
-                    matched_txns.append({
-                        "id": txn.get("id"),
-                        "date": str(txn.get("date")),
-                        "description": txn.get("description"),
-                        "amount": txn.get("amount"),
-                        "keyword_matched": keyword
-                    })
-                    break  # Only count once per transaction
+        strict = not rule.match_compound_words
+        for idx in mask[mask].index:
+            txn = transactions[idx]
+            desc = descriptions.iat[idx]
+            # Only the matched rows need the per-keyword check to report which keyword hit
+            keyword_matched = next(
+                (kw for kw in rule.keywords
+                 if multilingual.match_keyword_in_text(kw, desc, strict_boundaries=strict)),
+                None
+            )
+            matched_txns.append({
+                "id": txn.get("id"),
+                "date": str(txn.get("date")),
+                "description": txn.get("description"),
+                "amount": txn.get("amount"),
+                "keyword_matched": keyword_matched
+            })
         
         percentage = 0
         if len(transactions) > 0:
@@ -399,24 +492,23 @@ class CategoriesService:
         # Sort by priority (lower number = higher priority)
         rules.sort(key=lambda r: r.priority)
         
-        updated_count = 0
-        
-        for txn in transactions:
-            desc = txn.get("description", "")
+        if _HAS_HYPERSCAN and len(rules) > HYPERSCAN_MIN_RULES:
+            updated_count = self._apply_rules_hyperscan(rules, transactions)
+        else:
+            # Match each rule against all descriptions at once; rows claimed by a
+            # higher-priority rule are masked out so the first match still wins
+            descriptions = self._descriptions_series(transactions)
+            unassigned = pd.Series(True, index=descriptions.index, dtype=bool)
             
-            # Try to match against rules in priority order
             for rule in rules:
-                matched = False
-                for keyword in rule.keywords:
-                    # Use the rule's match_compound_words setting
-                    if multilingual.match_keyword_in_text(keyword, desc, strict_boundaries=not rule.match_compound_words):
-                        matched = True
-                        break
-                
-                if matched:
-                    txn["category"] = rule.category
-                    updated_count += 1
-                    break  # First match wins
+                if not unassigned.any():
+                    break
+                hits = self._rule_mask(rule, descriptions) & unassigned
+                for idx in hits[hits].index:
+                    transactions[idx]["category"] = rule.category
+                unassigned &= ~hits
+            
+            updated_count = int((~unassigned).sum())
         
         return {
             "updated": updated_count,
@@ -424,6 +516,49 @@ class CategoriesService:
             "rules_applied": len(rules)
         }
     
+    @staticmethod
+    def _apply_rules_hyperscan(rules: List[CategoryRule], transactions: List[Dict[str, Any]]) -> int:
+        """Categorize transactions with one Hyperscan pass per description.
+        
+        Hyperscan has no lookbehind support, so it only prefilters: every
+        keyword is compiled as a caseless literal and the scan yields the set
+        of rules that *might* match. Those candidates are then confirmed in
+        priority order with the rule's boundary-aware pattern. Rules with
+        non-ASCII keywords are always treated as candidates because Hyperscan
+        only folds ASCII case.
+        """
+        scan_db, always_candidates = _compile_hyperscan_prefilter(tuple(tuple(r.keywords) for r in rules))
+        # The compiled database is shared between calls (and threads), so each
+        # call scans with its own scratch space
+        scratch = hyperscan.Scratch(scan_db) if scan_db is not None else None
+        
+        patterns = [
+            multilingual.compile_keyword_pattern(tuple(r.keywords), strict_boundaries=not r.match_compound_words)
+            for r in rules
+        ]
+        
+        updated_count = 0
+        for txn in transactions:
+            desc = txn.get("description") or ""
+            if not desc:
+                continue
+            
+            candidates = set(always_candidates)
+            if scan_db is not None:
+                def on_match(rule_idx, start, end, flags, context):
+                    candidates.add(rule_idx)
+                scan_db.scan(desc.encode("utf-8"), match_event_handler=on_match, scratch=scratch)
+            
+            # Lowest index = highest priority, since rules arrive sorted
+            for rule_idx in sorted(candidates):
+                rx = patterns[rule_idx]
+                if rx is not None and rx.search(desc):
+                    txn["category"] = rules[rule_idx].category
+                    updated_count += 1
+                    break
+        
+        return updated_count
+    
     def get_rule_statistics(
         self,
         session_id: str,
@@ -434,8 +569,9 @@ class CategoriesService:
             return []
         
         stats = []
+        descriptions = self._descriptions_series(transactions)
         for rule in self.session_rules[session_id]:
-            preview = self.preview_rule_matches(session_id, rule.rule_id, transactions)
+            preview = self.preview_rule_matches(session_id, rule.rule_id, transactions, descriptions)
             stats.append({
                 "rule_id": rule.rule_id,
                 "name": rule.name,
@@ -9,8 +9,17 @@ Business logic for categorizing transactions is kept HERE for easy maintenance
 import json
 import os
 import re
+from functools import lru_cache
 from typing import Tuple, List, Dict
 
+# Optional single-pass scanner for merchant mapping patterns
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except ImportError:
+    ahocorasick = None
+    _HAS_AHOCORASICK = False
+
 
 # =============================================================================
 # MERCHANT MAPPINGS - Comprehensive database for automatic merchant normalization
@@ -743,6 +752,54 @@ if _external_rules:
 
 
 
+def _compile_categorization_rules(rules: List[Dict]) -> List[Tuple[str, object, Tuple[str, ...], Tuple[str, ...]]]:
+    """
+    Prepare categorization rules for matching: lowercase keywords and
+    compile regexes once instead of on every transaction
+    
+    Returns:
+        List of (category, compiled_regex_or_None, keywords, exclude_keywords)
+    """
+    compiled = []
+    for rule in rules:
+        regex = None
+        if rule.get("regex"):
+            try:
+                regex = re.compile(rule["regex"], re.IGNORECASE)
+            except re.error:
+                regex = None
+        compiled.append((
+            rule["category"],
+            regex,
+            tuple(k.lower() for k in rule.get("keywords", [])),
+            tuple(k.lower() for k in rule.get("exclude_keywords") or []),
+        ))
+    return compiled
+
+
+# Income rules are only tried for credits, every other rule only for debits
+_INCOME_RULES = _compile_categorization_rules([r for r in CATEGORIZATION_RULES if r["category"] == "Income"])
+_EXPENSE_RULES = _compile_categorization_rules([r for r in CATEGORIZATION_RULES if r["category"] != "Income"])
+
+
+def _first_matching_category(description_lower: str, compiled_rules: list, default: str) -> str:
+    """
+    Return the category of the first rule matching the description
+    
+    A rule matches when its regex (if any) matches, or otherwise when any
+    keyword is contained in the description - unless an exclude keyword is.
+    """
+    for category, regex, keywords, exclude_keywords in compiled_rules:
+        if regex is not None and regex.search(description_lower):
+            if not any(k in description_lower for k in exclude_keywords):
+                return category
+            continue
+        if any(k in description_lower for k in keywords):
+            if not any(k in description_lower for k in exclude_keywords):
+                return category
+    return default
+
+
 def categorize_transaction(description: str, amount: float) -> Tuple[str, bool]:
     """
     Categorize a transaction based on description and amount
@@ -761,77 +818,43 @@ def categorize_transaction(description: str, amount: float) -> Tuple[str, bool]:
     # Determine if expense or income
     is_expense = amount < 0
     
-    # Auto-categorize income/deposits
+    # Auto-categorize income/deposits (default income to Income category)
     if not is_expense:
-        # Check if description suggests income
-        desc_lower = description.lower()
-        for rule in CATEGORIZATION_RULES:
-            if rule["category"] == "Income":
-                if _matches_rule(desc_lower, rule):
-                    return rule["category"], is_expense
-        # Default income to Income category
-        return "Income", is_expense
-    
-    # Categorize expenses based on rules
-    desc_lower = description.lower()
-    
-    # Check each rule in order (first match wins)
-    for rule in CATEGORIZATION_RULES:
-        if rule["category"] == "Income":
-            continue  # Skip income rules for expenses
-        
-        if _matches_rule(desc_lower, rule):
-            return rule["category"], is_expense
+        return _first_matching_category(description.lower(), _INCOME_RULES, "Income"), is_expense
     
-    # Default to Other if no match
-    return "Other", is_expense
+    # Categorize expenses based on rules (first match wins), default to Other
+    return _first_matching_category(description.lower(), _EXPENSE_RULES, "Other"), is_expense
 
 
-def _matches_rule(description_lower: str, rule: dict) -> bool:
+def categorize_batch(descriptions: List[str], amounts: List[float]) -> List[Tuple[str, bool]]:
     """
-    Check if description matches a categorization rule
+    Categorize a whole statement in one call
+    
+    Gives the same result as calling categorize_transaction per row, but each
+    distinct (description, expense/income) pair is matched only once - bank
+    statements repeat the same merchants and fees many times.
     
     Args:
-        description_lower: Transaction description (already lowercased)
-        rule: Rule dict with keywords and exclude_keywords
+        descriptions: Transaction descriptions
+        amounts: Transaction amounts, aligned with descriptions
         
     Returns:
-        True if description matches the rule
+        List of (category, is_expense) tuples, aligned with the inputs
     """
-    
-    # Check regex first (if present)
-    regex = rule.get("regex")
-    if regex:
-        try:
-            if re.search(regex, description_lower, flags=re.IGNORECASE):
-                # still check excludes
-                if rule.get("exclude_keywords"):
-                    exclude_match = any(k.lower() in description_lower for k in rule.get("exclude_keywords", []))
-                    if exclude_match:
-                        return False
-                return True
-        except re.error:
-            pass
-
-    # Check if any keyword matches
-    keyword_match = any(
-        keyword.lower() in description_lower
-        for keyword in rule.get("keywords", [])
-    )
-    
-    if not keyword_match:
-        return False
-    
-    # Check if any exclude keyword matches (if so, rule doesn't apply)
-    if rule.get("exclude_keywords"):
-        exclude_match = any(
-            keyword.lower() in description_lower
-            for keyword in rule["exclude_keywords"]
-        )
-        if exclude_match:
-            return False
-    
-    return True
+    matched: Dict[Tuple[str, bool], str] = {}
+    results = []
+    for description, amount in zip(descriptions, amounts):
+        is_expense = amount < 0
+        key = (description, is_expense)
+        category = matched.get(key)
+        if category is None:
+            if is_expense:
+                category = _first_matching_category(description.lower(), _EXPENSE_RULES, "Other")
+            else:
+                category = _first_matching_category(description.lower(), _INCOME_RULES, "Income")
+            matched[key] = category
+        results.append((category, is_expense))
+    return results
 
 
 def get_available_categories() -> list:
@@ -853,6 +876,23 @@ def get_available_categories() -> list:
     return categories
 
 
+def _build_merchant_automaton():
+    """Aho-Corasick automaton over all mapping patterns, each pointing at the first mapping that lists it."""
+    first_mapping: Dict[str, int] = {}
+    for idx, mapping in enumerate(MERCHANT_MAPPINGS):
+        for pattern in mapping.get("patterns", []):
+            first_mapping.setdefault(pattern.lower(), idx)
+    automaton = ahocorasick.Automaton()
+    for pattern, idx in first_mapping.items():
+        automaton.add_word(pattern, idx)
+    automaton.make_automaton()
+    return automaton
+
+
+# One scan per description instead of one substring test per pattern (~230 patterns)
+_MERCHANT_AUTOMATON = _build_merchant_automaton() if _HAS_AHOCORASICK else None
+
+
 def normalize_merchant(description: str) -> str:
     """
     Normalize merchant name based on predefined merchant mappings.
@@ -868,11 +908,16 @@ def normalize_merchant(description: str) -> str:
     
     desc_lower = description.lower()
     
-    # Check against all merchant mappings
-    for mapping in MERCHANT_MAPPINGS:
-        for pattern in mapping.get("patterns", []):
-            if pattern.lower() in desc_lower:
-                return mapping["merchant"]
+    # Check against all merchant mappings; the earliest mapping with a matching pattern wins
+    if _MERCHANT_AUTOMATON is not None:
+        hits = [idx for _, idx in _MERCHANT_AUTOMATON.iter(desc_lower)]
+        if hits:
+            return MERCHANT_MAPPINGS[min(hits)]["merchant"]
+    else:
+        for mapping in MERCHANT_MAPPINGS:
+            for pattern in mapping.get("patterns", []):
+                if pattern.lower() in desc_lower:
+                    return mapping["merchant"]
     
     # If no match found, fall back to heuristic extraction
     return extract_merchant_heuristic(description)
@@ -910,6 +955,7 @@ def extract_merchant_heuristic(description: str) -> str:
     return name[:64]
 
 
+@lru_cache(maxsize=4096)
 def extract_merchant(description: str) -> str:
     """
     Extract and normalize merchant name from transaction description.
@@ -239,14 +239,19 @@ class CategorizationLearningService:
         }
     
     @staticmethod
-    def apply_learned_rules(
+    def suggest_categories(
         user_id: str,
         transactions: List,
         db: Session
-    ) -> Dict[int, str]:
+    ) -> List[Optional[str]]:
         """
-        Apply learned rules to a list of transactions
-        Returns dict of transaction_id -> suggested_category
+        Match learned rules against transactions without modifying them
+        Works on any objects with description/category (and optional merchant)
+        attributes, including Transaction rows that have not been flushed yet.
+        Returns a list aligned with transactions: the learned category, or None
+        when no rule matched or the transaction is already categorized.
+        
+        Rule usage statistics are updated on the session; the caller commits.
         
         Prioritizes rules by:
         1. Pattern type (exact > merchant > starts_with > contains)
@@ -278,11 +283,12 @@ class CategorizationLearningService:
                 contains_rules.append(rule)
         
         # Apply rules to transactions
-        suggestions = {}
+        suggestions = []
         
         for txn in transactions:
             # Skip already categorized transactions (unless category is "Other")
             if hasattr(txn, 'category') and txn.category and txn.category != 'Other':
+                suggestions.append(None)
                 continue
             
             description = txn.description if hasattr(txn, 'description') else str(txn)
@@ -325,13 +331,33 @@ class CategorizationLearningService:
             
             # Apply matched rule
             if matched_rule:
+                suggestions.append(matched_rule.category)
+                
+                # Update rule usage statistics
+                matched_rule.use_count += 1
+                matched_rule.last_used = datetime.utcnow()
+            else:
+                suggestions.append(None)
+        
+        return suggestions
+    
+    @staticmethod
+    def apply_learned_rules(
+        user_id: str,
+        transactions: List,
+        db: Session
+    ) -> Dict[int, str]:
+        """
+        Apply learned rules to a list of transactions
+        Returns dict of transaction_id -> suggested_category
+        """
+        suggestions = {}
+        categories = CategorizationLearningService.suggest_categories(user_id, transactions, db)
+        for txn, category in zip(transactions, categories):
+            if category:
                 txn_id = txn.id if hasattr(txn, 'id') else None
                 if txn_id:
-                    suggestions[txn_id] = matched_rule.category
-                    
-                    # Update rule usage statistics
-                    matched_rule.use_count += 1
-                    matched_rule.last_used = datetime.utcnow()
+                    suggestions[txn_id] = category
         
         db.commit()
         return suggestions
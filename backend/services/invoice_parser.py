@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from io import BytesIO
 import re
 from datetime import date
@@ -13,15 +13,18 @@ except Exception:
 from services.parser import parse_date
 
 
-def _extract_text(content: bytes) -> (List[str], str):
-    """Return tuple (lines, method) where method is 'pdfplumber' or 'ocr' or 'none'."""
+def _extract_text(content: Union[bytes, str]) -> (List[str], str):
+    """Return tuple (lines, method) where method is 'pdfplumber' or 'ocr' or 'none'.
+
+    content is the PDF bytes or a path to the PDF (read from disk, not buffered).
+    """
     lines: List[str] = []
     method = 'none'
 
     # Try text-based extraction first (pdfplumber)
     if _HAS_PDFPLUMBER and pdfplumber is not None:
         try:
-            with pdfplumber.open(BytesIO(content)) as pdf:
+            with pdfplumber.open(BytesIO(content) if isinstance(content, bytes) else content) as pdf:
                 for page in pdf.pages:
                     t = page.extract_text() or ""
                     page_lines = [ln.strip() for ln in t.splitlines() if ln and ln.strip()]
@@ -35,12 +38,15 @@ def _extract_text(content: bytes) -> (List[str], str):
     if not lines:
         try:
             try:
-                from pdf2image import convert_from_bytes
+                from pdf2image import convert_from_bytes, convert_from_path
                 import pytesseract
             except Exception:
                 return ([], 'none')
 
-            images = convert_from_bytes(content, dpi=300)
+            if isinstance(content, bytes):
+                images = convert_from_bytes(content, dpi=300)
+            else:
+                images = convert_from_path(content, dpi=300)
             for img in images:
                 try:
                     t = pytesseract.image_to_string(img)
@@ -203,8 +209,8 @@ def _find_supplier_name(lines: List[str]) -> Optional[str]:
     return lines[0].strip() if lines else None
 
 
-def extract_invoice_metadata(content: bytes) -> Dict[str, Any]:
-    """Extract invoice metadata from a PDF. Returns dict fields where detected.
+def extract_invoice_metadata(content: Union[bytes, str]) -> Dict[str, Any]:
+    """Extract invoice metadata from a PDF (bytes or a file path). Returns dict fields where detected.
     Fields: supplier_name, invoice_date, invoice_number, total_amount, vat_amount
     """
     _res = _extract_text(content)
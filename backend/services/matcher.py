@@ -1,11 +1,13 @@
 from datetime import datetime
 from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 import re
 
 STOP_WORDS = {"pty", "ltd", "payment", "eft", "ppd", "pvt", "ptyltd", "limited"}
 
 
+@lru_cache(maxsize=4096)
 def _clean_supplier(s: Optional[str]) -> str:
     if not s:
         return ""
@@ -1,10 +1,12 @@
 import io
-from typing import Dict, List, Tuple, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Any, Optional, Union
 
 from PIL import Image
 import pytesseract
 
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
 
 from .parser import parse_date, parse_amount, ParserError
 
@@ -65,23 +67,62 @@ def _ocr_crop(image: Image.Image, crop_box: Tuple[int, int, int, int], lang: str
     return words
 
 
-def run_extraction(pdf_bytes: bytes, regions: Dict[str, Any], page: int = 1, dpi: int = 300, lang: str = 'eng') -> Dict[str, Any]:
+# Rendered pages as PNG bytes keyed by (content hash, page, dpi), so re-running
+# extraction with tuned regions on the same PDF only repeats the crop + OCR
+PAGE_CACHE_SIZE = 64
+_page_cache: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+
+def _render_page(pdf: Union[bytes, str], page: int, dpi: int, content_hash: Optional[str] = None) -> Image.Image:
+    """Render one 1-indexed page of a PDF (bytes or path) to an RGB image, cached when content_hash is given."""
+    key = (content_hash, page, dpi)
+    if content_hash:
+        with _page_cache_lock:
+            png = _page_cache.get(key)
+            if png is not None:
+                _page_cache.move_to_end(key)
+        if png is not None:
+            return Image.open(io.BytesIO(png)).convert('RGB')
+
+    if page < 1:
+        raise ParserError(f"Requested page {page} out of range")
+    try:
+        if isinstance(pdf, str):
+            pages = convert_from_path(pdf, dpi=dpi, first_page=page, last_page=page)
+        else:
+            pages = convert_from_bytes(pdf, dpi=dpi, first_page=page, last_page=page)
+    except Exception as e:
+        raise ParserError(f"Failed to convert PDF to images: {e}")
+
+    if not pages:
+        info = pdfinfo_from_path(pdf) if isinstance(pdf, str) else pdfinfo_from_bytes(pdf)
+        raise ParserError(f"Requested page {page} out of range (1..{info.get('Pages', 0)})")
+
+    page_img = pages[0].convert('RGB')
+    if content_hash:
+        buf = io.BytesIO()
+        page_img.save(buf, format='PNG', compress_level=1)
+        with _page_cache_lock:
+            _page_cache[key] = buf.getvalue()
+            _page_cache.move_to_end(key)
+            while len(_page_cache) > PAGE_CACHE_SIZE:
+                _page_cache.popitem(last=False)
+    return page_img
+
+
+def run_extraction(pdf: Union[bytes, str], regions: Dict[str, Any], page: int = 1, dpi: int = 300, lang: str = 'eng',
+                   content_hash: Optional[str] = None) -> Dict[str, Any]:
     """
     Run OCR on specified regions for a single page and return aligned rows and warnings.
 
+    pdf: PDF bytes, or the path of a PDF file on disk
     regions: Dict containing keys like 'date_region','description_region','amount_region' (or debit/credit)
     Each region: {x,y,w,h} relative coordinates (0..1)
     page: 1-indexed page number
+    content_hash: Digest of the PDF content; when given the rendered page is cached under it
     """
-    try:
-        pages = convert_from_bytes(pdf_bytes, dpi=dpi)
-    except Exception as e:
-        raise ParserError(f"Failed to convert PDF to images: {e}")
-
-    if page < 1 or page > len(pages):
-        raise ParserError(f"Requested page {page} out of range (1..{len(pages)})")
-
-    page_img = pages[page - 1].convert('RGB')
+    page_img = _render_page(pdf, page, dpi, content_hash)
     W, H = page_img.size
 
     # Prepare list of region crops
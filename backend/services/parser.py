@@ -9,6 +9,7 @@ import sys
 import os
 import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Tuple, List, Dict, Any, Optional
 import pandas as pd
 
@@ -52,6 +53,11 @@ class ParserError(Exception):
     pass
 
 
+class InvalidCSVError(ParserError):
+    """Raised when a CSV has no data rows or lacks the required columns"""
+    pass
+
+
 def _map_csv_headers_multilingual(csv_headers: List[str]) -> Dict[str, int]:
     """
     Map CSV column headers to canonical column names using multilingual module.
@@ -72,6 +78,22 @@ def _map_csv_headers_multilingual(csv_headers: List[str]) -> Dict[str, int]:
         raise ParserError(str(e))
 
 
+def _check_csv_structure(rows_and_headers) -> None:
+    """
+    Check the result of _find_data_start has data rows and mappable columns
+    
+    Raises:
+        InvalidCSVError: With the same message validate_csv reports
+    """
+    if rows_and_headers is None or len(rows_and_headers[1]) == 0:
+        raise InvalidCSVError("CSV file is empty or no data found")
+    
+    try:
+        _map_csv_headers_multilingual(rows_and_headers[0])
+    except ParserError as pe:
+        raise InvalidCSVError(str(pe)) from pe
+
+
 def validate_csv(file_content: bytes) -> Tuple[bool, str]:
     """
     Validate that CSV has required columns and proper structure
@@ -85,21 +107,10 @@ def validate_csv(file_content: bytes) -> Tuple[bool, str]:
     """
     try:
         # First, try to read the CSV to find where the actual headers are
-        rows_and_headers = _find_data_start(file_content)
-        
-        if rows_and_headers is None or len(rows_and_headers[1]) == 0:
-            return False, "CSV file is empty or no data found"
-        
-        # Try multilingual header mapping first
-        try:
-            headers_list = rows_and_headers[0]
-            _map_csv_headers_multilingual(headers_list)
-            # If we get here, mapping succeeded
-            return True, ""
-        except ParserError as pe:
-            # Fallback: provide helpful message
-            return False, str(pe)
-        
+        _check_csv_structure(_find_data_start(file_content))
+        return True, ""
+    except InvalidCSVError as e:
+        return False, str(e)
     except Exception as e:
         return False, f"Error reading CSV: {str(e)}"
 
@@ -191,7 +202,7 @@ def _clean_rows(headers: List[str], rows: List[List[str]]) -> Tuple[List[str], L
     return clean_headers, cleaned_rows
 
 
-def normalize_csv(file_content: bytes, statement_year: int = None, forced_bank: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str, List[Dict[str, Any]], str]:
+def normalize_csv(file_content: bytes, statement_year: int = None, forced_bank: Optional[str] = None, strict: bool = False) -> Tuple[List[Dict[str, Any]], str, List[Dict[str, Any]], str]:
     """
     Normalize CSV data to standard format
     Auto-detects bank and applies appropriate adapter
@@ -199,6 +210,11 @@ def normalize_csv(file_content: bytes, statement_year: int = None, forced_bank:
     Args:
         file_content: Raw bytes of uploaded CSV file
         statement_year: Optional year for short date formats (e.g., "14 Nov")
+        strict: Apply the validate_csv checks to the already-read CSV instead
+            of a separate validate_csv pass
+        
+    Raises:
+        InvalidCSVError: In strict mode, when validate_csv would reject the file
         
     Returns:
         Tuple of (normalized_transactions, error_message, detailed_errors, bank_source)
@@ -210,6 +226,8 @@ def normalize_csv(file_content: bytes, statement_year: int = None, forced_bank:
     try:
         # Use smart header detection
         result = _find_data_start(file_content)
+        if strict:
+            _check_csv_structure(result)
         if result is None:
             return [], "Could not find data in CSV file", [], "unknown"
         
@@ -304,6 +322,8 @@ def normalize_csv(file_content: bytes, statement_year: int = None, forced_bank:
             # Fallback: use old parsing logic (unchanged from original)
             return _parse_generic(df, statement_year)
         
+    except InvalidCSVError:
+        raise
     except Exception as e:
         print(f"[PARSER] Error: {e}")
         return [], f"Error processing CSV: {str(e)}", [], "unknown"
@@ -451,47 +471,42 @@ def _parse_generic(df: pd.DataFrame, statement_year: int = None) -> Tuple[List[D
         return [], f"Error processing CSV: {str(e)}"
 
 
+# OCR misreadings ('0ct' with a zero -> 'Oct', etc.) and Afrikaans month
+# abbreviations, applied in order by parse_date. Compiled once at import.
+_DATE_TOKEN_FIXES = [
+    (re.compile(rf'\b{token}\b', re.IGNORECASE), replacement)
+    for token, replacement in [
+        ('0ct', 'Oct'), ('0ec', 'Dec'), ('0ov', 'Nov'), ('0an', 'Jan'),
+        ('0ar', 'Mar'), ('0pr', 'Apr'), ('0ay', 'May'), ('0un', 'Jun'),
+        ('0ul', 'Jul'), ('0ug', 'Aug'), ('0ep', 'Sep'),
+        # Additional OCR typos
+        ('Qet', 'Oct'), ('Noy', 'Nov'), ('var', 'Jan'),
+        ('vat', ''),  # Remove VAT header
+        # Afrikaans to English month mapping (abbreviated)
+        ('jan', 'Jan'), ('feb', 'Feb'), ('maa', 'Mar'), ('mrt', 'Mar'),
+        ('apr', 'Apr'), ('mei', 'May'), ('jun', 'Jun'), ('jul', 'Jul'),
+        ('aug', 'Aug'), ('sep', 'Sep'), ('okt', 'Oct'), ('nov', 'Nov'), ('des', 'Dec'),
+    ]
+]
+
+
+@lru_cache(maxsize=8192)
 def parse_date(date_str: str, statement_year: int = None) -> datetime.date:
     """
     Parse date string in multiple common formats
     Returns None if unable to parse
     
+    Results are memoized: statements repeat the same few dates many times
+    and the result (a date or None) is immutable.
+    
     Args:
         date_str: Date string to parse
         statement_year: Optional year to use for short date formats (e.g., "14 Nov")
     """
-    # Fix OCR artifacts: replace common misreadings before parsing
-    # '0ct' (zero) -> 'Oct', etc.
+    # Fix OCR artifacts and normalize Afrikaans months before parsing
     normalized_date_str = date_str
-    normalized_date_str = re.sub(r'\b0ct\b', 'Oct', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0ec\b', 'Dec', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0ov\b', 'Nov', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0an\b', 'Jan', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0ar\b', 'Mar', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0pr\b', 'Apr', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0ay\b', 'May', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0un\b', 'Jun', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0ul\b', 'Jul', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0ug\b', 'Aug', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\b0ep\b', 'Sep', normalized_date_str, flags=re.IGNORECASE)
-    
-    # Additional OCR typos
-    normalized_date_str = re.sub(r'\bQet\b', 'Oct', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\bNoy\b', 'Nov', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\bvar\b', 'Jan', normalized_date_str, flags=re.IGNORECASE)
-    normalized_date_str = re.sub(r'\bvat\b', '', normalized_date_str, flags=re.IGNORECASE)  # Remove VAT header
-    
-    # Afrikaans to English month mapping (abbreviated)
-    afr_to_eng = {
-        'jan': 'Jan', 'feb': 'Feb', 'maa': 'Mar', 'mrt': 'Mar',
-        'apr': 'Apr', 'mei': 'May', 'jun': 'Jun', 'jul': 'Jul',
-        'aug': 'Aug', 'sep': 'Sep', 'okt': 'Oct', 'nov': 'Nov', 'des': 'Dec'
-    }
-    
-    # Normalize Afrikaans months to English
-    for afr, eng in afr_to_eng.items():
-        # Case-insensitive replace
-        normalized_date_str = re.sub(rf'\b{afr}\b', eng, normalized_date_str, flags=re.IGNORECASE)
+    for pattern, replacement in _DATE_TOKEN_FIXES:
+        normalized_date_str = pattern.sub(replacement, normalized_date_str)
     
     formats = [
         "%Y-%m-%d",      # 2024-01-15
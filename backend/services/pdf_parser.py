@@ -27,6 +27,13 @@ try:
 except Exception:
     pytesseract = None
 
+try:
+    import pdfplumber
+    _HAS_PDFPLUMBER = True
+except ImportError:
+    pdfplumber = None
+    _HAS_PDFPLUMBER = False
+
 # Date pattern for matching dates in OCR text
 # Matches: DD/MM/YYYY, DD-MM-YYYY, YYYY-MM-DD, DD MMM, DD MMM YYYY, etc.
 DATE_REGEX = r"(\d{1,2}\s*[\/\-]\s*\d{1,2}\s*[\/\-]\s*\d{2,4}|\d{4}\s*[\/\-]\s*\d{1,2}\s*[\/\-]\s*\d{1,2}|\d{1,2}\s+[A-Za-z]{3,}(?:\s+\d{4})?)"
@@ -1769,6 +1776,27 @@ def _parse_standard_bank_text(text: str, pdf) -> List[List[str]]:
     return rows
 
 
+def extract_debug_page(pdf_path: str, index: int) -> dict:
+    """Text and table previews of one PDF page for /pdf_debug.
+
+    Takes the PDF's path and a 0-based page index (pdfplumber pages don't
+    pickle) so pages can be extracted in parallel worker processes.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        page = pdf.pages[index]
+        try:
+            text = page.extract_text() or ''
+        except Exception:
+            text = ''
+        tables = []
+        try:
+            for table in page.extract_tables():
+                tables.append([[('' if c is None else str(c)) for c in row] for row in table[:10]])
+        except Exception:
+            tables = []
+    return {'page': index + 1, 'text_preview': text[:5000], 'tables': tables}
+
+
 def pdf_to_csv_bytes(file_content: bytes, explain_amounts: Optional[List[float]] = None, explain_transactions: bool = False) -> Tuple[bytes, Optional[int], Optional[str]]:
     """OCR-first parser for Capitec statements (minimal implementation).
 
@@ -15,7 +15,7 @@ Supports:
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, Tuple
+from typing import BinaryIO, Optional, Tuple
 from datetime import datetime
 
 
@@ -37,6 +37,23 @@ class StorageBackend(ABC):
         """
         pass
     
+    def upload_fileobj(self, fileobj: BinaryIO, object_key: str, content_type: str = "application/pdf") -> str:
+        """
+        Upload a file-like object to storage, streaming it where the backend supports it
+        
+        The default implementation reads the whole object into memory; backends
+        override it to stream.
+        
+        Args:
+            fileobj: Readable binary file object, positioned at the start of the content
+            object_key: Unique identifier/path for the file
+            content_type: MIME type of the file
+            
+        Returns:
+            object_key: The key/path where the file was stored
+        """
+        return self.upload_file(fileobj.read(), object_key, content_type)
+    
     @abstractmethod
     def download_file(self, object_key: str) -> bytes:
         """
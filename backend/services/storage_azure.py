@@ -11,7 +11,7 @@ Production storage using Azure Blob Storage with:
 from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
 from azure.core.exceptions import ResourceNotFoundError
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import BinaryIO, Optional
 from .storage import StorageBackend
 
 
@@ -64,6 +64,10 @@ class AzureBlobStorage(StorageBackend):
         except Exception as e:
             raise Exception(f"Failed to upload to Azure Blob Storage: {e}")
     
+    def upload_fileobj(self, fileobj: BinaryIO, object_key: str, content_type: str = "application/pdf") -> str:
+        """Stream a file object to Azure Blob Storage (upload_blob reads streams in blocks)"""
+        return self.upload_file(fileobj, object_key, content_type)
+    
     def download_file(self, object_key: str) -> bytes:
         """Download file from Azure Blob Storage"""
         try:
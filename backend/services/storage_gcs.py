@@ -12,7 +12,7 @@ from google.cloud import storage
 from google.auth import default as default_auth
 from google.auth.exceptions import DefaultCredentialsError
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import BinaryIO, Optional
 from .storage import StorageBackend
 import os
 
@@ -75,6 +75,18 @@ class GCSStorage(StorageBackend):
         except Exception as e:
             raise Exception(f"Failed to upload to GCS: {e}")
     
+    def upload_fileobj(self, fileobj: BinaryIO, object_key: str, content_type: str = "application/pdf") -> str:
+        """Stream a file object to Google Cloud Storage"""
+        try:
+            blob = self.bucket.blob(object_key)
+            blob.metadata = {
+                'uploaded_at': datetime.utcnow().isoformat()
+            }
+            blob.upload_from_file(fileobj, content_type=content_type)
+            return object_key
+        except Exception as e:
+            raise Exception(f"Failed to upload to GCS: {e}")
+    
     def download_file(self, object_key: str) -> bytes:
         """Download file from Google Cloud Storage"""
         try:
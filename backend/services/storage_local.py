@@ -8,7 +8,7 @@ Stores files on the local filesystem and generates file:// URLs.
 import os
 import shutil
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, Optional
 from .storage import StorageBackend
 
 
@@ -40,6 +40,16 @@ class LocalStorage(StorageBackend):
         
         return object_key
     
+    def upload_fileobj(self, fileobj: BinaryIO, object_key: str, content_type: str = "application/pdf") -> str:
+        """Copy a file object to the local filesystem in chunks"""
+        full_path = os.path.join(self.base_path, object_key)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        
+        with open(full_path, 'wb') as f:
+            shutil.copyfileobj(fileobj, f)
+        
+        return object_key
+    
     def download_file(self, object_key: str) -> bytes:
         """Download file from local filesystem"""
         full_path = os.path.join(self.base_path, object_key)
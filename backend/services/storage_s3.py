@@ -9,10 +9,11 @@ Production storage using Amazon S3 with:
 """
 
 import boto3
+from boto3.exceptions import S3UploadFailedError
 from botocore.exceptions import ClientError
 from botocore.config import Config as BotoConfig
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, Optional
 from .storage import StorageBackend
 
 
@@ -68,6 +69,26 @@ class S3Storage(StorageBackend):
         except ClientError as e:
             raise Exception(f"Failed to upload to S3: {e}")
     
+    def upload_fileobj(self, fileobj: BinaryIO, object_key: str, content_type: str = "application/pdf") -> str:
+        """Stream a file object to S3 (multipart for large files) with server-side encryption"""
+        try:
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                object_key,
+                ExtraArgs={
+                    'ContentType': content_type,
+                    'ServerSideEncryption': 'AES256',
+                    'Metadata': {
+                        'uploaded_at': datetime.utcnow().isoformat()
+                    }
+                }
+            )
+            return object_key
+        except (ClientError, S3UploadFailedError) as e:
+            # The transfer manager wraps ClientError in S3UploadFailedError
+            raise Exception(f"Failed to upload to S3: {e}")
+    
     def download_file(self, object_key: str) -> bytes:
         """Download file from S3"""
         try:
@@ -11,7 +11,7 @@ from datetime import datetime, date
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
-from models import Transaction, CustomCategory, SessionVATConfig, SessionLocal
+from models import Transaction, TransactionMerchant, CustomCategory, SessionVATConfig, SessionLocal
 
 # Import VAT defaults from categories_service to keep them in sync
 try:
@@ -302,25 +302,7 @@ class VATService:
             if not transaction:
                 return False, "Transaction not found"
             
-            # Get VAT settings for the transaction's category
-            vat_settings = self.get_category_vat_settings(transaction.category)
-            
-            if not vat_settings["applicable"]:
-                # Clear VAT fields if not applicable
-                transaction.vat_amount = None
-                transaction.amount_excl_vat = None
-                transaction.amount_incl_vat = None
-            else:
-                # Calculate VAT (assuming amount is VAT inclusive)
-                vat_calc = self.calculate_vat(
-                    transaction.amount,
-                    vat_settings["rate"],
-                    amount_includes_vat=True
-                )
-                
-                transaction.vat_amount = vat_calc["vat_amount"]
-                transaction.amount_excl_vat = vat_calc["amount_excl_vat"]
-                transaction.amount_incl_vat = vat_calc["amount_incl_vat"]
+            self._set_vat_fields(transaction)
             
             db.commit()
             return True, "VAT calculated successfully"
@@ -330,6 +312,90 @@ class VATService:
         finally:
             db.close()
     
+    def apply_vat_batch(
+        self,
+        transaction_ids: List[int],
+        session_id: str,
+        force: bool = False,
+        db: Optional[Session] = None
+    ) -> Tuple[bool, str]:
+        """
+        Calculate and apply VAT to several transactions of a session at once
+        
+        Same as apply_vat_to_transaction per id, but with one query and one commit,
+        and each category's VAT settings looked up once.
+        
+        Args:
+            transaction_ids: IDs of the transactions
+            session_id: Session ID
+            force: If True, apply even if VAT is disabled
+            db: Optional caller session; the fields are set on it and the caller commits
+        """
+        if not force and not self.is_vat_enabled(session_id):
+            return False, "VAT calculation is not enabled for this session"
+        
+        own_session = db is None
+        if own_session:
+            db = self._get_db()
+        try:
+            transactions = db.query(Transaction).filter(
+                Transaction.id.in_(transaction_ids),
+                Transaction.session_id == session_id
+            ).all()
+            
+            settings_cache = {}
+            for transaction in transactions:
+                self._set_vat_fields(transaction, settings_cache)
+            
+            if own_session:
+                db.commit()
+            return True, f"VAT calculated for {len(transactions)} transaction(s)"
+        except Exception as e:
+            if own_session:
+                db.rollback()
+            return False, f"Failed to calculate VAT: {str(e)}"
+        finally:
+            if own_session:
+                db.close()
+    
+    def _set_vat_fields(self, transaction: Transaction, settings_cache: Optional[Dict[str, Dict]] = None) -> bool:
+        """
+        Set the VAT fields of a transaction from its category's VAT settings
+        
+        Args:
+            transaction: Transaction to update
+            settings_cache: Optional dict of category -> VAT settings shared across a batch
+        
+        Returns:
+            True if VAT applies to the category, False if the fields were cleared
+        """
+        # Get VAT settings for the transaction's category
+        if settings_cache is None:
+            vat_settings = self.get_category_vat_settings(transaction.category)
+        else:
+            vat_settings = settings_cache.get(transaction.category)
+            if vat_settings is None:
+                vat_settings = settings_cache[transaction.category] = self.get_category_vat_settings(transaction.category)
+        
+        if not vat_settings["applicable"]:
+            # Clear VAT fields if not applicable
+            transaction.vat_amount = None
+            transaction.amount_excl_vat = None
+            transaction.amount_incl_vat = None
+            return False
+        
+        # Calculate VAT (assuming amount is VAT inclusive)
+        vat_calc = self.calculate_vat(
+            transaction.amount,
+            vat_settings["rate"],
+            amount_includes_vat=True
+        )
+        
+        transaction.vat_amount = vat_calc["vat_amount"]
+        transaction.amount_excl_vat = vat_calc["amount_excl_vat"]
+        transaction.amount_incl_vat = vat_calc["amount_incl_vat"]
+        return True
+    
     def recalculate_all_transactions(self, session_id: str) -> Tuple[bool, str, Dict]:
         """Recalculate VAT for all transactions in a session"""
         if not self.is_vat_enabled(session_id):
@@ -343,28 +409,13 @@ class VATService:
             
             updated_count = 0
             skipped_count = 0
+            settings_cache = {}
             
             for transaction in transactions:
-                vat_settings = self.get_category_vat_settings(transaction.category)
-                
-                if not vat_settings["applicable"]:
-                    # Clear VAT fields
-                    transaction.vat_amount = None
-                    transaction.amount_excl_vat = None
-                    transaction.amount_incl_vat = None
-                    skipped_count += 1
-                else:
-                    # Calculate VAT
-                    vat_calc = self.calculate_vat(
-                        transaction.amount,
-                        vat_settings["rate"],
-                        amount_includes_vat=True
-                    )
-                    
-                    transaction.vat_amount = vat_calc["vat_amount"]
-                    transaction.amount_excl_vat = vat_calc["amount_excl_vat"]
-                    transaction.amount_incl_vat = vat_calc["amount_incl_vat"]
+                if self._set_vat_fields(transaction, settings_cache):
                     updated_count += 1
+                else:
+                    skipped_count += 1
             
             db.commit()
             
@@ -461,7 +512,6 @@ class VATService:
         import openpyxl
         from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
         import csv
-        from models import TransactionMerchant
         
         db = self._get_db()
         try:
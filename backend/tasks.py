@@ -95,23 +95,21 @@ def parse_pdf_async(self: Task, pdf_content_base64: str, filename: str,
         
         # Parse PDF
         from services.pdf_parser import pdf_to_csv_bytes
-        from services.parser import normalize_csv, validate_csv
+        from services.parser import normalize_csv, InvalidCSVError
         
         update_task_status(db, self.request.id, 'PROCESSING', 25, 'Converting PDF to CSV...')
         
         csv_bytes = pdf_to_csv_bytes(pdf_bytes, filename)
         
-        # Validate CSV
-        is_valid, error_msg = validate_csv(csv_bytes)
-        if not is_valid:
-            error_result = {'status': 'error', 'error': f'Invalid CSV: {error_msg}'}
-            update_task_status(db, self.request.id, 'FAILED', 100, error_message=error_msg)
-            return error_result
-        
         update_task_status(db, self.request.id, 'PROCESSING', 50, 'Normalizing transactions...')
         
-        # Normalize transactions
-        normalized_transactions, parse_warnings, skipped_rows, bank_source = normalize_csv(csv_bytes)
+        # Validate and normalize transactions in one pass
+        try:
+            normalized_transactions, parse_warnings, skipped_rows, bank_source = normalize_csv(csv_bytes, strict=True)
+        except InvalidCSVError as e:
+            error_result = {'status': 'error', 'error': f'Invalid CSV: {e}'}
+            update_task_status(db, self.request.id, 'FAILED', 100, error_message=str(e))
+            return error_result
         
         if not normalized_transactions:
             error_result = {'status': 'error', 'error': 'No valid transactions found in file'}
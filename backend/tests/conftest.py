@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite database before config/models are imported
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
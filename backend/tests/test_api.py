@@ -0,0 +1,226 @@
+import json
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import main
+import models
+from services import cache as cache_module
+
+
+class ApiTestCase(unittest.TestCase):
+    """Endpoint tests against the temporary SQLite database, signed in as one user."""
+
+    @classmethod
+    def setUpClass(cls):
+        models.init_db()
+        cls.db = models.SessionLocal()
+        cls.user = models.User(email=f"{cls.__name__.lower()}@example.com", hashed_password="x")
+        cls.db.add(cls.user)
+        cls.db.commit()
+        cls.client_row = models.Client(user_id=cls.user.id, name="Client")
+        cls.db.add(cls.client_row)
+        cls.db.commit()
+        user_id = cls.user.id
+
+        def current_user():
+            with models.SessionLocal() as s:
+                u = s.get(models.User, user_id)
+                s.expunge(u)
+                return u
+
+        main.app.dependency_overrides[main.get_current_user] = current_user
+        cls.api = TestClient(main.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+        cls.db.close()
+
+
+class TestListRules(ApiTestCase):
+
+    def test_returns_saved_rule(self):
+        conditions = {"match_type": "all", "conditions": [{"field": "description", "op": "contains", "value": "engen"}]}
+        action = {"type": "set_category", "category": "Fuel"}
+        rule = models.Rule(
+            client_id=self.client_row.id, name="Fuel", enabled=1, priority=5,
+            conditions=json.dumps(conditions), action=json.dumps(action), auto_apply=1
+        )
+        self.db.add(rule)
+        self.db.commit()
+
+        # The session-rules GET /rules route is registered first and answers the URL,
+        # so the client-rules handler is called directly
+        response = main.list_rules(client_id=self.client_row.id, current_user=self.user, db=self.db)
+
+        self.assertEqual(response["rules"], [{
+            "id": rule.id,
+            "name": "Fuel",
+            "enabled": True,
+            "priority": 5,
+            "conditions": conditions,
+            "action": action,
+            "auto_apply": True,
+        }])
+
+
+class TestListInvoices(ApiTestCase):
+
+    def test_returns_client_invoice(self):
+        invoice = models.Invoice(
+            client_id=self.client_row.id, session_id="inv-session", supplier_name="Supplier A", invoice_date=date(2024, 3, 1),
+            invoice_number="INV-1", total_amount=115.0, vat_amount=15.0
+        )
+        self.db.add(invoice)
+        self.db.commit()
+
+        response = self.api.get("/invoices", params={"client_id": self.client_row.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([i["id"] for i in response.json()["invoices"]], [invoice.id])
+
+
+class TestValidationReport(ApiTestCase):
+
+    def test_failures_bucketed_like_python_rounding(self):
+        session_id = "validation-session"
+        self.db.add(models.SessionState(session_id=session_id, friendly_name="Validation"))
+        rows = [(1, 0.5), (0, 0.5), (0, 12.5), (0, 13.4), (0, -2.5), (0, 0.0), (0, None), (None, 4.0)]
+        for day, (verified, difference) in enumerate(rows, start=1):
+            self.db.add(models.Transaction(
+                client_id=self.client_row.id, session_id=session_id, date=date(2024, 1, day),
+                description=f"Row {day}", amount=-10.0, category="Other",
+                balance_verified=verified, balance_difference=difference
+            ))
+        self.db.commit()
+
+        response = self.api.get(f"/sessions/{session_id}/validation-report")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["failures_by_difference"],
+            {">0": 1, ">12": 1, ">13": 1, ">-2": 1, "unknown": 2}
+        )
+
+
+class TestDeleteSession(ApiTestCase):
+
+    def test_removes_saved_ocr_regions(self):
+        session_id = "delete-session-ocr"
+        self.db.add(models.Transaction(
+            client_id=self.client_row.id, session_id=session_id, date=date(2024, 1, 1),
+            description="Row", amount=-10.0, category="Other"
+        ))
+        self.db.commit()
+        main.ocr_region_store.set(self.user.id, session_id, {"pages": {1: []}, "amount_type": "single"})
+
+        response = self.api.delete(f"/sessions/{session_id}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(main.ocr_region_store.get(self.user.id, session_id))
+
+
+class _FakeRedis:
+    """Just enough of the redis client for CacheService: strings, sets and pipelines."""
+
+    def __init__(self):
+        self.data = {}
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    def ttl(self, key):
+        return -1 if key in self.data else -2
+
+    def expire(self, key, ttl):
+        return key in self.data
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def hincrby(self, key, field, amount):
+        pass
+
+    def pipeline(self):
+        redis_client, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args: calls.append((name, args))
+
+            def execute(self):
+                return [getattr(redis_client, name)(*args) for name, args in calls]
+
+        return Pipeline()
+
+
+class TestUpdateTransactionCategory(ApiTestCase):
+
+    def test_single_edit_refreshes_cached_client_summary(self):
+        session_id = "single-edit-cache"
+        txn = models.Transaction(
+            client_id=self.client_row.id, session_id=session_id, date=date(2024, 2, 1),
+            description="Engen", amount=-100.0, category="Other"
+        )
+        self.db.add(txn)
+        self.db.commit()
+
+        with mock.patch.dict("os.environ", {"CACHE_ENABLED": "true"}), \
+                mock.patch("redis.from_url", return_value=_FakeRedis()):
+            cache = cache_module.CacheService()
+        with mock.patch.object(cache_module, "_cache_service", cache):
+            url = f"/category-summary?client_id={self.client_row.id}"
+            before = self.api.get(url).json()
+            response = self.api.put(f"/transactions/{txn.id}?session_id={session_id}", json={"category": "Fuel"})
+            after = self.api.get(url).json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Fuel", json.dumps(before))
+        self.assertIn("Fuel", json.dumps(after))
+
+
+class TestFlushAuditLog(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        models.init_db()
+        with models.SessionLocal() as db:
+            user = models.User(email="flushauditlog@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+            cls.user_id = user.id
+
+    def tearDown(self):
+        main._audit_log_queue.clear()
+
+    def _row(self, n):
+        return {"user_id": self.user_id, "invoice_id": None, "file_key": f"key-{n}", "action": "download",
+                "ip_address": None, "user_agent": None, "storage_backend": "local",
+                "created_at": datetime.utcnow()}
+
+    def test_failed_insert_keeps_rows_queued(self):
+        rows = [self._row(n) for n in range(3)]
+        main._audit_log_queue.extend(rows)
+        failing = mock.MagicMock()
+        failing.execute.side_effect = RuntimeError("database is locked")
+        with mock.patch.object(main, "SessionLocal", return_value=failing):
+            self.assertEqual(main.flush_audit_log(), 0)
+        self.assertEqual(list(main._audit_log_queue), rows)
+
+        self.assertEqual(main.flush_audit_log(), 3)
+        self.assertFalse(main._audit_log_queue)
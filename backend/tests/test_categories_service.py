@@ -0,0 +1,116 @@
+import copy
+import time
+import unittest
+from unittest import mock
+
+from services import categories_service
+from services.categories_service import CategoriesService, CategoryRule, new_rule_id
+
+
+class TestRuleIds(unittest.TestCase):
+
+    def test_rule_id_is_26_char_crockford(self):
+        rule_id = new_rule_id()
+        self.assertEqual(len(rule_id), 26)
+        self.assertTrue(all(c in "0123456789ABCDEFGHJKMNPQRSTVWXYZ" for c in rule_id))
+
+    def test_rule_ids_sort_in_creation_order(self):
+        first = new_rule_id()
+        time.sleep(0.002)
+        second = new_rule_id()
+        self.assertLess(first, second)
+
+
+class TestApplyRules(unittest.TestCase):
+
+    def setUp(self):
+        self.service = CategoriesService()
+        self.service.session_rules['s1'] = [
+            CategoryRule('r1', 'Fuel', 'Fuel', ['engen', 'shell'], 1, True, True),
+            CategoryRule('r2', 'Rent', 'Rent', ['rent'], 2, True, True),
+            CategoryRule('r3', 'VAT', 'Bank Fees', ['vat'], 3, False, True, match_compound_words=True),
+        ]
+        self.transactions = [
+            {'id': 1, 'description': 'ENGEN GARAGE rent'},
+            {'id': 2, 'description': 'Monthly RENT payment'},
+            {'id': 3, 'description': 'Parental leave'},
+            {'id': 4, 'description': 'SARS NaVATFeb'},
+            {'id': 5, 'description': None},
+        ]
+
+    def test_first_priority_match_wins(self):
+        result = self.service.apply_rules_to_transactions('s1', self.transactions)
+        categories = [t.get('category') for t in result['transactions']]
+        self.assertEqual(categories, ['Fuel', 'Rent', None, 'Bank Fees', None])
+        self.assertEqual(result['updated'], 3)
+        self.assertEqual(result['rules_applied'], 3)
+
+    def test_auto_apply_only_skips_manual_rules(self):
+        result = self.service.apply_rules_to_transactions('s1', self.transactions, auto_apply_only=True)
+        self.assertEqual(result['updated'], 2)
+        self.assertNotIn('category', result['transactions'][3])
+
+    def test_preview_reports_keyword(self):
+        preview = self.service.preview_rule_matches('s1', 'r1', self.transactions)
+        self.assertEqual(preview['count'], 1)
+        self.assertEqual(preview['matched'][0]['keyword_matched'], 'engen')
+        self.assertEqual(preview['percentage'], 20.0)
+
+
+class TestApplyRulesHyperscan(unittest.TestCase):
+
+    def setUp(self):
+        self.service = CategoriesService()
+        rules = [
+            CategoryRule('r0', 'Fuel', 'Fuel', ['engen', 'shell'], 0, True, True),
+            CategoryRule('r1', 'Rent', 'Rent', ['rent'], 1, True, True),
+            CategoryRule('r2', 'VAT', 'Bank Fees', ['vat'], 2, True, True, match_compound_words=True),
+            CategoryRule('r3', 'Interest', 'Bank Fees', ['rente'], 3, True, True, match_compound_words=True),
+            CategoryRule('r4', 'Koffie', 'Meals', ['kafé', 'café'], 4, True, True),
+            CategoryRule('r5', 'Blank', 'Other', ['', '  '], 5, True, True),
+            CategoryRule('r6', 'Disabled', 'Other', ['garage'], 6, True, False),
+        ]
+        # Enough filler rules to take the Hyperscan path; their keywords overlap the real ones
+        rules += [
+            CategoryRule(f'f{i}', f'Filler {i}', f'Filler {i}', [f'vendor{i}', 'shell' if i % 7 == 0 else f'x{i}y'], 10 + i, True, True)
+            for i in range(categories_service.HYPERSCAN_MIN_RULES)
+        ]
+        self.service.session_rules['s1'] = rules
+        self.transactions = [
+            {'id': i, 'description': d}
+            for i, d in enumerate([
+                'ENGEN GARAGE rent', 'Monthly RENT payment', 'Parental leave', 'SARS NaVATFeb',
+                'RenteOpDTBal', 'Café Mocha', 'CAFÉ MOCHA', 'vendor12 invoice', 'VENDOR3 and x3y',
+                'shellfish market', 'Shell Ultra City', 'garage sale', '', None, 'vendor1 vendor10',
+            ])
+        ]
+
+    def _apply(self, use_hyperscan):
+        transactions = copy.deepcopy(self.transactions)
+        with mock.patch.object(categories_service, '_HAS_HYPERSCAN', use_hyperscan):
+            result = self.service.apply_rules_to_transactions('s1', transactions)
+        return result['updated'], [t.get('category') for t in result['transactions']]
+
+    @unittest.skipUnless(categories_service._HAS_HYPERSCAN, 'hyperscan is not installed')
+    def test_matches_vectorised_path(self):
+        with mock.patch.object(
+            CategoriesService, '_apply_rules_hyperscan', wraps=CategoriesService._apply_rules_hyperscan
+        ) as hyperscan_pass:
+            result = self._apply(True)
+        self.assertEqual(hyperscan_pass.call_count, 1)
+        self.assertEqual(result, self._apply(False))
+
+    @unittest.skipUnless(categories_service._HAS_HYPERSCAN, 'hyperscan is not installed')
+    def test_reuses_compiled_database_until_rules_change(self):
+        categories_service._compile_hyperscan_prefilter.cache_clear()
+        first = self._apply(True)
+        self.assertEqual(self._apply(True), first)
+        self.assertEqual(categories_service._compile_hyperscan_prefilter.cache_info().misses, 1)
+
+        self.service.session_rules['s1'][0].keywords = ['sasol']
+        self.assertEqual(self._apply(True)[1][0], 'Rent')
+        self.assertEqual(categories_service._compile_hyperscan_prefilter.cache_info().misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from services import categoriser
+from services.categoriser import categorize_batch, categorize_transaction
+
+
+class TestCategorizeBatch(unittest.TestCase):
+
+    def test_matches_per_row_categorization(self):
+        descriptions = ["SHELL FUEL 001", "Salary ACME", "WOOLWORTHS SANDTON", "unknown vendor", "SHELL FUEL 001", "refund"]
+        amounts = [-500.0, 20000.0, -120.5, -10.0, -300.0, 50.0]
+        self.assertEqual(
+            categorize_batch(descriptions, amounts),
+            [categorize_transaction(d, a) for d, a in zip(descriptions, amounts)],
+        )
+
+    def test_same_description_split_by_sign(self):
+        results = categorize_batch(["unknown vendor", "unknown vendor"], [-1.0, 1.0])
+        self.assertEqual(results, [("Other", True), ("Income", False)])
+
+    def test_empty_batch(self):
+        self.assertEqual(categorize_batch([], []), [])
+
+
+class TestNormalizeMerchant(unittest.TestCase):
+
+    def setUp(self):
+        patterns = [p for m in categoriser.MERCHANT_MAPPINGS for p in m.get("patterns", [])]
+        self.descriptions = ["", "unknown vendor 123", "POS PURCHASE 0412 JAN"]
+        self.descriptions += [f"POS {p.upper()} 1234" for p in patterns]
+        # Several patterns in one description: the earliest mapping must win, wherever it occurs
+        self.descriptions += [f"{a} / {b}" for a, b in zip(patterns, reversed(patterns))]
+
+    def test_automaton_is_used(self):
+        self.assertIsNotNone(categoriser._MERCHANT_AUTOMATON)
+
+    def test_matches_ordered_pattern_scan(self):
+        expected = {}
+        with mock.patch.object(categoriser, "_MERCHANT_AUTOMATON", None):
+            for d in self.descriptions:
+                expected[d] = categoriser.normalize_merchant(d)
+        for d in self.descriptions:
+            with self.subTest(description=d):
+                self.assertEqual(categoriser.normalize_merchant(d), expected[d])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import main
+
+
+def _contains(value):
+    return {"field": "description", "op": "contains", "value": value}
+
+
+class TestCompiledRuleSetPrefilter(unittest.TestCase):
+
+    def setUp(self):
+        keywords = ["engen", "shell", "rent", "woolworths", "checkers", "vodacom", "telkom", "eskom",
+                    "netflix", "uber", "pick n pay", "spar", "sasol", "bp", "dis-chem", "clicks"]
+        rules = [{"id": i, "conditions": {"match_type": "all", "conditions": [_contains(k)]}}
+                 for i, k in enumerate(keywords)]
+        rules += [
+            # 'all' with a numeric clause: gated on its needle, the amount still decides
+            {"id": 100, "conditions": {"match_type": "all", "conditions": [_contains("fee"), {"field": "amount", "op": "lt", "value": -50}]}},
+            # 'any' of two needles: gated on either
+            {"id": 101, "conditions": {"match_type": "any", "conditions": [_contains("salary"), _contains("payroll")]}},
+            # cannot be prefiltered: regex and a mixed 'any'
+            {"id": 102, "conditions": {"match_type": "all", "conditions": [{"field": "description", "op": "regex", "value": r"^POS\b"}]}},
+            {"id": 103, "conditions": {"match_type": "any", "conditions": [_contains("atm"), {"field": "amount", "op": "gt", "value": 1000}]}},
+            {"id": 104, "conditions": {"match_type": "all", "conditions": [_contains("")]}},
+        ]
+        self.rule_set = main.CompiledRuleSet(rules)
+        self.transactions = [
+            main._rule_txn_view(description, amount, None, "Other")
+            for description, amount in [
+                ("ENGEN Garage Rent", -300.0), ("Shell Ultra City", -500.0), ("Monthly bank FEE", -75.0),
+                ("monthly bank fee", -10.0), ("SALARY ACME", 20000.0), ("Payroll run", 5000.0),
+                ("POS Purchase Spar", -120.0), ("ATM withdrawal", -200.0), ("Transfer", 1500.0),
+                ("Pick n Pay Hypermarket", -800.0), ("Netflix.com", -199.0), ("", -1.0), (None, -1.0),
+                ("BP Express", -60.0), ("Dis-Chem Pharmacy", -99.0), ("unrelated text", -5.0),
+            ]
+        ]
+
+    def test_automaton_is_used(self):
+        self.assertIsNotNone(self.rule_set._automaton)
+
+    def test_candidates_match_full_scan(self):
+        for txn in self.transactions:
+            with self.subTest(description=txn["description"]):
+                prefiltered = [r["id"] for r, matches in self.rule_set.candidates(txn["description"]) if matches(txn)]
+                full_scan = [r["id"] for r, matches in self.rule_set.rules if matches(txn)]
+                self.assertEqual(prefiltered, full_scan)
@@ -18,6 +18,7 @@ except ImportError:
 from fastapi import UploadFile, HTTPException
 from typing import List, Optional
 import logging
+import os
 
 from config import Config
 
@@ -46,6 +47,20 @@ ALLOWED_IMAGE_TYPES = {
 
 ALL_ALLOWED_TYPES = ALLOWED_PDF_TYPES | ALLOWED_CSV_TYPES | ALLOWED_IMAGE_TYPES
 
+# Number of leading bytes handed to python-magic
+MIME_SNIFF_BYTES = 2048
+
+
+def _upload_size(file: UploadFile) -> int:
+    """Size of an uploaded file without reading it into memory"""
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
 
 async def validate_file_upload(
     file: UploadFile,
@@ -88,10 +103,11 @@ async def validate_file_upload(
                 detail=f"Invalid file type. Allowed extensions: {', '.join(require_extension)}"
             )
     
-    # Read file content for validation (read in chunks to avoid memory issues)
-    content = await file.read()
-    file_size = len(content)
-    
+    # Size comes from the spooled upload itself; only the first 2KB is read
+    # (for MIME sniffing) so validation never buffers the whole file
+    file_size = _upload_size(file)
+    content = await file.read(MIME_SNIFF_BYTES)
+
     # Reset file pointer so it can be read again
     await file.seek(0)
     
@@ -113,7 +129,7 @@ async def validate_file_upload(
     if HAS_MAGIC:
         try:
             # Try to detect MIME type from content
-            mime_type = magic.from_buffer(content[:2048], mime=True)  # Check first 2KB
+            mime_type = magic.from_buffer(content, mime=True)  # Check first 2KB
             logger.info(f"MIME type detected: {file.filename} -> {mime_type}")
             
             if mime_type not in allowed_types:
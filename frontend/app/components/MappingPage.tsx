@@ -78,7 +78,7 @@ export default function MappingPage() {
   async function applyCategoryToIds(ids: number[], category: string) {
     if (!sessionId) return
     try {
-      const res = await apiFetch(`${API_BASE}/bulk-categorise/ids?session_id=${encodeURIComponent(sessionId)}`, {
+      const res = await apiFetch(`${API_BASE}/bulk-categorise/ids?session_id=${encodeURIComponent(sessionId)}&return=all`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ ids, category })